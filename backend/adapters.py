@@ -0,0 +1,242 @@
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import price_extraction
+
+# Declarative description of each supported store. A spec lists, per field,
+# the CSS selectors that may hold it (in the order we believe in) and which
+# attributes to read. To support a new store, add a spec here or call
+# register_adapter() with one; EnhancedScraper needs no changes.
+#
+#   name             platform name stored on TrackedProduct.platform
+#   hosts            registrable domains routed to this adapter
+#   wait_for         CSS selector that signals the product page has rendered
+#   fields           {field: {'selectors': [...], 'attributes': [...],
+#                             'must_contain': [...], 'rewrite': [(old, new)]}}
+#   allowed_hosts    hosts the lean browser profile may contact
+#   blocked_patterns first-party URLs the lean profile blocks anyway
+#   page_source_price  also scan raw page source for price fields
+#   rate_limit       requests per second to this store (see rate_limiter)
+#   block_markers    strings that only appear on the store's captcha / bot-wall pages
+ADAPTER_SPECS = [
+    {
+        'name': 'Amazon',
+        'hosts': ['amazon.in', 'amazon.com'],
+        'wait_for': '#productTitle',
+        'fields': {
+            'name': {'selectors': ['#productTitle']},
+            'price': {'selectors': [
+                '.a-price.priceToPay .a-price-whole',
+                '.a-price.reinventPricePriceToPayMargin .a-price-whole',
+                'span.a-price-whole',
+                '#apex_desktop .a-price .a-price-whole',
+                '.a-section .a-price .a-price-whole',
+                '.a-price .a-offscreen',
+            ]},
+            'image_url': {
+                'selectors': ['#landingImage', '.a-dynamic-image', '#imgTagWrapperId img'],
+                'attributes': ['src', 'data-old-hires'],
+            },
+        },
+        'allowed_hosts': ['amazon.in', 'amazon.com', 'media-amazon.com', 'ssl-images-amazon.com', 'images-amazon.com'],
+        'blocked_patterns': ['*fls-eu.amazon*', '*fls-na.amazon*', '*unagi.amazon*', '*/rd/uedata*'],
+        'page_source_price': True,
+        'rate_limit': 1.0,
+        'block_markers': [
+            'Enter the characters you see below',
+            '/errors/validateCaptcha',
+            'api-services-support@amazon.com',
+        ],
+    },
+    {
+        'name': 'Flipkart',
+        'hosts': ['flipkart.com'],
+        'wait_for': 'h1, .B_NuCI',
+        'fields': {
+            'name': {'selectors': ['h1 span', '.B_NuCI', '._35KyD6', '.VU-ZEz']},
+            'price': {'selectors': ['.Nx9bqj.CxhGGd', '._30jeq3._16Jk6d', '._1_WHN1', '.CEmiEU .Nx9bqj']},
+            'image_url': {
+                'selectors': [
+                    '._4WELSP img',
+                    '.DByuf4.IZexXJ.jLEJ7H',
+                    '._396cs4._2amPTt._3qGmMb',
+                    'img[src*="rukminim"]',
+                    'img[data-src*="rukminim"]',
+                    '.vU5WPQ img',
+                    '._8id3KM img',
+                ],
+                'attributes': ['src', 'data-src'],
+                'must_contain': ['rukminim', 'flixcart.com'],
+                # Thumbnails are served at 128px; ask for the larger rendition
+                'rewrite': [('128/128', '416/416')],
+            },
+        },
+        'allowed_hosts': ['flipkart.com', 'flixcart.com'],
+        'rate_limit': 1.0,
+        'block_markers': ['Are you a human?', 'Flipkart Recaptcha'],
+    },
+    {
+        'name': 'Myntra',
+        'hosts': ['myntra.com'],
+        'wait_for': 'h1, .pdp-name',
+        'fields': {
+            'name': {'selectors': ['h1.pdp-name', '.pdp-name', 'h1']},
+            'price': {'selectors': ['.pdp-price strong', '.pdp-price .pdp-price-info', 'span.pdp-price', '.price-info .price']},
+            'image_url': {
+                'selectors': [
+                    'img.image-grid-image',
+                    '.image-grid-container img',
+                    '.pdp-image img',
+                    'img[src*="assets.myntassets.com"]',
+                    'img[data-src*="assets.myntassets.com"]',
+                    '.image-grid img',
+                    'img[alt]',
+                ],
+                'attributes': ['src', 'data-src'],
+                'must_contain': ['myntassets.com', 'http'],
+            },
+        },
+        'allowed_hosts': ['myntra.com', 'myntassets.com'],
+        'rate_limit': 0.5,
+        'block_markers': ['Oops! Something went wrong', 'Site Maintenance'],
+    },
+]
+
+PLAIN_AMOUNT_RE = re.compile(r'[0-9][0-9,]*(?:\.[0-9]+)?\.?')
+
+# Smoothing for selector hit rates: recent outcomes count more, so a selector
+# that stops matching after a site redesign shows up quickly
+HIT_RATE_DECAY = 0.2
+INITIAL_HIT_RATE = 0.5
+
+
+class SelectorStats:
+    """Running per-selector hit rates, for spotting selectors that stopped (or never) matching.
+
+    Reporting only: resolution always follows the declared selector order,
+    because broad fallbacks match more often than precise selectors but can
+    pick the wrong node (an MRP or a struck-through price).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates: Dict[Tuple[str, str, str], float] = {}
+        self._counts: Dict[Tuple[str, str, str], List[int]] = {}
+
+    def record(self, platform: str, field: str, selector: str, hit: bool):
+        key = (platform, field, selector)
+        with self._lock:
+            rate = self._rates.get(key, INITIAL_HIT_RATE)
+            self._rates[key] = rate + HIT_RATE_DECAY * ((1.0 if hit else 0.0) - rate)
+            counts = self._counts.setdefault(key, [0, 0])
+            counts[0] += 1 if hit else 0
+            counts[1] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                f"{platform}.{field} {selector}": {
+                    'hits': counts[0],
+                    'attempts': counts[1],
+                    'hit_rate': self._rates[(platform, field, selector)],
+                }
+                for (platform, field, selector), counts in self._counts.items()
+            }
+
+
+def parse_price_text(text: str) -> Optional[float]:
+    """Price from an element's text: '₹1,299', 'Rs. 499' or a bare '1,299.'"""
+    price = price_extraction.extract_price(text)
+    if price is None and PLAIN_AMOUNT_RE.fullmatch(text.strip()):
+        price = price_extraction.parse_amount(text.strip().rstrip('.'))
+    return price if price and price > 0 else None
+
+
+class PlatformAdapter:
+    """Routing and field extraction for one store, built from a declarative spec"""
+
+    def __init__(self, spec: Dict):
+        self.name = spec['name']
+        self.hosts = [host.lower() for host in spec['hosts']]
+        self.wait_for = spec.get('wait_for', 'body')
+        self.fields = spec.get('fields', {})
+        self.allowed_hosts = spec.get('allowed_hosts', self.hosts)
+        self.blocked_patterns = spec.get('blocked_patterns', [])
+        self.page_source_price = spec.get('page_source_price', False)
+        self.rate_limit = spec.get('rate_limit')
+        self.block_markers = spec.get('block_markers', [])
+
+    def matches(self, host: str) -> bool:
+        host = host.lower().split(':')[0]
+        return any(host == domain or host.endswith('.' + domain) for domain in self.hosts)
+
+    def field_selectors(self) -> Dict[str, List[str]]:
+        return {field: config['selectors'] for field, config in self.fields.items()}
+
+    def field_attributes(self) -> Dict[str, List[str]]:
+        return {field: config.get('attributes', []) for field, config in self.fields.items()}
+
+    def clean_value(self, field: str, values: Dict) -> Optional[object]:
+        """Validated value for `field` from one selector's match, or None if unusable"""
+        config = self.fields[field]
+
+        if field == 'price':
+            return parse_price_text(values.get('text') or '')
+
+        if config.get('attributes'):
+            value = next((values.get(attribute) for attribute in config['attributes'] if values.get(attribute)), None)
+        else:
+            value = values.get('text')
+        if not value:
+            return None
+        value = value.strip()
+
+        must_contain = config.get('must_contain')
+        if must_contain and not any(marker in value for marker in must_contain):
+            return None
+        for old, new in config.get('rewrite', []):
+            value = value.replace(old, new)
+        return value
+
+    def resolve(self, matches: Dict[str, Dict[str, Dict]], stats: SelectorStats, tier: str = 'browser') -> Dict:
+        """Pick each field's value from the first declared selector with a usable match.
+
+        `matches` maps field -> {selector: {'text': ..., attribute: ...}} for every
+        selector that found a node; selectors absent from it missed. All
+        selectors are evaluated in one pass, so each one's outcome is recorded
+        in `stats`, per tier because static HTML and rendered pages differ.
+        """
+        scope = f"{self.name}/{tier}"
+        resolved = {}
+        for field, selectors in self.field_selectors().items():
+            found = matches.get(field, {})
+            for selector in selectors:
+                value = self.clean_value(field, found[selector]) if selector in found else None
+                stats.record(scope, field, selector, value is not None)
+                if value is not None and field not in resolved:
+                    resolved[field] = value
+        return resolved
+
+
+ADAPTERS: List[PlatformAdapter] = []
+
+
+def register_adapter(spec: Dict) -> PlatformAdapter:
+    adapter = PlatformAdapter(spec)
+    ADAPTERS.append(adapter)
+    return adapter
+
+
+def adapter_for_url(url: str) -> Optional[PlatformAdapter]:
+    host = urlparse(url).netloc
+    return next((adapter for adapter in ADAPTERS if adapter.matches(host)), None)
+
+
+def get_adapter(name: str) -> Optional[PlatformAdapter]:
+    return next((adapter for adapter in ADAPTERS if adapter.name == name), None)
+
+
+for _spec in ADAPTER_SPECS:
+    register_adapter(_spec)
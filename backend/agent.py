@@ -3,7 +3,9 @@ import google.generativeai as genai  # Google's Gemini AI library
 import os  # For environment variables
 from typing import List, Dict  # Type hints for better code clarity
 import json  # For JSON parsing
+import time  # Call timing for metrics
 from dotenv import load_dotenv  # Load environment variables from .env file
+from metrics import GEMINI_SECONDS, GEMINI_FAILURES  # Gemini latency and failure metrics
 
 # Load environment variables (API keys, etc.)
 load_dotenv()
@@ -18,6 +20,17 @@ class PriceTrackerAgent:
         # Initialize the Gemini model for text generation
         self.model = genai.GenerativeModel('gemini-2.5-flash')
     
+    def _generate(self, prompt: str, operation: str):
+        """Call Gemini, recording latency and failures under `operation`"""
+        started = time.monotonic()
+        try:
+            return self.model.generate_content(prompt)
+        except Exception:
+            GEMINI_FAILURES.labels(operation).inc()
+            raise
+        finally:
+            GEMINI_SECONDS.labels(operation).observe(time.monotonic() - started)
+    
     def analyze_product(self, product_name: str, current_price: float, price_history: List[Dict]) -> Dict:
         """Analyze product pricing trends and provide AI-powered insights"""
         
@@ -44,7 +57,7 @@ class PriceTrackerAgent:
         
         try:
             # Send prompt to Gemini AI and get response
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'analyze_product')
             # Parse AI response as JSON
             return json.loads(response.text)
         except:
@@ -81,7 +94,7 @@ class PriceTrackerAgent:
         
         try:
             # Get AI-generated alternatives
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'find_alternatives')
             return json.loads(response.text)
         except:
             # Fallback: Generate alternatives programmatically if AI fails
@@ -129,7 +142,7 @@ class PriceTrackerAgent:
         
         try:
             # Get AI-generated email content
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'generate_price_alert_content')
             return json.loads(response.text)
         except:
             # Fallback email content if AI fails
@@ -163,7 +176,7 @@ class PriceTrackerAgent:
         
         try:
             # Get AI-generated personalized suggestions
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'smart_tracking_suggestions')
             return json.loads(response.text)
         except:
             # Fallback suggestions if AI fails
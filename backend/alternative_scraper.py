@@ -1,92 +1,140 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
 from typing import List, Dict
-import time
-import random
+import adapters
+from fetch_cache import FetchCache
+from rate_limiter import rate_limiter, is_block_page, THROTTLE_STATUSES
+import html_parser
 
 class AlternativeScraper:
+    AMAZON_SEARCH_URL = "https://www.amazon.in/s?k={query}"
+    FLIPKART_SEARCH_URL = "https://www.flipkart.com/search?q={query}"
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.fetch_cache = FetchCache()
+        # Shared with EnhancedScraper, so searches and product checks split each store's budget
+        self.rate_limiter = rate_limiter
+    
+    def fetch_results(self, search_url: str, parse) -> List[Dict]:
+        """Fetch a search page through the conditional-GET cache and parse it only if it changed"""
+        cached, conditional_headers, entry = self.fetch_cache.prepare(search_url, 'Search')
+        if cached:
+            return cached
+        if not self.rate_limiter.acquire(search_url):
+            return []
+        
+        try:
+            response = self.session.get(search_url, headers=conditional_headers, timeout=15)
+        except Exception:
+            self.rate_limiter.record(search_url, error=True)
+            raise
+        adapter = adapters.adapter_for_url(search_url)
+        blocked = response.status_code == 200 and is_block_page(response.text, adapter.block_markers if adapter else [])
+        self.rate_limiter.record(
+            search_url, response.status_code, blocked=blocked, retry_after=response.headers.get('Retry-After')
+        )
+        if blocked or response.status_code in THROTTLE_STATUSES:
+            return []
+        
+        cached, region_hash = self.fetch_cache.reuse(search_url, entry, response.status_code, response.text)
+        if cached:
+            return cached
+        
+        products = parse(response.content)
+        if products:
+            self.fetch_cache.store(search_url, response.headers, region_hash, products)
+        return products
     
     def search_amazon(self, query: str, limit: int = 2) -> List[Dict]:
         """Search Amazon for alternative products"""
         try:
-            search_url = f"https://www.amazon.in/s?k={query.replace(' ', '+')}"
-            response = requests.get(search_url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            products = []
-            items = soup.find_all('div', {'data-component-type': 's-search-result'})[:limit]
-            
-            for item in items:
-                try:
-                    name_elem = item.find('h2', class_='a-size-mini')
-                    if not name_elem:
-                        name_elem = item.find('span', class_='a-size-medium')
-                    
-                    price_elem = item.find('span', class_='a-price-whole')
-                    if not price_elem:
-                        price_elem = item.find('span', class_='a-offscreen')
-                    
-                    image_elem = item.find('img', class_='s-image')
-                    link_elem = item.find('h2').find('a') if item.find('h2') else None
-                    
-                    if name_elem and price_elem:
-                        price_text = price_elem.text.replace(',', '').replace('₹', '')
-                        price = float(re.findall(r'\d+', price_text)[0]) if re.findall(r'\d+', price_text) else 0
-                        
-                        products.append({
-                            'name': name_elem.text.strip()[:100],
-                            'price': price,
-                            'platform': 'Amazon',
-                            'url': f"https://amazon.in{link_elem['href']}" if link_elem else '#',
-                            'image_url': image_elem['src'] if image_elem else ''
-                        })
-                except:
-                    continue
-            
-            return products
+            search_url = self.AMAZON_SEARCH_URL.format(query=query.replace(' ', '+'))
+            return self.fetch_results(search_url, self.parse_amazon_results)[:limit]
         except:
             return []
     
+    def parse_amazon_results(self, content: bytes, limit: int = 2) -> List[Dict]:
+        # Build only the result cards, not the whole multi-megabyte page
+        soup = html_parser.make_soup(content, SoupStrainer('div', attrs={'data-component-type': 's-search-result'}))
+        
+        products = []
+        items = soup.find_all('div', {'data-component-type': 's-search-result'})[:limit]
+        
+        for item in items:
+            try:
+                name_elem = item.find('h2', class_='a-size-mini')
+                if not name_elem:
+                    name_elem = item.find('span', class_='a-size-medium')
+                
+                price_elem = item.find('span', class_='a-price-whole')
+                if not price_elem:
+                    price_elem = item.find('span', class_='a-offscreen')
+                
+                image_elem = item.find('img', class_='s-image')
+                link_elem = item.find('h2').find('a') if item.find('h2') else None
+                
+                if name_elem and price_elem:
+                    price_text = price_elem.text.replace(',', '').replace('₹', '')
+                    price = float(re.findall(r'\d+', price_text)[0]) if re.findall(r'\d+', price_text) else 0
+                    
+                    products.append({
+                        'name': name_elem.text.strip()[:100],
+                        'price': price,
+                        'platform': 'Amazon',
+                        'url': f"https://amazon.in{link_elem['href']}" if link_elem else '#',
+                        'image_url': image_elem['src'] if image_elem else ''
+                    })
+            except:
+                continue
+        
+        return products
+
     def search_flipkart(self, query: str, limit: int = 2) -> List[Dict]:
         """Search Flipkart for alternative products"""
         try:
-            search_url = f"https://www.flipkart.com/search?q={query.replace(' ', '%20')}"
-            response = requests.get(search_url, headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            products = []
-            items = soup.find_all('div', class_='_1AtVbE')[:limit]
-            
-            for item in items:
-                try:
-                    name_elem = item.find('div', class_='_4rR01T')
-                    price_elem = item.find('div', class_='_30jeq3')
-                    image_elem = item.find('img', class_='_396cs4')
-                    link_elem = item.find('a', class_='_1fQZEK')
-                    
-                    if name_elem and price_elem:
-                        price_text = price_elem.text.replace(',', '').replace('₹', '')
-                        price = float(re.findall(r'\d+', price_text)[0]) if re.findall(r'\d+', price_text) else 0
-                        
-                        products.append({
-                            'name': name_elem.text.strip()[:100],
-                            'price': price,
-                            'platform': 'Flipkart',
-                            'url': f"https://flipkart.com{link_elem['href']}" if link_elem else '#',
-                            'image_url': image_elem['src'] if image_elem else ''
-                        })
-                except:
-                    continue
-            
-            return products
+            search_url = self.FLIPKART_SEARCH_URL.format(query=query.replace(' ', '%20'))
+            return self.fetch_results(search_url, self.parse_flipkart_results)[:limit]
         except:
             return []
     
+    def parse_flipkart_results(self, content: bytes, limit: int = 2) -> List[Dict]:
+        # Cards carry several classes ("_1AtVbE col-12-12"); match the token, not the whole attribute
+        soup = html_parser.make_soup(content, SoupStrainer(
+            'div', attrs={'class': lambda c: c and '_1AtVbE' in c.split()}
+        ))
+        
+        products = []
+        items = soup.find_all('div', class_='_1AtVbE')[:limit]
+        
+        for item in items:
+            try:
+                name_elem = item.find('div', class_='_4rR01T')
+                price_elem = item.find('div', class_='_30jeq3')
+                image_elem = item.find('img', class_='_396cs4')
+                link_elem = item.find('a', class_='_1fQZEK')
+                
+                if name_elem and price_elem:
+                    price_text = price_elem.text.replace(',', '').replace('₹', '')
+                    price = float(re.findall(r'\d+', price_text)[0]) if re.findall(r'\d+', price_text) else 0
+                    
+                    products.append({
+                        'name': name_elem.text.strip()[:100],
+                        'price': price,
+                        'platform': 'Flipkart',
+                        'url': f"https://flipkart.com{link_elem['href']}" if link_elem else '#',
+                        'image_url': image_elem['src'] if image_elem else ''
+                    })
+            except:
+                continue
+        
+        return products
+
     def get_alternatives(self, product_name: str, platform: str) -> List[Dict]:
         """Get alternative products from different platforms"""
         alternatives = []
@@ -94,13 +142,11 @@ class AlternativeScraper:
         # Extract key search terms
         search_terms = ' '.join(product_name.split()[:3])
         
-        # Search other platforms
+        # Search other platforms; the shared rate limiter spaces out requests per store
         if platform != 'Amazon':
             alternatives.extend(self.search_amazon(search_terms, 2))
-            time.sleep(random.uniform(1, 2))
         
         if platform != 'Flipkart':
             alternatives.extend(self.search_flipkart(search_terms, 2))
-            time.sleep(random.uniform(1, 2))
         
         return alternatives
\ No newline at end of file
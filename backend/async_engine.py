@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from rate_limiter import url_domain
+from singleflight import canonical_url
+
+
+class AsyncScrapeEngine:
+    """Concurrent scrape runner built on a pooled keep-alive HTTP client.
+
+    Concurrency is capped both overall and per domain, so one slow store can't
+    starve the rest and no store sees more than `per_domain` requests at once.
+    Results are yielded as soon as each scrape finishes.
+
+    The engine owns one event loop thread, one client and one set of
+    semaphores for the life of the process. Worker threads hand their
+    batches to it with execute(), so connections are reused across batches
+    and the caps hold across all workers, not per batch.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        max_concurrency: Optional[int] = None,
+        per_domain: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.scraper = scraper
+        self.max_concurrency = max_concurrency or int(os.getenv("SCRAPE_MAX_CONCURRENCY", "16"))
+        self.per_domain = per_domain or int(os.getenv("SCRAPE_PER_DOMAIN_CONCURRENCY", "4"))
+        self.timeout = timeout or float(os.getenv("SCRAPE_TIMEOUT", "15"))
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Created on the engine loop and only used there
+        self._client: Optional[httpx.AsyncClient] = None
+        self._overall: Optional[asyncio.Semaphore] = None
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+
+    def build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.scraper.headers,
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            follow_redirects=True,
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="scrape-engine", daemon=True).start()
+            return self._loop
+
+    def execute(self, coroutine: Awaitable):
+        """Run `coroutine` on the engine loop and wait for its result (call from worker threads)"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def close(self, timeout: Optional[float] = None):
+        """Close the client and stop the loop; the next execute() starts fresh ones"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def close_client():
+            if self._client is not None:
+                await self._client.aclose()
+            self._client = None
+            self._overall = None
+            self._domains = {}
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_client(), loop).result(timeout)
+        except Exception as e:
+            print(f"Scrape engine close error: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def scrape_many(
+        self,
+        items: Iterable[Any],
+        key: Callable[[Any], str] = lambda item: item,
+    ) -> AsyncIterator[Tuple[Any, Optional[Dict]]]:
+        """Scrape every item's URL and yield (item, product_data) in completion order.
+
+        Runs on the engine loop (see execute). Items that point at the same
+        listing (e.g. one product tracked by several users) are grouped and
+        fetched once; every item in the group gets the result. Items on a
+        store whose circuit breaker is open get {'skipped': ...} unfetched.
+        """
+        if self._client is None:
+            self._client = self.build_client()
+            self._overall = asyncio.Semaphore(self.max_concurrency)
+        client, overall, domains = self._client, self._overall, self._domains
+
+        groups: Dict[str, Tuple[str, List[Any]]] = {}
+        for item in items:
+            url = key(item)
+            groups.setdefault(canonical_url(url), (url, []))[1].append(item)
+
+        async def scrape_one(url: str) -> Optional[Dict]:
+            if self.scraper.rate_limiter.is_open(url):
+                # The store is being backed off; not this listing's failure
+                return {'skipped': 'circuit open'}
+            domain = url_domain(url)
+            if domain not in domains:
+                domains[domain] = asyncio.Semaphore(self.per_domain)
+            async with domains[domain], overall:
+                try:
+                    return await self.scraper.scrape_product_async(url, client)
+                except Exception as e:
+                    print(f"Async scrape error for {url}: {e}")
+                    return None
+
+        async def scrape_group(url: str, group: List[Any]) -> Tuple[List[Any], Optional[Dict]]:
+            return group, await scrape_one(url)
+
+        tasks = [asyncio.ensure_future(scrape_group(url, group)) for url, group in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                group, product_data = await next_done
+                for item in group:
+                    yield item, dict(product_data) if product_data else product_data
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,77 @@
+"""Page load time and bytes transferred under the full and lean browser profiles.
+
+Bytes are summed from Chrome's network events (encodedDataLength of every
+finished request), so cross-origin resources are counted too.
+
+Usage:
+    python bench_browser_profiles.py [url ...]
+"""
+import json
+import sys
+import time
+
+from selenium import webdriver
+
+import adapters
+import browser_profiles
+from enhanced_scraper import EnhancedScraper
+
+DEFAULT_URLS = [
+    "https://www.amazon.in/realme-Wireless-Earbuds-Spatial-Charging/dp/B0DBGP48NW/?th=1",
+    "https://www.flipkart.com/nescafe-classic-coffee-imported-roast-ground/p/itmeb2db85bd2d02",
+    "https://www.myntra.com/flip-flops/hrx+by+hrithik+roshan/hrx-by-hrithik-roshan-men-black-printed--sliders/23773922/buy",
+]
+
+
+def transferred_bytes(driver) -> int:
+    total = 0
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += int(message['params'].get('encodedDataLength', 0))
+    return total
+
+
+def measure(profile: str, urls):
+    scraper = EnhancedScraper(browser_profile=profile)
+    options = scraper.build_options()
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    driver = webdriver.Chrome(options=options)
+    results = []
+    try:
+        for url in urls:
+            adapter = adapters.adapter_for_url(url)
+            platform = adapter.name if adapter else 'Other'
+            browser_profiles.apply_request_blocking(driver, profile, adapter.blocked_patterns if adapter else [])
+            driver.get_log('performance')  # drop events from the previous page
+
+            started = time.perf_counter()
+            driver.get(url)
+            load_seconds = time.perf_counter() - started
+
+            results.append({
+                'profile': profile,
+                'platform': platform,
+                'load_seconds': load_seconds,
+                'bytes': transferred_bytes(driver),
+                'title_found': bool(driver.title),
+            })
+            driver.get('about:blank')
+    finally:
+        driver.quit()
+    return results
+
+
+def main():
+    urls = sys.argv[1:] or DEFAULT_URLS
+    for profile in browser_profiles.PROFILES:
+        for result in measure(profile, urls):
+            print(
+                f"{result['profile']:<5} {result['platform']:<9} "
+                f"{result['load_seconds']:6.2f} s  {result['bytes'] / 1024:9.1f} KiB  "
+                f"title {'ok' if result['title_found'] else 'missing'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Concurrent read/write benchmark of the database engine profiles.
+
+API-shaped readers (a user's active products, a product's latest price
+history) run in threads alongside scheduler-shaped writers (bulk ingest of
+a batch of scrape results, committed as one transaction), for a fixed time.
+Each run seeds a fresh schema and compares the plain engine with the tuned
+profile from database.create_db_engine.
+
+By default each profile gets its own temporary SQLite file. Pass --url to
+benchmark a server database (e.g. postgresql://...) with the pooled
+profile; it creates and fills the tables there, so point it at a scratch
+database.
+
+Usage:
+    python bench_database.py [--seconds N] [--readers N] [--writers N]
+                             [--products N] [--url URL] [--output bench_database.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Importing database opens DATABASE_URL; keep the benchmark off the real one
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "import.db"))
+
+from sqlalchemy import delete
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine, User, TrackedProduct, PriceHistory
+from migrations import migrate
+from price_ingest import ingest_batch
+
+HISTORY_PER_PRODUCT = 30
+WRITE_BATCH = 20
+
+
+def seed(session_factory, users: int, products: int):
+    db = session_factory()
+    try:
+        for table in (PriceHistory, TrackedProduct, User):
+            db.execute(delete(table))
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(User, [
+            {'id': index + 1, 'email': f"bench{index}@example.com", 'is_active': True} for index in range(users)
+        ])
+        db.bulk_insert_mappings(TrackedProduct, [
+            {
+                'id': index + 1, 'user_id': index % users + 1, 'product_url': f"https://www.amazon.in/dp/B{index:09d}",
+                'product_name': f"Product {index}", 'current_price': 1000.0, 'original_price': 1000.0,
+                'platform': 'Amazon', 'is_active': True, 'scrape_status': 'ok', 'consecutive_failures': 0,
+            }
+            for index in range(products)
+        ])
+        db.bulk_insert_mappings(PriceHistory, [
+            {'product_id': index + 1, 'price': 1000.0 + day, 'timestamp': now - timedelta(days=day)}
+            for index in range(products) for day in range(HISTORY_PER_PRODUCT)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def run_load(session_factory, seconds: float, readers: int, writers: int, users: int, products: int) -> Dict:
+    deadline = time.monotonic() + seconds
+    samples = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+
+    def record(kind: str, started: float, failed: bool):
+        with lock:
+            if failed:
+                errors[kind] += 1
+            else:
+                samples[kind].append(time.monotonic() - started)
+
+    def reader(seed_value: int):
+        rng = random.Random(seed_value)
+        db = session_factory()
+        try:
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    db.query(TrackedProduct).filter(
+                        TrackedProduct.user_id == rng.randint(1, users), TrackedProduct.is_active == True
+                    ).all()
+                    db.query(PriceHistory).filter(PriceHistory.product_id == rng.randint(1, products)) \
+                        .order_by(PriceHistory.timestamp.desc()).limit(30).all()
+                    # End the read transaction like a request would
+                    db.rollback()
+                    record('read', started, False)
+                except Exception:
+                    db.rollback()
+                    record('read', started, True)
+        finally:
+            db.close()
+
+    def writer(seed_value: int):
+        rng = random.Random(seed_value)
+        db = session_factory()
+        try:
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                batch = [
+                    (rng.randint(1, products), {'price': rng.choice([1000.0, rng.uniform(500, 1500)])})
+                    for _ in range(WRITE_BATCH)
+                ]
+                try:
+                    ingest_batch(db, batch)
+                    db.commit()
+                    record('write', started, False)
+                except Exception:
+                    db.rollback()
+                    record('write', started, True)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + index,)) for index in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        kind: {
+            'ops': len(samples[kind]),
+            'per_s': len(samples[kind]) / seconds,
+            'p50_ms': percentile(samples[kind], 0.5),
+            'p95_ms': percentile(samples[kind], 0.95),
+            'p99_ms': percentile(samples[kind], 0.99),
+            'mean_ms': statistics.fmean(samples[kind]) * 1000 if samples[kind] else 0.0,
+            'errors': errors[kind],
+        }
+        for kind in ('read', 'write')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--url', help="server database to benchmark instead of temporary SQLite files")
+    parser.add_argument('--output', default='bench_database.json')
+    args = parser.parse_args()
+
+    results = []
+    for profile in ('plain', 'tuned'):
+        url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix=f"bench_db_{profile}_"), "bench.db")
+        engine = create_db_engine(url, tuned=profile == 'tuned')
+        migrate(engine, Base.metadata)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        seed(session_factory, args.users, args.products)
+
+        load = run_load(session_factory, args.seconds, args.readers, args.writers, args.users, args.products)
+        engine.dispose()
+        results.append({'profile': profile, 'backend': engine.dialect.name, **load})
+        for kind in ('read', 'write'):
+            stats = load[kind]
+            print(
+                f"{profile:<6} {kind:<6} {stats['per_s']:8.1f}/s  p50 {stats['p50_ms']:7.2f} ms  "
+                f"p95 {stats['p95_ms']:7.2f} ms  p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}"
+            )
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'seconds': args.seconds,
+        'readers': args.readers,
+        'writers': args.writers,
+        'write_batch': WRITE_BATCH,
+        'products': args.products,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Parse time and peak memory per HTML parser backend.
+
+Each case runs in a fresh interpreter so peak RSS is not polluted by earlier
+cases.
+
+Usage:
+    python bench_html_parser.py                  # synthetic multi-MB search page
+    python bench_html_parser.py page.html ...    # recorded pages
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+CASES = [
+    'bs4-html.parser-full',
+    'bs4-html.parser-strained',
+    'bs4-lxml-full',
+    'bs4-lxml-strained',
+    'lxml-text',
+    'selectolax-css',
+]
+
+RESULT_ATTRS = {'data-component-type': 's-search-result'}
+
+
+def synthetic_search_page(results: int = 3000) -> str:
+    """A search page shaped like Amazon's: lots of chrome around the result cards"""
+    card = (
+        '<div data-component-type="s-search-result" class="s-result-item">'
+        '<h2 class="a-size-mini"><a href="/dp/B0{index:08d}"><span>Product {index} with a long descriptive title</span></a></h2>'
+        '<img class="s-image" src="https://m.media-amazon.com/images/I/{index}.jpg">'
+        '<span class="a-price"><span class="a-offscreen">₹1,{index:03d}</span><span class="a-price-whole">1,{index:03d}</span></span>'
+        '<div class="a-row"><span>4.2 out of 5 stars</span><span>(1,234)</span></div>'
+        '</div>'
+    )
+    chrome = '<div class="nav"><ul>' + ''.join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(200)) + '</ul></div>'
+    script = '<script>var config = ' + json.dumps({'k%d' % i: 'v' * 40 for i in range(2000)}) + ';</script>'
+    cards = ''.join(card.format(index=i % 1000) for i in range(results))
+    return f'<html><head><title>Search</title>{script}</head><body>{chrome}{cards}{chrome}</body></html>'
+
+
+def run_case(case: str, path: str) -> dict:
+    """Parse once and pull the fields the scrapers read; runs inside the worker process"""
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    # Import everything up front so module loading isn't counted as parse memory
+    if case.startswith('bs4'):
+        from bs4 import BeautifulSoup, SoupStrainer
+    if 'lxml' in case:
+        import lxml.html
+        from lxml import etree
+    if case.startswith('selectolax'):
+        from selectolax.parser import HTMLParser
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    if case.startswith('bs4'):
+        features = 'lxml' if '-lxml-' in case else 'html.parser'
+        strainer = SoupStrainer('div', attrs=RESULT_ATTRS) if case.endswith('strained') else None
+        soup = BeautifulSoup(content, features, parse_only=strainer)
+        items = soup.find_all('div', RESULT_ATTRS)
+        found = sum(1 for item in items if item.find('span', class_='a-price-whole'))
+    elif case == 'lxml-text':
+        root = lxml.html.fromstring(content)
+        etree.strip_elements(root, 'script', 'style', with_tail=False)
+        found = len(root.text_content())
+    else:
+        tree = HTMLParser(content)
+        found = sum(1 for node in tree.css('div[data-component-type="s-search-result"] .a-price-whole'))
+
+    elapsed = time.perf_counter() - started
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        'case': case,
+        'seconds': elapsed,
+        'python_peak_mb': python_peak / 1024 / 1024,
+        # ru_maxrss is KiB on Linux; covers C-level allocations tracemalloc can't see
+        'rss_growth_mb': (peak_rss - baseline_rss) / 1024,
+        'found': found,
+    }
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        print(json.dumps(run_case(sys.argv[2], sys.argv[3])))
+        return
+
+    paths = sys.argv[1:]
+    temp_path = None
+    if not paths:
+        fd, temp_path = tempfile.mkstemp(suffix='.html')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(synthetic_search_page())
+        paths = [temp_path]
+
+    try:
+        for path in paths:
+            print(f"\n{path} ({os.path.getsize(path) / 1024 / 1024:.2f} MB)")
+            for case in CASES:
+                proc = subprocess.run(
+                    [sys.executable, __file__, '--worker', case, path],
+                    capture_output=True, text=True,
+                )
+                if proc.returncode != 0:
+                    print(f"  {case:<26} unavailable ({proc.stderr.strip().splitlines()[-1]})")
+                    continue
+                result = json.loads(proc.stdout)
+                print(
+                    f"  {case:<26} {result['seconds'] * 1000:9.1f} ms  "
+                    f"python peak {result['python_peak_mb']:7.1f} MB  "
+                    f"rss +{result['rss_growth_mb']:7.1f} MB  found {result['found']}"
+                )
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+if __name__ == "__main__":
+    main()
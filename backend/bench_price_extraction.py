@@ -0,0 +1,81 @@
+"""Micro-benchmark: legacy multi-pattern price extraction vs. price_extraction.
+
+Usage:
+    python bench_price_extraction.py                 # synthetic multi-MB pages
+    python bench_price_extraction.py page1.html ...  # recorded pages (text is extracted first)
+"""
+import re
+import sys
+import timeit
+from typing import Optional
+
+from price_extraction import extract_price
+
+
+def legacy_extract_price(text: str) -> Optional[float]:
+    """The loop EnhancedScraper.extract_price used before price_extraction existed"""
+    patterns = [
+        r'₹[\s]*([0-9,]+(?:\.[0-9]{2})?)',
+        r'Rs[\s]*([0-9,]+(?:\.[0-9]{2})?)',
+        r'([0-9,]+(?:\.[0-9]{2})?)[\s]*₹'
+    ]
+
+    for pattern in patterns:
+        matches = re.findall(pattern, text.replace(',', ''))
+        if matches:
+            try:
+                return float(matches[0])
+            except ValueError:
+                continue
+    return None
+
+
+def synthetic_page(size_mb: float, price_position: float) -> str:
+    """Page text of roughly `size_mb` MB with one price at `price_position` (0..1), or none if negative"""
+    filler = (
+        "Customers who viewed this item also viewed 4.3 out of 5 stars 12,345 ratings "
+        "Free delivery by tomorrow, 10 days replacement, 1 year warranty. "
+    )
+    repeats = int(size_mb * 1024 * 1024 / len(filler))
+    chunks = [filler] * repeats
+    if price_position >= 0:
+        chunks.insert(int(repeats * price_position), "Deal price: ₹1,23,456.50 inclusive of all taxes ")
+    return ''.join(chunks)
+
+
+def page_text(path: str) -> str:
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        html = f.read()
+    try:
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser').get_text()
+    except ImportError:
+        return re.sub(r'<[^>]+>', ' ', html)
+
+
+def bench(name: str, text: str, number: int = 5):
+    legacy = min(timeit.repeat(lambda: legacy_extract_price(text), number=number, repeat=3)) / number
+    compiled = min(timeit.repeat(lambda: extract_price(text), number=number, repeat=3)) / number
+    print(
+        f"{name:<40} {len(text) / 1024 / 1024:6.2f} MB  "
+        f"legacy {legacy * 1000:8.2f} ms  compiled {compiled * 1000:8.2f} ms  "
+        f"speedup {legacy / compiled if compiled else float('inf'):7.1f}x  "
+        f"-> {legacy_extract_price(text)} / {extract_price(text)}"
+    )
+
+
+def main():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            bench(path, page_text(path))
+        return
+
+    bench("2 MB, price near top", synthetic_page(2, 0.05))
+    bench("2 MB, price in middle", synthetic_page(2, 0.5))
+    bench("2 MB, price at bottom", synthetic_page(2, 0.95))
+    bench("2 MB, no price", synthetic_page(2, -1))
+    bench("8 MB, price in middle", synthetic_page(8, 0.5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Offline scraper benchmark and regression check against recorded fixtures.
+
+The pages in fixtures/ are served by a local HTTP stand-in that acts as a
+forward proxy, so the scrapers fetch their usual store URLs (over plain http)
+without touching the network. EnhancedScraper runs with browser escalation
+off; AlternativeScraper runs its Amazon and Flipkart searches.
+
+Every scrape is checked against fixtures/expected.json. Per adapter the
+report has latency percentiles, throughput and peak Python memory, for two
+modes:
+
+    cold        fetch cache emptied before every scrape: fetch + full parse
+    revalidate  cache kept with a zero TTL: conditional GET answered with 304
+
+Usage:
+    python bench_scrapers.py [--iterations N] [--output bench_scrapers.json]
+
+Exits with status 1 if any extracted field is wrong. The same checks run
+without the timings in test_fixtures.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SEARCH_METHODS = {
+    'AmazonSearch': ('AMAZON_SEARCH_URL', 'search_amazon'),
+    'FlipkartSearch': ('FLIPKART_SEARCH_URL', 'search_flipkart'),
+}
+
+
+def load_expected() -> dict:
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def route_key(url: str):
+    parsed = urlparse(url)
+    return parsed.netloc.lower(), parsed.path
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves a fixture for each proxied store URL, honouring If-None-Match"""
+
+    protocol_version = 'HTTP/1.1'
+    routes = {}
+    requests_served = 0
+
+    def do_GET(self):
+        url = self.path if self.path.startswith('http') else f"http://{self.headers.get('Host', '')}{self.path}"
+        fixture = self.routes.get(route_key(url))
+        if fixture is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body, etag = fixture
+        FixtureHandler.requests_served += 1
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(expected: dict) -> ThreadingHTTPServer:
+    routes = {}
+    entries = expected['products'] + expected['searches']
+    for entry in entries:
+        with open(os.path.join(FIXTURES_DIR, entry['fixture']), 'rb') as f:
+            body = f.read()
+        url = entry.get('url') or entry['url_template'].format(query='')
+        routes[route_key(url)] = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+    FixtureHandler.routes = routes
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check_fields(expected: dict, actual) -> list:
+    """Human-readable mismatches between an expected and an extracted record"""
+    if not actual:
+        return ['no result']
+    errors = []
+    for field, value in expected.items():
+        got = actual.get(field)
+        if isinstance(value, float):
+            matched = isinstance(got, (int, float)) and abs(got - value) < 0.01
+        else:
+            matched = got == value
+        if not matched:
+            errors.append(f"{field}: expected {value!r}, got {got!r}")
+    return errors
+
+
+def check_search(expected: list, actual: list) -> list:
+    if len(actual) != len(expected):
+        return [f"expected {len(expected)} results, got {len(actual)}"]
+    errors = []
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        errors.extend(f"result {index} {error}" for error in check_fields(want, got))
+    return errors
+
+
+def build_cases(expected: dict, scraper, alternative_scraper) -> list:
+    """(adapter, scrape callable, checker, fetch cache) for every fixture"""
+    cases = []
+    for entry in expected['products']:
+        cases.append((
+            entry['adapter'],
+            lambda url=entry['url']: scraper.scrape_product(url),
+            lambda result, want=entry['expected']: check_fields(want, result),
+            scraper.fetch_cache,
+        ))
+    for entry in expected['searches']:
+        attribute, method = SEARCH_METHODS[entry['adapter']]
+        setattr(alternative_scraper, attribute, entry['url_template'])
+        search = getattr(alternative_scraper, method)
+        cases.append((
+            entry['adapter'],
+            lambda search=search, query=entry['query']: search(query),
+            lambda result, want=entry['expected']: check_search(want, result),
+            alternative_scraper.fetch_cache,
+        ))
+    return cases
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(case, mode: str, iterations: int) -> dict:
+    adapter, scrape, check, cache = case
+    cache.clear()
+    if mode == 'revalidate':
+        scrape()  # prime the cache with validators
+
+    errors = []
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if mode == 'cold':
+            cache.clear()
+        began = time.perf_counter()
+        result = scrape()
+        latencies.append(time.perf_counter() - began)
+        if not errors:
+            errors = check(result)
+    elapsed = time.perf_counter() - started
+
+    # Memory is measured on separate runs; tracemalloc would skew the timings
+    tracemalloc.start()
+    for _ in range(min(iterations, 5)):
+        if mode == 'cold':
+            cache.clear()
+        scrape()
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'adapter': adapter,
+        'mode': mode,
+        'iterations': iterations,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'throughput_per_s': iterations / elapsed if elapsed else 0.0,
+        'python_peak_kb': python_peak / 1024,
+        'passed': not errors,
+        'errors': errors,
+    }
+
+
+def configure_environment(proxy: str, cache_dir: str):
+    """Route the scrapers through the stand-in; must run before they build their sessions and caches"""
+    for name in ('HTTP_PROXY', 'http_proxy'):
+        os.environ[name] = proxy
+    for name in ('NO_PROXY', 'no_proxy'):
+        os.environ[name] = ''
+    os.environ['FETCH_CACHE_PATH'] = os.path.join(cache_dir, 'fetch_cache.db')
+    for platform in ('AMAZON', 'FLIPKART', 'MYNTRA', 'OTHER', 'SEARCH'):
+        os.environ[f'FETCH_CACHE_TTL_{platform}'] = '0'
+
+
+def build_scrapers():
+    """(EnhancedScraper, AlternativeScraper) that do the full work on every call"""
+    from alternative_scraper import AlternativeScraper
+    from enhanced_scraper import EnhancedScraper
+    from rate_limiter import RateLimiter
+
+    scraper = EnhancedScraper(browser_fallback=False)
+    # Every iteration should do the work, not replay the previous result
+    scraper.singleflight.ttl = 0
+    alternative_scraper = AlternativeScraper()
+    # The stand-in doesn't need protecting; measure the scrapers, not the rate limits
+    scraper.rate_limiter = alternative_scraper.rate_limiter = RateLimiter(rate=1e6)
+    return scraper, alternative_scraper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', default='bench_scrapers.json')
+    args = parser.parse_args()
+
+    expected = load_expected()
+    server = start_stand_in(expected)
+    configure_environment(
+        f"http://127.0.0.1:{server.server_address[1]}", tempfile.mkdtemp(prefix='bench_scrapers_')
+    )
+
+    import html_parser
+
+    scraper, alternative_scraper = build_scrapers()
+    cases = build_cases(expected, scraper, alternative_scraper)
+
+    results = []
+    try:
+        for mode in ('cold', 'revalidate'):
+            for case in cases:
+                result = measure(case, mode, args.iterations)
+                results.append(result)
+                print(
+                    f"{result['adapter']:<15} {mode:<10} p50 {result['p50_ms']:7.2f} ms  "
+                    f"p95 {result['p95_ms']:7.2f} ms  {result['throughput_per_s']:8.1f}/s  "
+                    f"peak {result['python_peak_kb']:8.1f} KiB  {'ok' if result['passed'] else 'FAIL'}"
+                )
+                for error in result['errors']:
+                    print(f"    {error}")
+    finally:
+        server.shutdown()
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'html_parser': html_parser.default_backend(),
+        'requests_served': FixtureHandler.requests_served,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if not all(result['passed'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+from typing import List
+
+# "full" loads pages the way a normal browser does. "lean" only fetches what
+# is needed to read the title and price: eager page load, no images, and
+# nothing from third-party or media hosts.
+PROFILES = ('full', 'lean')
+
+# Resource types that never carry the title or price, blocked on every platform
+BLOCKED_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.m4a',
+]
+
+
+def selected_profile() -> str:
+    profile = os.getenv("BROWSER_PROFILE", "lean")
+    return profile if profile in PROFILES else 'lean'
+
+
+def host_resolver_rules(allowed_hosts: List[str]) -> str:
+    """Chrome resolver rules that make every host except the allowlisted ones unreachable"""
+    excludes = []
+    for host in allowed_hosts:
+        excludes.append(f"EXCLUDE {host}")
+        excludes.append(f"EXCLUDE *.{host}")
+    return "MAP * ~NOTFOUND, " + ", ".join(excludes)
+
+
+def apply_profile(options, profile: str, allowed_hosts: List[str]):
+    """Adjust ChromeOptions before launch; the lean rules are fixed for the life of the browser.
+
+    A pooled browser serves every platform, so `allowed_hosts` is the union of
+    the hosts each platform adapter needs for its document, scripts, XHR and
+    stylesheets. Ads, analytics and tag managers fall outside it.
+    """
+    if profile != 'lean':
+        return
+
+    # Return from driver.get() at DOMContentLoaded instead of waiting for every subresource
+    options.page_load_strategy = 'eager'
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument(f'--host-resolver-rules={host_resolver_rules(allowed_hosts)}')
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.media_stream': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })
+
+
+def apply_request_blocking(driver, profile: str, platform_patterns: List[str]):
+    """Install the URL blocklist for the platform about to be loaded via CDP"""
+    if profile != 'lean':
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {
+            'urls': BLOCKED_RESOURCE_PATTERNS + platform_patterns,
+        })
+    except Exception as e:
+        print(f"Could not install request blocking: {e}")
@@ -0,0 +1,210 @@
+import math
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import PriceHistory, TrackedProduct
+
+HOUR = 3600
+
+# (floor, ceiling) in seconds between checks of one product. Marketplaces
+# reprice several times a day; fashion and generic stores move more slowly.
+PLATFORM_BOUNDS = {
+    'Amazon': (1 * HOUR, 24 * HOUR),
+    'Flipkart': (1 * HOUR, 24 * HOUR),
+    'Myntra': (2 * HOUR, 48 * HOUR),
+    'Other': (3 * HOUR, 72 * HOUR),
+}
+
+DEFAULT_INTERVAL = int(os.getenv("CHECK_INTERVAL_DEFAULT", str(6 * HOUR)))
+# Aim to look this many times per expected price change, so moves are seen soon after they happen
+CHECKS_PER_CHANGE = float(os.getenv("CHECKS_PER_PRICE_CHANGE", "4"))
+# Only the most recent price changes shape the interval
+HISTORY_WINDOW = int(os.getenv("CHECK_HISTORY_WINDOW", "20"))
+# Weight of the newest gap in the running average of gaps between changes
+GAP_DECAY = 0.3
+
+# Spreading: each product owns one of CHECK_SPREAD_SLOTS phases of its
+# interval (by hash of its id), so checks are spread evenly instead of all
+# landing on the same tick. Jitter breaks up products that share a slot.
+SPREAD_SLOTS = int(os.getenv("CHECK_SPREAD_SLOTS", "96"))
+JITTER_FRACTION = float(os.getenv("CHECK_JITTER_FRACTION", "0.05"))
+MAX_JITTER = 600
+EPOCH = datetime(1970, 1, 1)
+
+# Failure backoff: a product whose scrape fails is retried after
+# FAILURE_BACKOFF_BASE, doubling per consecutive failure up to its normal
+# ceiling. After QUARANTINE_AFTER failures in a row it is quarantined and only
+# retried every QUARANTINE_RETRY, until a scrape succeeds again.
+FAILURE_BACKOFF_BASE = int(os.getenv("CHECK_FAILURE_BACKOFF", str(HOUR // 4)))
+QUARANTINE_AFTER = int(os.getenv("CHECK_QUARANTINE_AFTER", "5"))
+QUARANTINE_RETRY = int(os.getenv("CHECK_QUARANTINE_RETRY", str(7 * 24 * HOUR)))
+
+# TrackedProduct.scrape_status values
+STATUS_OK = 'ok'
+STATUS_FAILING = 'failing'
+STATUS_QUARANTINED = 'quarantined'
+
+
+def bounds_for(platform: str) -> Tuple[int, int]:
+    """(floor, ceiling) for a platform, overridable with CHECK_INTERVAL_MIN_/MAX_<PLATFORM>"""
+    floor, ceiling = PLATFORM_BOUNDS.get(platform, PLATFORM_BOUNDS['Other'])
+    key = platform.upper() if platform in PLATFORM_BOUNDS else 'OTHER'
+    floor = int(os.getenv(f"CHECK_INTERVAL_MIN_{key}", str(floor)))
+    ceiling = int(os.getenv(f"CHECK_INTERVAL_MAX_{key}", str(ceiling)))
+    return floor, max(floor, ceiling)
+
+
+def expected_change_gap(change_times: List[datetime], now: datetime) -> Optional[float]:
+    """Smoothed seconds between price changes, or None without enough history.
+
+    PriceHistory only gains a row when the price moves, so the gaps between
+    rows are the gaps between changes. The time since the last change is an
+    open gap that is at least that long; once it outgrows the average it
+    counts too, so a product that stops moving drifts toward the ceiling.
+    """
+    times = sorted(change_times)[-HISTORY_WINDOW:]
+    if not times:
+        return None
+
+    gap = None
+    for earlier, later in zip(times, times[1:]):
+        seconds = (later - earlier).total_seconds()
+        gap = seconds if gap is None else gap + GAP_DECAY * (seconds - gap)
+
+    since_last = (now - times[-1]).total_seconds()
+    if gap is None or since_last > gap:
+        gap = since_last if gap is None else gap + GAP_DECAY * (since_last - gap)
+    return gap
+
+
+def next_interval(change_times: List[datetime], platform: str, now: Optional[datetime] = None) -> int:
+    """Seconds until the next check: short for frequent movers, long for stable items"""
+    now = now or datetime.utcnow()
+    floor, ceiling = bounds_for(platform)
+
+    gap = expected_change_gap(change_times, now)
+    if gap is None:
+        interval = DEFAULT_INTERVAL
+    else:
+        # A single row is just the price at tracking time; until a change is
+        # seen, don't check less often than the default
+        interval = gap / CHECKS_PER_CHANGE
+        if len(change_times) < 2:
+            interval = max(interval, DEFAULT_INTERVAL)
+    return int(min(max(interval, floor), ceiling))
+
+
+def slot_fraction(product_id: int) -> float:
+    """Stable position of a product within any interval, in [0, 1)"""
+    return (zlib.crc32(str(product_id).encode()) % SPREAD_SLOTS) / SPREAD_SLOTS
+
+
+def spread_due_time(product_id: int, interval: int, now: datetime, min_delay_fraction: float = 0.5) -> datetime:
+    """Next time on the product's phase grid at least `min_delay_fraction` intervals away.
+
+    With a steady interval consecutive checks land exactly one interval apart;
+    when the interval changes the product moves to the matching point of
+    its new grid. A min_delay_fraction of 0 spreads first checks over the
+    coming interval.
+    """
+    phase = slot_fraction(product_id) * interval
+    earliest = (now - EPOCH).total_seconds() + interval * min_delay_fraction
+    due = phase + math.ceil((earliest - phase) / interval) * interval
+    due += random.uniform(-1, 1) * min(MAX_JITTER, interval * JITTER_FRACTION)
+    return EPOCH + timedelta(seconds=due)
+
+
+def backfill_unscheduled(db: Session, now: Optional[datetime] = None) -> int:
+    """Give products without a next_check_at a spread first check instead of all being due at once"""
+    now = now or datetime.utcnow()
+    products = db.query(TrackedProduct).filter(
+        TrackedProduct.is_active == True,
+        TrackedProduct.next_check_at == None,
+    ).all()
+    for product in products:
+        interval = next_interval([], product.platform or 'Other', now)
+        product.check_interval = interval
+        product.next_check_at = spread_due_time(product.id, interval, now, min_delay_fraction=0)
+    db.commit()
+    return len(products)
+
+
+def record_scrape_success(product: TrackedProduct, now: Optional[datetime] = None):
+    """Clear the failure streak (and any quarantine) after a good scrape; the caller commits"""
+    product.scrape_status = STATUS_OK
+    product.consecutive_failures = 0
+    product.last_error = None
+    product.last_success_at = now or datetime.utcnow()
+
+
+def record_scrape_failure(product: TrackedProduct, error: str, now: Optional[datetime] = None):
+    """Count a failed scrape, quarantining after QUARANTINE_AFTER in a row; the caller commits"""
+    product.consecutive_failures = (product.consecutive_failures or 0) + 1
+    product.last_error = error[:500]
+    product.last_failure_at = now or datetime.utcnow()
+    if product.consecutive_failures >= QUARANTINE_AFTER:
+        if product.scrape_status != STATUS_QUARANTINED:
+            print(f"Quarantining product {product.id} after {product.consecutive_failures} failed checks: {error}")
+        product.scrape_status = STATUS_QUARANTINED
+    else:
+        product.scrape_status = STATUS_FAILING
+
+
+def failure_retry_interval(failures: int, platform: str) -> int:
+    """Seconds until retrying a product with `failures` consecutive failed scrapes"""
+    if failures >= QUARANTINE_AFTER:
+        return QUARANTINE_RETRY
+    _, ceiling = bounds_for(platform)
+    return int(min(FAILURE_BACKOFF_BASE * 2 ** (failures - 1), ceiling))
+
+
+def recent_change_times(db: Session, product_ids: Iterable[int]) -> Dict[int, List[datetime]]:
+    """The last HISTORY_WINDOW change times of each product, in one query"""
+    ranked = select(
+        PriceHistory.product_id,
+        PriceHistory.timestamp,
+        func.row_number().over(
+            partition_by=PriceHistory.product_id, order_by=PriceHistory.timestamp.desc()
+        ).label('position'),
+    ).where(PriceHistory.product_id.in_(list(product_ids))).subquery()
+    change_times: Dict[int, List[datetime]] = {}
+    for product_id, timestamp in db.execute(
+        select(ranked.c.product_id, ranked.c.timestamp).where(ranked.c.position <= HISTORY_WINDOW)
+    ):
+        change_times.setdefault(product_id, []).append(timestamp)
+    return change_times
+
+
+def apply_next_check(product, change_times: List[datetime], now: datetime) -> datetime:
+    """Set next_check_at (and check_interval) on a product or product-like row from its change times"""
+    if product.consecutive_failures:
+        # Backoff, not the phase grid: retries shouldn't wait for the product's slot
+        interval = failure_retry_interval(product.consecutive_failures, product.platform or 'Other')
+        product.next_check_at = now + timedelta(
+            seconds=interval + random.uniform(-1, 1) * min(MAX_JITTER, interval * JITTER_FRACTION)
+        )
+        return product.next_check_at
+
+    interval = next_interval(change_times, product.platform or 'Other', now)
+    product.check_interval = interval
+    product.next_check_at = spread_due_time(product.id, interval, now)
+    return product.next_check_at
+
+
+def schedule_next_check(db: Session, product: TrackedProduct, now: Optional[datetime] = None) -> datetime:
+    """Set product.next_check_at from its own price history, or its failure backoff; the caller commits"""
+    now = now or datetime.utcnow()
+    change_times = []
+    if not product.consecutive_failures:
+        # Include a PriceHistory row added in this session for the check that just ran
+        db.flush()
+        change_times = [timestamp for (timestamp,) in db.query(PriceHistory.timestamp).filter(
+            PriceHistory.product_id == product.id
+        ).order_by(PriceHistory.timestamp.desc()).limit(HISTORY_WINDOW)]
+    return apply_next_check(product, change_times, now)
@@ -0,0 +1,127 @@
+"""EXPLAIN check that the API and scheduler hot queries are served by indexes.
+
+Each query below has the same shape as one in main.py, scheduler.py,
+check_frequency.py, rollups.py or job_queue.py. It runs against DATABASE_URL (which is
+migrated first, like on startup) with EXPLAIN QUERY PLAN captured for every
+statement. A plan that scans a whole table, or sorts where the index should
+already give the order, is reported.
+
+Usage:
+    python check_query_plans.py
+
+SQLite only. Exits with status 1 if any query needs a full scan, so it can
+gate CI after a schema or query change.
+"""
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event, or_
+
+from database import engine, SessionLocal, User, TrackedProduct, PriceHistory, AlternativeProduct, PriceCheckJob
+from job_queue import JobQueue, DONE
+import rollups
+
+SAMPLE_ID = 1
+SAMPLE_EMAIL = "user@example.com"
+SAMPLE_URL = "https://www.amazon.in/dp/B000000000"
+
+
+def _queries(now: datetime) -> List[Tuple[str, bool, Callable]]:
+    """(name, sort allowed, run(db)) for each hot query"""
+    queue = JobQueue()
+    return [
+        ("login / current user: user by email", False,
+         lambda db: db.query(User).filter(User.email == SAMPLE_EMAIL).first()),
+        ("track: duplicate check", False,
+         lambda db: db.query(TrackedProduct).filter(
+             TrackedProduct.user_id == SAMPLE_ID, TrackedProduct.product_url == SAMPLE_URL).first()),
+        ("my-products / insights: active products of a user", False,
+         lambda db: db.query(TrackedProduct).filter(
+             TrackedProduct.user_id == SAMPLE_ID, TrackedProduct.is_active == True).all()),
+        ("product details: product of a user", False,
+         lambda db: db.query(TrackedProduct).filter(
+             TrackedProduct.id == SAMPLE_ID, TrackedProduct.user_id == SAMPLE_ID).first()),
+        ("product details: latest price history", False,
+         lambda db: db.query(PriceHistory).filter(PriceHistory.product_id == SAMPLE_ID)
+         .order_by(PriceHistory.timestamp.desc()).limit(30).all()),
+        ("product details: latest daily rollups", False,
+         lambda db: rollups.series(db, SAMPLE_ID, rollups.DAY, limit=30)),
+        ("history: daily rollups since", False,
+         lambda db: rollups.series(db, SAMPLE_ID, rollups.DAY, since=now)),
+        ("history: hourly rollups since", False,
+         lambda db: rollups.series(db, SAMPLE_ID, rollups.HOUR, since=now)),
+        ("ingest: existing rollup buckets", False,
+         lambda db: rollups.apply_prices(db, [{'product_id': SAMPLE_ID, 'price': 1.0, 'timestamp': now}]) or db.rollback()),
+        ("product details: alternatives", False,
+         lambda db: db.query(AlternativeProduct).filter(AlternativeProduct.original_product_id == SAMPLE_ID).all()),
+        ("scheduler: due products", False,
+         lambda db: db.query(TrackedProduct.id).filter(
+             TrackedProduct.is_active == True,
+             or_(TrackedProduct.next_check_at == None, TrackedProduct.next_check_at <= now)).all()),
+        ("scheduler: unscheduled products", False,
+         lambda db: db.query(TrackedProduct).filter(
+             TrackedProduct.is_active == True, TrackedProduct.next_check_at == None).all()),
+        ("check frequency: recent price changes", False,
+         lambda db: db.query(PriceHistory.timestamp).filter(PriceHistory.product_id == SAMPLE_ID)
+         .order_by(PriceHistory.timestamp.desc()).limit(20).all()),
+        # Two index ranges (ready, expired lease) merged, then ordered
+        ("job queue: claim candidates", True,
+         lambda db: db.query(PriceCheckJob.id).filter(queue._claimable(now))
+         .order_by(PriceCheckJob.visible_at, PriceCheckJob.id).limit(16).all()),
+        # Grouped on the retry-aware status, a handful of groups over one run's jobs
+        ("job queue: run progress", True,
+         lambda db: queue.run_counts(SAMPLE_ID)),
+        ("job queue: done products of a run", False,
+         lambda db: db.query(PriceCheckJob.product_id).filter(
+             PriceCheckJob.run_id == SAMPLE_ID, PriceCheckJob.status == DONE).all()),
+    ]
+
+
+def plan_problems(plan: List[str], allow_sort: bool) -> List[str]:
+    problems = []
+    for detail in plan:
+        # "SCAN t" reads every row; "SCAN t USING [COVERING] INDEX i" walks an index in order
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            problems.append(f"full scan: {detail}")
+        elif "USE TEMP B-TREE" in detail and not allow_sort:
+            problems.append(f"sort not served by an index: {detail}")
+    return problems
+
+
+def main():
+    if engine.dialect.name != 'sqlite':
+        print(f"EXPLAIN QUERY PLAN check supports SQLite only, not {engine.dialect.name}")
+        sys.exit(2)
+
+    captured: List[List[str]] = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            captured.append([row[3] for row in cursor.fetchall()])
+
+    failures = 0
+    event.listen(engine, "before_cursor_execute", explain)
+    db = SessionLocal()
+    try:
+        for name, allow_sort, run in _queries(datetime.utcnow()):
+            captured.clear()
+            run(db)
+            problems = [problem for plan in captured for problem in plan_problems(plan, allow_sort)]
+            print(f"{'FAIL' if problems else 'ok  '} {name}")
+            for plan in captured:
+                for detail in plan:
+                    print(f"       {detail}")
+            failures += bool(problems)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", explain)
+
+    if failures:
+        print(f"{failures} queries are not fully served by indexes")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
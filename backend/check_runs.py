@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from database import PriceCheckRun
+from job_queue import JobQueue, PENDING, RUNNING, FAILED, RETRYING
+
+RUN_RETENTION = timedelta(days=int(os.getenv("PRICE_CHECK_RUN_RETENTION_DAYS", "7")))
+
+
+def open_run(db: Session) -> PriceCheckRun:
+    """The unfinished run left by a crashed or interrupted scheduler, else a new one"""
+    run = db.query(PriceCheckRun).filter(PriceCheckRun.status == 'running').order_by(PriceCheckRun.id).first()
+    if run is not None:
+        print(f"Resuming price check run {run.id} from checkpoint {run.checkpoint_at}")
+        return run
+
+    now = datetime.utcnow()
+    db.query(PriceCheckRun).filter(
+        PriceCheckRun.status != 'running',
+        PriceCheckRun.finished_at < now - RUN_RETENTION,
+    ).delete(synchronize_session=False)
+    run = PriceCheckRun(status='running', started_at=now, checkpoint_at=now)
+    db.add(run)
+    db.commit()
+    return run
+
+
+def record_progress(db: Session, progress: Dict[Optional[int], Dict[str, int]]):
+    """Advance run checkpoints inside the caller's transaction.
+
+    `progress` maps run_id -> {'processed': n, 'changed': n}. Committed
+    together with the product updates and job acks it counts, so a
+    checkpoint never claims work that was rolled back.
+    """
+    now = datetime.utcnow()
+    for run_id, counts in progress.items():
+        if run_id is None:
+            continue
+        db.query(PriceCheckRun).filter(PriceCheckRun.id == run_id).update({
+            'processed': PriceCheckRun.processed + counts.get('processed', 0),
+            'changed': PriceCheckRun.changed + counts.get('changed', 0),
+            'checkpoint_at': now,
+        }, synchronize_session=False)
+
+
+def finish_run(db: Session, run: PriceCheckRun, queue: JobQueue) -> bool:
+    """Close the run once its snapshot is drained; returns whether it closed.
+
+    Jobs that failed or are waiting out a retry backoff are terminal for the
+    run: it closes without them and counts them as failed, and the retries
+    run on later ticks outside it. Only ready or running jobs (e.g. held by
+    another host's workers) keep it open, so a resumed run never lingers
+    past the tick after a crash and keeps its products from being checked.
+    """
+    counts = queue.run_counts(run.id)
+    if counts.get(PENDING, 0) or counts.get(RUNNING, 0):
+        return False
+    run.status = 'completed'
+    run.failed = counts.get(FAILED, 0) + counts.get(RETRYING, 0)
+    run.finished_at = datetime.utcnow()
+    db.commit()
+    return True
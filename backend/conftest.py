@@ -0,0 +1,24 @@
+"""Shared pytest setup: a throwaway SQLite database for tests that import database"""
+import os
+import tempfile
+
+import pytest
+
+# Set before any test module imports database, which migrates DATABASE_URL on
+# import; the committed price_tracker.db is never touched
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='price_tracker_test_'), 'test.db')}"
+
+
+@pytest.fixture
+def db():
+    """A session on the test database, emptied again after the test"""
+    from database import Base, SessionLocal, engine
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
@@ -1,10 +1,12 @@
 # Import SQLAlchemy components for database operations
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base  # Base class for models
 from sqlalchemy.orm import sessionmaker, relationship  # Session management and relationships
+from sqlalchemy.engine import Engine, make_url  # Engine type and DATABASE_URL parsing
 from datetime import datetime  # For timestamp fields
 import os  # Environment variables
 from dotenv import load_dotenv  # Load .env file
+from migrations import migrate  # Versioned schema migrations
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,8 +14,58 @@ load_dotenv()
 # Get database URL from environment or use default SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./price_tracker.db")
 
-# Create database engine with SQLite-specific settings
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def sqlite_pragmas() -> dict:
+    """Per-connection SQLite settings, overridable with SQLITE_<PRAGMA>"""
+    return {
+        # Readers don't block the writer and the writer doesn't block readers
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        # Safe with WAL: a power loss can drop the last commits but never corrupts
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # Wait this long (ms) for the write lock instead of failing with "database is locked"
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+        # Page cache per connection; negative means KiB (64 MB)
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+        # Read through a memory map instead of read() syscalls (256 MB)
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    }
+
+def create_db_engine(url: str, tuned: bool = True) -> Engine:
+    """Engine for DATABASE_URL with the profile for its backend.
+
+    SQLite gets WAL and the pragmas above on every new connection; server
+    databases (Postgres, MySQL) get a sized, pre-pinged connection pool.
+    `tuned=False` gives the plain engine, for benchmarking against.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        # Sessions are used from worker threads, not only the creating one
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        if tuned:
+            pragmas = sqlite_pragmas()
+            
+            @event.listens_for(engine, "connect")
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
+        return engine
+    
+    if not tuned:
+        return create_engine(url)
+    return create_engine(
+        url,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Recycle before server-side idle timeouts and load balancers drop connections
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        # Check a pooled connection is alive before handing it out
+        pool_pre_ping=True,
+    )
+
+# Create database engine with the profile for the configured backend
+engine = create_db_engine(DATABASE_URL)
 # Create session factory for database connections
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for all database models
@@ -51,9 +103,25 @@ class TrackedProduct(Base):
     platform = Column(String)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Adaptive scheduling (see check_frequency): when this product is next due
+    next_check_at = Column(DateTime)
+    check_interval = Column(Integer)
+    # Failure tracking (see check_frequency): 'ok', 'failing' or 'quarantined'
+    scrape_status = Column(String, default='ok')
+    consecutive_failures = Column(Integer, default=0)
+    last_error = Column(String)
+    last_success_at = Column(DateTime)
+    last_failure_at = Column(DateTime)
     
     user = relationship("User", back_populates="tracked_products")
     price_history = relationship("PriceHistory", back_populates="product")
+    
+    __table_args__ = (
+        # A user's active products (dashboard, my-products)
+        Index("ix_tracked_products_user_active", "user_id", "is_active"),
+        # Due products for the scheduler tick
+        Index("ix_tracked_products_active_next_check", "is_active", "next_check_at"),
+    )
 
 class PriceHistory(Base):
     __tablename__ = "price_history"
@@ -64,12 +132,17 @@ class PriceHistory(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     
     product = relationship("TrackedProduct", back_populates="price_history")
+    
+    __table_args__ = (
+        # One product's history, newest first, without a sort
+        Index("ix_price_history_product_timestamp", "product_id", "timestamp"),
+    )
 
 class AlternativeProduct(Base):
     __tablename__ = "alternative_products"
     
     id = Column(Integer, primary_key=True, index=True)
-    original_product_id = Column(Integer, ForeignKey("tracked_products.id"))
+    original_product_id = Column(Integer, ForeignKey("tracked_products.id"), index=True)
     name = Column(String)
     price = Column(Float)
     url = Column(String)
@@ -77,6 +150,80 @@ class AlternativeProduct(Base):
     image_url = Column(String)
     similarity_score = Column(Float)
 
+class PriceRollup(Base):
+    """Open/high/low/close of one product's prices over an hour or a day; see rollups"""
+    __tablename__ = "price_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("tracked_products.id"))
+    # 'hour' or 'day'
+    resolution = Column(String)
+    bucket_start = Column(DateTime)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    count = Column(Integer)
+    # Times of the open and close prices, so late points merge in order
+    first_at = Column(DateTime)
+    last_at = Column(DateTime)
+    
+    __table_args__ = (
+        # One row per bucket; also serves a product's series in time order
+        Index("ix_price_rollups_product_bucket", "product_id", "resolution", "bucket_start", unique=True),
+    )
+
+class PriceCheckRun(Base):
+    """One scheduler cycle over the due products, checkpointed as batches commit"""
+    __tablename__ = "price_check_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # running until every job of the run is finished or retrying; a crashed run is resumed
+    status = Column(String, default="running", index=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    checkpoint_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    products_total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    changed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+
+class PriceCheckJob(Base):
+    """One queued price check for one product; see job_queue.JobQueue"""
+    __tablename__ = "price_check_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("tracked_products.id"), index=True)
+    run_id = Column(Integer, ForeignKey("price_check_runs.id"))
+    # pending -> running -> done, or back to pending for a retry, or failed
+    status = Column(String, default="pending")
+    attempts = Column(Integer, default=0)
+    # Not claimable before this time (retry backoff)
+    visible_at = Column(DateTime, default=datetime.utcnow)
+    # A running job whose lease has expired is claimable again
+    claimed_by = Column(String)
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    enqueued_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        # Claiming: ready pending jobs in visible_at order, and expired leases
+        Index("ix_price_check_jobs_status_visible", "status", "visible_at"),
+        Index("ix_price_check_jobs_status_lease", "status", "lease_expires_at"),
+        # Run progress and resume
+        Index("ix_price_check_jobs_run_status", "run_id", "status"),
+    )
+
+class SchedulerLease(Base):
+    """Lock row held by the one process allowed to run a singleton job; see leader_lease"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String)
+    expires_at = Column(DateTime)
+    acquired_at = Column(DateTime)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -84,4 +231,5 @@ def get_db():
     finally:
         db.close()
 
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Bring the schema up to date (see migrations.py) before anything queries it
+migrate(engine, Base.metadata)
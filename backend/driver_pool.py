@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil  # Optional: used for the per-driver RSS ceiling
+except ImportError:
+    psutil = None
+
+
+class PooledDriver:
+    """A WebDriver plus the bookkeeping the pool needs to decide when to recycle it"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """Bounded, thread-safe pool of headless Chrome drivers.
+
+    Drivers are checked out with `acquire()` and returned with `release()`. Between uses the session state is wiped, and a
+    driver is recycled once it has served `max_pages` pages or its browser
+    process tree grows past `max_rss_mb`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        max_size: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+    ):
+        self.factory = factory
+        self.max_size = max_size or int(os.getenv("DRIVER_POOL_SIZE", "2"))
+        self.max_pages = max_pages or int(os.getenv("DRIVER_MAX_PAGES", "50"))
+        self.max_rss_mb = max_rss_mb or int(os.getenv("DRIVER_MAX_RSS_MB", "1024"))
+        self.acquire_timeout = acquire_timeout or float(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "120"))
+
+        self._idle: List[PooledDriver] = []
+        self._in_use: Dict[int, PooledDriver] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        # Set by close(); drivers released afterwards are quit instead of pooled
+        self._closed = False
+        self.stats = {
+            'hits': 0,          # checkouts served by an idle driver
+            'launches': 0,      # new Chrome processes started
+            'recycles': 0,      # drivers retired for page count or memory
+            'health_failures': 0,
+            'waits': 0,         # checkouts that had to wait for a free slot
+        }
+
+    def acquire(self):
+        """Check out a healthy driver, launching one if no idle driver is available"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['waits'] += 1
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                raise TimeoutError("Timed out waiting for a free browser driver")
+
+        try:
+            while True:
+                with self._lock:
+                    self._closed = False
+                    pooled = self._idle.pop() if self._idle else None
+
+                if pooled is None:
+                    pooled = PooledDriver(self.factory())
+                    with self._lock:
+                        self.stats['launches'] += 1
+                    break
+
+                if self._is_healthy(pooled):
+                    with self._lock:
+                        self.stats['hits'] += 1
+                    break
+
+                with self._lock:
+                    self.stats['health_failures'] += 1
+                self._quit(pooled)
+
+            with self._lock:
+                self._in_use[id(pooled.driver)] = pooled
+            return pooled.driver
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken: bool = False):
+        """Return a driver to the pool, resetting or recycling it as needed"""
+        with self._lock:
+            pooled = self._in_use.pop(id(driver), None)
+
+        if pooled is None:
+            # Not checked out from this pool; don't give back a slot we never took
+            self._quit(PooledDriver(driver))
+            return
+
+        try:
+            pooled.pages_served += 1
+            if self._closed:
+                self._quit(pooled)
+                return
+            if broken or self._needs_recycle(pooled):
+                if not broken:
+                    with self._lock:
+                        self.stats['recycles'] += 1
+                self._quit(pooled)
+                return
+
+            if not self._reset(pooled):
+                self._quit(pooled)
+                return
+
+            with self._lock:
+                self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> Dict:
+        """Snapshot of pool counters, useful for sizing the pool"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = len(self._in_use)
+        stats['max_size'] = self.max_size
+        checkouts = stats['hits'] + stats['launches']
+        stats['hit_rate'] = stats['hits'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Quit all idle drivers. Drivers still checked out are quit on release.
+
+        The next acquire() reopens the pool.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._quit(pooled)
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _needs_recycle(self, pooled: PooledDriver) -> bool:
+        if pooled.pages_served >= self.max_pages:
+            return True
+        rss_mb = self._rss_mb(pooled.driver)
+        return rss_mb is not None and rss_mb > self.max_rss_mb
+
+    def _rss_mb(self, driver) -> Optional[float]:
+        """Resident memory of chromedriver and all Chrome processes it spawned"""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _reset(self, pooled: PooledDriver) -> bool:
+        """Clear cookies and web storage so the next checkout starts clean"""
+        driver = pooled.driver
+        try:
+            # Storage is per-origin, so clear it while still on the last page
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            try:
+                # Clears cookies for every domain, not just the current page's
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            print(f"Driver reset failed, recycling: {e}")
+            return False
+
+    def _quit(self, pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
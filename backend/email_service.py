@@ -3,9 +3,11 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 import os
+import time
 from dotenv import load_dotenv
 import requests
 from typing import Dict
+from metrics import SMTP_SECONDS
 
 load_dotenv()
 
@@ -16,6 +18,19 @@ class EmailService:
         self.username = os.getenv("SMTP_USERNAME")
         self.password = os.getenv("SMTP_PASSWORD")
     
+    def send_message(self, msg: MIMEMultipart, kind: str):
+        """Deliver over SMTP, timing the whole connect/login/send"""
+        started = time.monotonic()
+        result = 'error'
+        try:
+            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                server.starttls()
+                server.login(self.username, self.password)
+                server.send_message(msg)
+            result = 'sent'
+        finally:
+            SMTP_SECONDS.labels(kind, result).observe(time.monotonic() - started)
+    
     def create_price_alert_html(self, product_data: Dict, alert_content: Dict) -> str:
         """Create professional HTML email template"""
         
@@ -107,11 +122,7 @@ class EmailService:
             msg.attach(html_part)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.send_message(msg)
-            
+            self.send_message(msg, 'price_alert')
             return True
             
         except Exception as e:
@@ -172,11 +183,7 @@ class EmailService:
             
             msg.attach(MIMEText(html_content, 'html'))
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.send_message(msg)
-            
+            self.send_message(msg, 'welcome')
             return True
             
         except Exception as e:
@@ -1,17 +1,49 @@
 import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import re
+from selenium.common.exceptions import WebDriverException
+import threading
+import asyncio
 import time
 from typing import Dict, Optional
-import json
+from driver_pool import DriverPool
+import structured_data
+import price_extraction
+import html_parser
+import browser_profiles
+import adapters
+from singleflight import SingleFlight, canonical_url
+from fetch_cache import FetchCache
+from rate_limiter import rate_limiter, is_block_page, THROTTLE_STATUSES
+from metrics import SCRAPES, SCRAPE_SECONDS
+
+# Runs in the page: for each field, the first node matched by each selector
+# (textContent plus requested attributes). Invalid selectors count as misses.
+SNAPSHOT_SCRIPT = """
+const fieldSelectors = arguments[0];
+const fieldAttributes = arguments[1];
+const matches = {};
+for (const [field, selectors] of Object.entries(fieldSelectors)) {
+    matches[field] = {};
+    for (const selector of selectors) {
+        let node = null;
+        try { node = document.querySelector(selector); } catch (e) { node = null; }
+        if (!node) continue;
+        const values = {text: (node.textContent || '').trim()};
+        for (const attribute of (fieldAttributes[field] || [])) {
+            values[attribute] = node.getAttribute(attribute);
+        }
+        matches[field][selector] = values;
+    }
+}
+return matches;
+"""
 
 class EnhancedScraper:
-    def __init__(self):
+    def __init__(self, browser_profile: Optional[str] = None, browser_fallback: bool = True):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -20,8 +52,29 @@ class EnhancedScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
+        # "lean" skips images, fonts, media and third-party hosts (see browser_profiles)
+        self.browser_profile = browser_profile or browser_profiles.selected_profile()
+        # Off for offline runs (fixtures, CI) where there is no Chrome to escalate to
+        self.browser_fallback = browser_fallback
+        # Chrome instances are reused across scrapes instead of launched per URL
+        self.driver_pool = DriverPool(self.setup_driver)
+        # Keep-alive session for the HTTP tier
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.http_timeout = 15
+        # Per-platform counts of how each scrape was served: http / browser / failed
+        self.tier_stats = {}
+        self._stats_lock = threading.Lock()
+        # Concurrent/back-to-back scrapes of the same listing share one fetch
+        self.singleflight = SingleFlight()
+        # ETag/Last-Modified and price-region hashes for conditional re-fetches
+        self.fetch_cache = FetchCache()
+        # Running hit rates per selector, for finding ones that no longer match
+        self.selector_stats = adapters.SelectorStats()
+        # Per-domain token buckets and circuit breakers, shared process-wide
+        self.rate_limiter = rate_limiter
         
-    def setup_driver(self):
+    def build_options(self) -> Options:
         options = Options()
         options.add_argument('--headless')
         options.add_argument('--no-sandbox')
@@ -30,340 +83,342 @@ class EnhancedScraper:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         options.add_argument(f'--user-agent={self.headers["User-Agent"]}')
-        
-        driver = webdriver.Chrome(options=options)
+        allowed_hosts = [host for adapter in adapters.ADAPTERS for host in adapter.allowed_hosts]
+        browser_profiles.apply_profile(options, self.browser_profile, allowed_hosts)
+        return options
+    
+    def setup_driver(self):
+        driver = webdriver.Chrome(options=self.build_options())
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         return driver
     
     def extract_price(self, text: str) -> Optional[float]:
-        patterns = [
-            r'₹[\s]*([0-9,]+(?:\.[0-9]{2})?)',
-            r'Rs[\s]*([0-9,]+(?:\.[0-9]{2})?)',
-            r'([0-9,]+(?:\.[0-9]{2})?)[\s]*₹'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text.replace(',', ''))
-            if matches:
-                try:
-                    return float(matches[0])
-                except ValueError:
-                    continue
-        return None
+        return price_extraction.extract_price(text)
     
-    def scrape_amazon(self, url: str) -> Dict:
-        driver = self.setup_driver()
+    def snapshot_fields(self, driver, adapter: adapters.PlatformAdapter) -> Dict:
+        """First match for every selector of every field, collected in one browser round trip"""
+        return driver.execute_script(
+            SNAPSHOT_SCRIPT, adapter.field_selectors(), adapter.field_attributes()
+        ) or {}
+    
+    def scrape_with_adapter(self, url: str, adapter: adapters.PlatformAdapter) -> Optional[Dict]:
+        """Tier 2: render the page in Chrome and read fields using the adapter's selectors"""
+        if not self.rate_limiter.acquire(url):
+            print(f"{adapter.name} circuit open, skipping browser scrape")
+            return None
+        driver = self.driver_pool.acquire()
         try:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "productTitle")))
+            browser_profiles.apply_request_blocking(driver, self.browser_profile, adapter.blocked_patterns)
+            try:
+                driver.get(url)
+            except WebDriverException as e:
+                # DNS, connection or page-load failure: the store itself is unreachable
+                print(f"{adapter.name} page load error: {e}")
+                self.rate_limiter.record(url, error=True)
+                return None
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, adapter.wait_for)))
             
             product_data = {
                 'name': '',
                 'price': 0.0,
                 'image_url': '',
-                'seller': 'Amazon',
-                'platform': 'Amazon'
+                'seller': adapter.name,
+                'platform': adapter.name
             }
             
-            # Product name
-            try:
-                name_elem = driver.find_element(By.ID, "productTitle")
-                product_data['name'] = name_elem.text.strip()
-            except:
-                pass
-            
-            # Price extraction with multiple strategies
-            price_found = False
-            
-            # Strategy 1: Amazon price elements (updated selectors)
-            price_selectors = [
-                '.a-price.priceToPay .a-price-whole',
-                '.a-price.reinventPricePriceToPayMargin .a-price-whole', 
-                'span.a-price-whole',
-                '.a-price .a-offscreen',
-                '#apex_desktop .a-price .a-price-whole',
-                '.a-section .a-price .a-price-whole'
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_elem.text.strip().replace(',', '')
-                    if price_text and price_text.isdigit():
-                        price = float(price_text)
-                        if price > 0:
-                            product_data['price'] = price
-                            price_found = True
-                            break
-                except:
-                    continue
-                    
-            # Try offscreen price if whole number not found
-            if not price_found:
-                try:
-                    offscreen_elem = driver.find_element(By.CSS_SELECTOR, '.a-price .a-offscreen')
-                    price_text = offscreen_elem.text.strip()
-                    price = self.extract_price(price_text)
-                    if price and price > 0:
-                        product_data['price'] = price
-                        price_found = True
-                except:
-                    pass
+            # Missing selectors cost nothing here: the lookup happens in-page
+            # instead of one exception-raising find_element call per miss
+            resolved = adapter.resolve(self.snapshot_fields(driver, adapter), self.selector_stats)
+            product_data.update(resolved)
             
-            # Strategy 2: JSON-LD structured data
-            if not price_found:
-                try:
-                    scripts = driver.find_elements(By.XPATH, "//script[@type='application/ld+json']")
-                    for script in scripts:
-                        try:
-                            data = json.loads(script.get_attribute('innerHTML'))
-                            if isinstance(data, list):
-                                data = data[0]
-                            if 'offers' in data:
-                                price = float(data['offers']['price'])
-                                product_data['price'] = price
-                                price_found = True
-                                break
-                        except:
-                            continue
-                except:
-                    pass
-            
-            # Strategy 3: Page source analysis for Amazon
-            if not price_found:
+            # Fall back to structured data / raw price fields in the rendered source
+            if not product_data['price'] or not product_data['name']:
                 page_source = driver.page_source
-                # Look for price in various formats
-                price_patterns = [
-                    r'"price":\s*"([0-9,]+(?:\.[0-9]{2})?)"',
-                    r'"displayPrice":\s*"[^"]*?([0-9,]+(?:\.[0-9]{2})?)"',
-                    r'priceToPay[^>]*>.*?₹([0-9,]+)',
-                    r'a-price-whole[^>]*>([0-9,]+)'
-                ]
-                
-                for pattern in price_patterns:
-                    matches = re.findall(pattern, page_source)
-                    if matches:
-                        try:
-                            price = float(matches[0].replace(',', ''))
-                            if 100 < price < 1000000:  # Reasonable price range
-                                product_data['price'] = price
-                                price_found = True
-                                break
-                        except:
-                            continue
-            
-            # Image
-            try:
-                img_selectors = ['#landingImage', '.a-dynamic-image', '#imgTagWrapperId img']
-                for selector in img_selectors:
-                    try:
-                        img_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                        product_data['image_url'] = img_elem.get_attribute('src')
-                        break
-                    except:
-                        continue
-            except:
-                pass
+                extracted = structured_data.extract_product(page_source)
+                for key in ('name', 'price', 'image_url'):
+                    if extracted.get(key) and not product_data[key]:
+                        product_data[key] = extracted[key]
+                if not product_data['price'] and adapter.page_source_price:
+                    product_data['price'] = price_extraction.extract_source_price(page_source) or 0.0
             
+            self.rate_limiter.record(url, 200)
             return product_data
             
         except Exception as e:
-            print(f"Amazon scraping error: {e}")
+            print(f"{adapter.name} scraping error: {e}")
+            try:
+                blocked = is_block_page(driver.page_source, adapter.block_markers)
+            except Exception:
+                blocked = False
+            # The page loaded, so a missing element (delisted product, 404, changed
+            # layout) is this listing's failure, not the store's; only a block
+            # page counts toward the breaker
+            self.rate_limiter.record(url, blocked=blocked)
             return None
         finally:
-            driver.quit()
+            self.driver_pool.release(driver)
+    
+    def detect_platform(self, url: str) -> str:
+        adapter = adapters.adapter_for_url(url)
+        return adapter.name if adapter else 'Other'
+    
+    def record_tier(self, platform: str, tier: str, started: float):
+        """Count a finished scrape and its latency since `started` (time.monotonic())"""
+        with self._stats_lock:
+            stats = self.tier_stats.setdefault(platform, {'http': 0, 'browser': 0, 'failed': 0})
+            stats[tier] += 1
+        SCRAPES.labels(platform, tier).inc()
+        SCRAPE_SECONDS.labels(platform, tier).observe(time.monotonic() - started)
+    
+    def get_tier_stats(self) -> Dict:
+        """Per-platform tier counts plus the share of scrapes that needed Chrome"""
+        with self._stats_lock:
+            snapshot = {platform: dict(stats) for platform, stats in self.tier_stats.items()}
+        for stats in snapshot.values():
+            total = stats['http'] + stats['browser'] + stats['failed']
+            stats['escalation_rate'] = (stats['browser'] + stats['failed']) / total if total else 0.0
+        return snapshot
+    
+    def parse_product_html(self, html: str, platform: str) -> Optional[Dict]:
+        """Build product data from a statically fetched page, or None if it lacks a usable price"""
+        adapter = adapters.get_adapter(platform)
+        # The page <title> is a worse name than the adapter's title selector
+        extracted = structured_data.extract_product(html, title_fallback=adapter is None)
+        
+        # Server-rendered markup often carries the same nodes the browser tier reads
+        if adapter and (not extracted.get('price') or not extracted.get('name')):
+            matches = html_parser.select_matches(html, adapter.field_selectors(), adapter.field_attributes())
+            resolved = adapter.resolve(matches, self.selector_stats, tier='http')
+            for key, value in resolved.items():
+                if not extracted.get(key):
+                    extracted[key] = value
+            if not extracted.get('name'):
+                extracted['name'] = html_parser.page_title(html)
+        
+        if not extracted.get('price') or not extracted.get('name'):
+            return None
+        
+        return {
+            'name': extracted['name'][:200],
+            'price': extracted['price'],
+            'image_url': extracted.get('image_url', ''),
+            'seller': platform,
+            'platform': platform
+        }
+    
+    def mark_unchanged(self, product_data: Dict) -> Dict:
+        """Flag a cached result so callers can skip the price write if the row already holds it"""
+        return dict(product_data, unchanged=True)
     
-    def scrape_flipkart(self, url: str) -> Dict:
-        driver = self.setup_driver()
+    def accept_response(self, url: str, platform: str, response) -> bool:
+        """Report a response to the rate limiter; False for throttling and captcha/bot-wall pages"""
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            # requests assumes ISO-8859-1 without a charset, which mangles ₹
+            response.encoding = 'utf-8'
+        adapter = adapters.get_adapter(platform)
+        blocked = response.status_code == 200 and is_block_page(
+            response.text, adapter.block_markers if adapter else []
+        )
+        self.rate_limiter.record(
+            url, response.status_code, blocked=blocked, retry_after=response.headers.get('Retry-After')
+        )
+        if blocked or response.status_code in THROTTLE_STATUSES:
+            print(f"{platform} is throttling us ({'block page' if blocked else response.status_code})")
+            return False
+        return True
+    
+    def handle_http_response(self, cache_key: str, entry: Optional[Dict], response, parse) -> Optional[Dict]:
+        """Reuse the cached result if the page's price region is unchanged, otherwise parse and cache it"""
+        cached, region_hash = self.fetch_cache.reuse(cache_key, entry, response.status_code, response.text)
+        if cached:
+            return self.mark_unchanged(cached)
+        if response.status_code != 200:
+            return None
+        
+        product_data = parse(response.text)
+        if product_data:
+            self.fetch_cache.store(cache_key, response.headers, region_hash, product_data)
+        return product_data
+    
+    def scrape_http(self, url: str, platform: str) -> Optional[Dict]:
+        """Tier 1: plain HTTP fetch plus structured-data extraction"""
+        cache_key = canonical_url(url)
+        cached, conditional_headers, entry = self.fetch_cache.prepare(cache_key, platform)
+        if cached:
+            return self.mark_unchanged(cached)
+        if not self.rate_limiter.acquire(url):
+            return None
+        
         try:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1, .B_NuCI")))
-            
-            product_data = {
-                'name': '',
-                'price': 0.0,
-                'image_url': '',
-                'seller': 'Flipkart',
-                'platform': 'Flipkart'
-            }
-            
-            # Product name
-            name_selectors = ['h1 span', '.B_NuCI', '._35KyD6', '.VU-ZEz']
-            for selector in name_selectors:
-                try:
-                    name_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    product_data['name'] = name_elem.text.strip()
-                    break
-                except:
-                    continue
-            
-            # Price
-            price_selectors = [
-                '.Nx9bqj.CxhGGd',
-                '._30jeq3._16Jk6d',
-                '._1_WHN1',
-                '.CEmiEU .Nx9bqj'
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_elem.text.strip()
-                    if price_text and '₹' in price_text:
-                        price = self.extract_price(price_text)
-                        if price and price > 0:
-                            product_data['price'] = price
-                            break
-                except:
-                    continue
-            
-            # Image - Flipkart with better selectors
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "img"))
-                )
-            except:
-                pass
-                
-            img_selectors = [
-                '._4WELSP img',
-                '.DByuf4.IZexXJ.jLEJ7H',
-                '._396cs4._2amPTt._3qGmMb',
-                'img[src*="rukminim"]',
-                'img[data-src*="rukminim"]',
-                '.vU5WPQ img',
-                '._8id3KM img'
-            ]
-            
-            for selector in img_selectors:
-                try:
-                    img_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    img_src = img_elem.get_attribute('src') or img_elem.get_attribute('data-src')
-                    if img_src and ('rukminim' in img_src or 'flixcart.com' in img_src):
-                        # Convert to higher quality image
-                        if 'rukminim' in img_src and '128/128' in img_src:
-                            img_src = img_src.replace('128/128', '416/416')
-                        product_data['image_url'] = img_src
-                        break
-                except:
-                    continue
-            
+            response = self.session.get(url, headers=conditional_headers, timeout=self.http_timeout)
+        except Exception as e:
+            self.rate_limiter.record(url, error=True)
+            print(f"HTTP tier error for {platform}: {e}")
+            return None
+        try:
+            if not self.accept_response(url, platform, response):
+                return None
+            return self.handle_http_response(
+                cache_key, entry, response, lambda html: self.parse_product_html(html, platform)
+            )
+        except Exception as e:
+            print(f"HTTP tier error for {platform}: {e}")
+            return None
+    
+    def scrape_browser(self, url: str, platform: str) -> Optional[Dict]:
+        adapter = adapters.get_adapter(platform)
+        if adapter is None or not self.browser_fallback:
+            return None
+        return self.scrape_with_adapter(url, adapter)
+    
+    def scrape_product(self, url: str) -> Optional[Dict]:
+        return self.singleflight.do(canonical_url(url), lambda: self._scrape_product(url))
+    
+    def _scrape_product(self, url: str) -> Optional[Dict]:
+        started = time.monotonic()
+        platform = self.detect_platform(url)
+        
+        if platform == 'Other':
+            return self.scrape_generic(url)
+        
+        # Most product pages ship the price in JSON-LD or an embedded state blob,
+        # so only fall back to Chrome when the static page doesn't have it
+        product_data = self.scrape_http(url, platform)
+        if product_data:
+            self.record_tier(platform, 'http', started)
             return product_data
-            
+        
+        product_data = self.scrape_browser(url, platform)
+        self.record_tier(platform, 'browser' if product_data else 'failed', started)
+        return product_data
+    
+    def parse_generic_html(self, html: str) -> Dict:
+        product_data = self.parse_product_html(html, 'Other')
+        if product_data:
+            product_data['seller'] = 'Unknown'
+            return product_data
+        
+        # Only the title and visible text are read, so use the fast text path
+        # instead of building a full BeautifulSoup tree of the page
+        name = html_parser.page_title(html) or 'Unknown Product'
+        price = self.extract_price(html_parser.page_text(html))
+        
+        return {
+            'name': name[:200],
+            'price': price or 0.0,
+            'image_url': '',
+            'seller': 'Unknown',
+            'platform': 'Other'
+        }
+    
+    def scrape_generic(self, url: str) -> Optional[Dict]:
+        """Generic scraper fallback for unsupported sites"""
+        started = time.monotonic()
+        cache_key = canonical_url(url)
+        cached, conditional_headers, entry = self.fetch_cache.prepare(cache_key, 'Other')
+        if cached:
+            self.record_tier('Other', 'http', started)
+            return self.mark_unchanged(cached)
+        if not self.rate_limiter.acquire(url):
+            self.record_tier('Other', 'failed', started)
+            return None
+        
+        try:
+            response = self.session.get(url, headers=conditional_headers, timeout=self.http_timeout)
         except Exception as e:
-            print(f"Flipkart scraping error: {e}")
+            self.rate_limiter.record(url, error=True)
+            print(f"Generic scraping error: {e}")
+            self.record_tier('Other', 'failed', started)
             return None
-        finally:
-            driver.quit()
+        try:
+            product_data = None
+            if self.accept_response(url, 'Other', response):
+                product_data = self.handle_http_response(cache_key, entry, response, self.parse_generic_html)
+            self.record_tier('Other', 'http' if product_data else 'failed', started)
+            return product_data
+        except Exception as e:
+            print(f"Generic scraping error: {e}")
+            self.record_tier('Other', 'failed', started)
+            return None
+    
+    # Async variants used by AsyncScrapeEngine. They share the parsing code above;
+    # only the fetch differs (httpx client instead of the requests session).
     
-    def scrape_myntra(self, url: str) -> Dict:
-        driver = self.setup_driver()
+    async def scrape_http_async(self, url: str, platform: str, client) -> Optional[Dict]:
+        cache_key = canonical_url(url)
+        cached, conditional_headers, entry = await asyncio.to_thread(self.fetch_cache.prepare, cache_key, platform)
+        if cached:
+            return self.mark_unchanged(cached)
+        if not await self.rate_limiter.acquire_async(url):
+            return None
+        
         try:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1, .pdp-name")))
-            
-            product_data = {
-                'name': '',
-                'price': 0.0,
-                'image_url': '',
-                'seller': 'Myntra',
-                'platform': 'Myntra'
-            }
-            
-            # Product name
-            name_selectors = ['h1.pdp-name', '.pdp-name', 'h1']
-            for selector in name_selectors:
-                try:
-                    name_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    product_data['name'] = name_elem.text.strip()
-                    break
-                except:
-                    continue
-            
-            # Price
-            price_selectors = [
-                '.pdp-price strong',
-                '.pdp-price .pdp-price-info',
-                'span.pdp-price',
-                '.price-info .price'
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_elem.text.strip()
-                    if price_text and ('₹' in price_text or price_text.replace(',', '').isdigit()):
-                        price = self.extract_price(price_text) if '₹' in price_text else float(price_text.replace(',', ''))
-                        if price and price > 0:
-                            product_data['price'] = price
-                            break
-                except:
-                    continue
-            
-            # Image - Wait for Myntra images to load
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "img"))
+            response = await client.get(url, headers=conditional_headers)
+        except Exception as e:
+            self.rate_limiter.record(url, error=True)
+            print(f"HTTP tier error for {platform}: {e}")
+            return None
+        try:
+            if not self.accept_response(url, platform, response):
+                return None
+            # Parsing is CPU work; keep it off the event loop so other fetches progress
+            return await asyncio.to_thread(
+                self.handle_http_response, cache_key, entry, response,
+                lambda html: self.parse_product_html(html, platform)
+            )
+        except Exception as e:
+            print(f"HTTP tier error for {platform}: {e}")
+            return None
+    
+    async def scrape_generic_async(self, url: str, client) -> Optional[Dict]:
+        started = time.monotonic()
+        cache_key = canonical_url(url)
+        cached, conditional_headers, entry = await asyncio.to_thread(self.fetch_cache.prepare, cache_key, 'Other')
+        if cached:
+            self.record_tier('Other', 'http', started)
+            return self.mark_unchanged(cached)
+        if not await self.rate_limiter.acquire_async(url):
+            self.record_tier('Other', 'failed', started)
+            return None
+        
+        try:
+            response = await client.get(url, headers=conditional_headers)
+        except Exception as e:
+            self.rate_limiter.record(url, error=True)
+            print(f"Generic scraping error: {e}")
+            self.record_tier('Other', 'failed', started)
+            return None
+        try:
+            product_data = None
+            if self.accept_response(url, 'Other', response):
+                product_data = await asyncio.to_thread(
+                    self.handle_http_response, cache_key, entry, response, self.parse_generic_html
                 )
-            except:
-                pass
-                
-            img_selectors = [
-                'img.image-grid-image',
-                '.image-grid-container img',
-                '.pdp-image img', 
-                'img[src*="assets.myntassets.com"]',
-                'img[data-src*="assets.myntassets.com"]',
-                '.image-grid img',
-                'img[alt]'
-            ]
-            
-            for selector in img_selectors:
-                try:
-                    img_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                    img_src = img_elem.get_attribute('src') or img_elem.get_attribute('data-src')
-                    if img_src and ('myntassets.com' in img_src or 'http' in img_src):
-                        product_data['image_url'] = img_src
-                        break
-                except:
-                    continue
-            
+            self.record_tier('Other', 'http' if product_data else 'failed', started)
             return product_data
-            
         except Exception as e:
-            print(f"Myntra scraping error: {e}")
+            print(f"Generic scraping error: {e}")
+            self.record_tier('Other', 'failed', started)
             return None
-        finally:
-            driver.quit()
     
-    def scrape_product(self, url: str) -> Optional[Dict]:
-        url_lower = url.lower()
+    async def scrape_product_async(self, url: str, client) -> Optional[Dict]:
+        return await self.singleflight.do_async(
+            canonical_url(url), lambda: self._scrape_product_async(url, client)
+        )
+    
+    async def _scrape_product_async(self, url: str, client) -> Optional[Dict]:
+        started = time.monotonic()
+        platform = self.detect_platform(url)
         
-        if 'amazon' in url_lower:
-            return self.scrape_amazon(url)
-        elif 'flipkart' in url_lower:
-            return self.scrape_flipkart(url)
-        elif 'myntra' in url_lower:
-            return self.scrape_myntra(url)
-        else:
-            # Generic scraper fallback
-            try:
-                response = requests.get(url, headers=self.headers)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                title = soup.find('title')
-                name = title.text if title else 'Unknown Product'
-                
-                price_text = soup.get_text()
-                price = self.extract_price(price_text)
-                
-                return {
-                    'name': name[:200],
-                    'price': price or 0.0,
-                    'image_url': '',
-                    'seller': 'Unknown',
-                    'platform': 'Other'
-                }
-            except Exception as e:
-                print(f"Generic scraping error: {e}")
-                return None
\ No newline at end of file
+        if platform == 'Other':
+            return await self.scrape_generic_async(url, client)
+        
+        product_data = await self.scrape_http_async(url, platform, client)
+        if product_data:
+            self.record_tier(platform, 'http', started)
+            return product_data
+        
+        # Selenium is blocking; the driver pool bounds how many run at once
+        product_data = await asyncio.to_thread(self.scrape_browser, url, platform)
+        self.record_tier(platform, 'browser' if product_data else 'failed', started)
+        return product_data
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Fragments of a product page that carry its price: structured-data price
+# fields, rendered rupee amounts and the page title. If none of these changed,
+# the parsed result can't have changed either.
+PRICE_REGION_RE = re.compile(
+    r'"(?:price|lowPrice|finalPrice|sellingPrice|priceAmount|discounted|mrp)"\s*:\s*[^,}\]]{1,40}'
+    r'|(?:₹|&#8377;|Rs\.?)\s*[0-9][0-9,]*(?:\.[0-9]+)?'
+    r'|a-price-whole[^>]*>[0-9,]+'
+    r'|<title[^>]*>[^<]*',
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+DEFAULT_TTLS = {
+    'Amazon': 1800,
+    'Flipkart': 1800,
+    'Myntra': 3600,
+    'Other': 3600,
+    'Search': 21600,
+}
+
+
+def price_region_hash(html: str) -> str:
+    """Hash of the normalised price-bearing fragments of a page"""
+    digest = hashlib.sha1()
+    for match in PRICE_REGION_RE.finditer(html):
+        digest.update(WHITESPACE_RE.sub('', match.group(0)).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class FetchCache:
+    """Disk-backed cache of HTTP fetches keyed by canonical URL.
+
+    Each entry keeps the validators (ETag / Last-Modified) the server sent, a
+    hash of the page's price region and the parsed result. Within the
+    per-platform TTL the cached result is served without any request; after
+    that a conditional GET is sent, and a 304 or an unchanged price region
+    reuses the cached result without parsing the page again.
+
+    At most `max_entries` URLs are kept; storing past that evicts the least
+    recently used ones.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path or os.getenv("FETCH_CACHE_PATH", "./fetch_cache.db")
+        self.max_entries = max_entries or int(os.getenv("FETCH_CACHE_MAX_ENTRIES", "5000"))
+        self.ttls = dict(DEFAULT_TTLS)
+        for platform in self.ttls:
+            env_value = os.getenv(f"FETCH_CACHE_TTL_{platform.upper()}")
+            if env_value is not None:
+                self.ttls[platform] = int(env_value)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetch_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                region_hash TEXT,
+                result TEXT,
+                fetched_at REAL,
+                used_at REAL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(fetch_cache)")}
+        if 'used_at' not in columns:
+            # Cache files written before the LRU cap
+            self._conn.execute("ALTER TABLE fetch_cache ADD COLUMN used_at REAL")
+            self._conn.execute("UPDATE fetch_cache SET used_at = fetched_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_fetch_cache_used_at ON fetch_cache (used_at)")
+        self._conn.commit()
+        self.stats = {'fresh_hits': 0, 'not_modified': 0, 'region_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def ttl_for(self, platform: str) -> int:
+        return self.ttls.get(platform, self.ttls['Other'])
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, region_hash, result, fetched_at FROM fetch_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'region_hash': row[2],
+            'result': json.loads(row[3]) if row[3] else None,
+            'fetched_at': row[4],
+        }
+
+    def prepare(self, url: str, platform: str) -> Tuple[Optional[Any], Dict[str, str], Optional[Dict]]:
+        """Return (fresh cached result or None, conditional request headers, cache entry)"""
+        entry = self.get(url)
+        if entry is None or entry['result'] is None:
+            return None, {}, entry
+
+        if time.time() - entry['fetched_at'] < self.ttl_for(platform):
+            self._mark_used(url)
+            self._count('fresh_hits')
+            return entry['result'], {}, entry
+
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return None, headers, entry
+
+    def reuse(self, url: str, entry: Optional[Dict], status_code: int, text: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Return (cached result, region hash). The result is None when the page must be parsed."""
+        if entry is not None and entry['result'] is not None and status_code == 304:
+            self._touch(url)
+            self._count('not_modified')
+            return entry['result'], entry['region_hash']
+
+        if status_code != 200:
+            return None, None
+
+        region_hash = price_region_hash(text)
+        if entry is not None and entry['result'] is not None and entry['region_hash'] == region_hash:
+            self._touch(url)
+            self._count('region_hits')
+            return entry['result'], region_hash
+
+        self._count('misses')
+        return None, region_hash
+
+    def store(self, url: str, headers, region_hash: str, result: Any):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO fetch_cache (url, etag, last_modified, region_hash, result, fetched_at, used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    headers.get('ETag'),
+                    headers.get('Last-Modified'),
+                    region_hash,
+                    json.dumps(result),
+                    now,
+                    now,
+                ),
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM fetch_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM fetch_cache WHERE url IN (SELECT url FROM fetch_cache ORDER BY used_at LIMIT ?)",
+                    (excess,),
+                )
+                self.stats['evictions'] += excess
+            self._conn.commit()
+
+    def _touch(self, url: str):
+        """Revalidated: restart the TTL"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE fetch_cache SET fetched_at = ?, used_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _mark_used(self, url: str):
+        with self._lock:
+            self._conn.execute("UPDATE fetch_cache SET used_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM fetch_cache")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats['fresh_hits'] + stats['not_modified'] + stats['region_hits']
+        total = hits + stats['misses']
+        stats['hit_rate'] = hits / total if total else 0.0
+        return stats
@@ -0,0 +1,167 @@
+"""Columnar archive tier for cold price history.
+
+rollups.compact() moves raw PriceHistory rows out of the database. With
+the archive enabled it first writes them here, so the full history is kept
+without bloating the transactional file (and every vacuum and backup of it).
+
+One Arrow IPC file per calendar month (history-YYYY-MM.arrow) holds id,
+product_id, timestamp and price, sorted by product and time. The files are
+read through a memory map, so a query pages in only the columns and ranges
+it touches and nothing is copied. A month archived over several compaction
+runs is rewritten with the new rows merged in (deduplicated by id, so a
+crash between writing the file and deleting the rows is harmless).
+
+Arrow IPC rather than Parquet: it maps without decoding, which suits
+repeated reads of the same months; pyarrow can convert either way.
+
+Run directly to list the archive:
+    python history_archive.py
+"""
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa  # Optional: without it compaction deletes cold rows outright
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+from sqlalchemy.orm import Session
+
+from database import PriceHistory
+
+ARCHIVE_DIR = os.getenv("PRICE_ARCHIVE_DIR", "./price_archive")
+ARCHIVE_ENABLED = os.getenv("PRICE_ARCHIVE_ENABLED", "1") == "1"
+
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('product_id', pa.int64()),
+    ('timestamp', pa.timestamp('us')),
+    ('price', pa.float64()),
+]) if pa is not None else None
+
+
+def enabled() -> bool:
+    return ARCHIVE_ENABLED and pa is not None
+
+
+def month_path(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"history-{month}.arrow")
+
+
+def archived_months() -> List[str]:
+    """'YYYY-MM' of every archive file, oldest first"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return sorted(
+        name[len("history-"):-len(".arrow")]
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.startswith("history-") and name.endswith(".arrow")
+    )
+
+
+def read_month(month: str) -> "pa.Table":
+    """A month's rows, backed by a memory map of the file (no copy)"""
+    with pa.memory_map(month_path(month), 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _write_month(month: str, table: "pa.Table"):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = month_path(month)
+    temp_path = f"{path}.tmp"
+    with pa.OSFile(temp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+    with open(temp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    # Readers see the old file or the new one, never a partial write
+    os.replace(temp_path, path)
+
+
+def archive_rows(rows: Iterable[Tuple[int, int, datetime, float]]) -> int:
+    """Merge (id, product_id, timestamp, price) rows into their month files; returns rows written.
+
+    Returns only once the files are durable, so the caller can then delete
+    the rows from the database.
+    """
+    by_month: Dict[str, List[Tuple[int, int, datetime, float]]] = {}
+    for row in rows:
+        by_month.setdefault(row[2].strftime("%Y-%m"), []).append(row)
+
+    written = 0
+    for month, month_rows in by_month.items():
+        ids, product_ids, timestamps, prices = zip(*month_rows)
+        new = pa.table([ids, product_ids, timestamps, prices], schema=SCHEMA)
+        if os.path.exists(month_path(month)):
+            existing = read_month(month)
+            # Rows archived by an earlier run that died before deleting them
+            new = new.filter(pc.invert(pc.is_in(new['id'], value_set=existing['id'])))
+            table = pa.concat_tables([existing, new])
+        else:
+            table = new
+        if new.num_rows:
+            _write_month(month, table.sort_by([('product_id', 'ascending'), ('timestamp', 'ascending')]))
+        written += new.num_rows
+    return written
+
+
+def load_table(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+) -> "pa.Table":
+    """Archived rows in [start, end), optionally for one product, without touching the database"""
+    first = start.strftime("%Y-%m") if start else None
+    last = end.strftime("%Y-%m") if end else None
+    tables = []
+    for month in archived_months():
+        if (first and month < first) or (last and month > last):
+            continue
+        table = read_month(month)
+        mask = None
+        conditions = []
+        if product_id is not None:
+            conditions.append(pc.equal(table['product_id'], product_id))
+        if start is not None:
+            conditions.append(pc.greater_equal(table['timestamp'], pa.scalar(start, pa.timestamp('us'))))
+        if end is not None:
+            conditions.append(pc.less(table['timestamp'], pa.scalar(end, pa.timestamp('us'))))
+        for condition in conditions:
+            mask = condition if mask is None else pc.and_(mask, condition)
+        tables.append(table.filter(mask) if mask is not None else table)
+    return pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+
+def full_history(
+    db: Session,
+    product_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict]:
+    """A product's raw price points from the archive and the database combined, oldest first"""
+    points: Dict[int, Dict] = {}
+    if enabled():
+        for row in load_table(start, end, product_id).to_pylist():
+            points[row['id']] = {'timestamp': row['timestamp'], 'price': row['price']}
+
+    query = db.query(PriceHistory.id, PriceHistory.timestamp, PriceHistory.price).filter(
+        PriceHistory.product_id == product_id
+    )
+    if start is not None:
+        query = query.filter(PriceHistory.timestamp >= start)
+    if end is not None:
+        query = query.filter(PriceHistory.timestamp < end)
+    for row_id, timestamp, price in query:
+        points[row_id] = {'timestamp': timestamp, 'price': price}
+    return sorted(points.values(), key=lambda point: point['timestamp'])
+
+
+if __name__ == "__main__":
+    if not enabled():
+        print("Price archive disabled (PRICE_ARCHIVE_ENABLED=0 or pyarrow not installed)")
+    for month in archived_months():
+        table = read_month(month)
+        print(f"{month}: {table.num_rows} rows, {os.path.getsize(month_path(month)) / 1024:.1f} KiB")
@@ -0,0 +1,124 @@
+import html
+import os
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Optional fast backends. selectolax (Lexbor/Modest) is the fastest for
+# CSS-targeted extraction; lxml also speeds up BeautifulSoup as a tree builder.
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+    etree = None
+
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+NON_CONTENT_TAGS = ('script', 'style', 'noscript', 'template', 'svg')
+
+
+def available_backends() -> List[str]:
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append('selectolax')
+    if etree is not None:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def default_backend() -> str:
+    """HTML_PARSER_BACKEND if set and installed, else the fastest available backend"""
+    requested = os.getenv("HTML_PARSER_BACKEND")
+    backends = available_backends()
+    if requested in backends:
+        return requested
+    return backends[0]
+
+
+def soup_features() -> str:
+    """Tree builder for BeautifulSoup: lxml when installed, otherwise the stdlib parser"""
+    return 'lxml' if etree is not None else 'html.parser'
+
+
+def make_soup(markup, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """BeautifulSoup tree, optionally restricted to the subtrees matched by `parse_only`"""
+    return BeautifulSoup(markup, soup_features(), parse_only=parse_only)
+
+
+def page_title(markup: str) -> str:
+    # The title is always in the head, so there's no need to build a tree for it
+    match = TITLE_RE.search(markup)
+    return html.unescape(match.group(1).strip()) if match else ''
+
+
+def page_text(markup: str, backend: Optional[str] = None) -> str:
+    """Visible text of a page, with scripts and styles left out"""
+    backend = backend or default_backend()
+
+    if backend == 'selectolax' and SelectolaxParser is not None:
+        tree = SelectolaxParser(markup)
+        tree.strip_tags(list(NON_CONTENT_TAGS))
+        root = tree.body or tree.root
+        return root.text(separator=' ') if root is not None else ''
+
+    if backend == 'lxml' and etree is not None:
+        try:
+            root = lxml.html.fromstring(markup)
+        except (etree.ParserError, ValueError):
+            return ''
+        etree.strip_elements(root, *NON_CONTENT_TAGS, with_tail=False)
+        return root.text_content()
+
+    soup = BeautifulSoup(markup, 'html.parser')
+    for tag in soup(list(NON_CONTENT_TAGS)):
+        tag.decompose()
+    return soup.get_text(' ')
+
+
+def select_matches(
+    markup: str,
+    field_selectors: Dict[str, List[str]],
+    field_attributes: Dict[str, List[str]],
+    backend: Optional[str] = None,
+) -> Dict[str, Dict[str, Dict]]:
+    """First node for each CSS selector, as {field: {selector: {'text': ..., attribute: ...}}}.
+
+    Selectors that match nothing are left out. The markup is parsed once and
+    only the targeted nodes are read.
+    """
+    backend = backend or default_backend()
+    matches: Dict[str, Dict[str, Dict]] = {}
+
+    if backend == 'selectolax' and SelectolaxParser is not None:
+        tree = SelectolaxParser(markup)
+        for field, selectors in field_selectors.items():
+            found = matches.setdefault(field, {})
+            for selector in selectors:
+                node = tree.css_first(selector)
+                if node is None:
+                    continue
+                values = {'text': node.text(strip=True)}
+                for attribute in field_attributes.get(field, []):
+                    values[attribute] = node.attributes.get(attribute)
+                found[selector] = values
+        return matches
+
+    soup = make_soup(markup)
+    for field, selectors in field_selectors.items():
+        found = matches.setdefault(field, {})
+        for selector in selectors:
+            node = soup.select_one(selector)
+            if node is None:
+                continue
+            values = {'text': node.get_text(strip=True)}
+            for attribute in field_attributes.get(field, []):
+                values[attribute] = node.get(attribute)
+            found[selector] = values
+    return matches
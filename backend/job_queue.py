@@ -0,0 +1,204 @@
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, PriceCheckJob
+from metrics import QUEUE_LAG_SECONDS
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+# Reported by run_counts for pending jobs waiting out a retry backoff
+RETRYING = 'retrying'
+
+
+class JobQueue:
+    """Durable price-check queue stored in the price_check_jobs table.
+
+    Workers claim jobs with a conditional UPDATE, so several threads,
+    processes or machines can drain the same queue without handing a job out
+    twice. A claimed job holds a lease for `visibility_timeout` seconds; if
+    the worker dies, the lease expires and the job becomes claimable again.
+    Failed jobs are retried with exponential backoff up to `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        visibility_timeout: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.visibility_timeout = visibility_timeout or int(os.getenv("JOB_VISIBILITY_TIMEOUT", "900"))
+        self.max_attempts = max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.retry_delay = retry_delay or int(os.getenv("JOB_RETRY_DELAY", "60"))
+        # Finished jobs are kept this long for inspection, then purged on enqueue
+        self.retention = timedelta(hours=int(os.getenv("JOB_RETENTION_HOURS", "24")))
+
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(PriceCheckJob.status == PENDING, PriceCheckJob.visible_at <= now),
+            and_(PriceCheckJob.status == RUNNING, PriceCheckJob.lease_expires_at <= now),
+        )
+
+    def enqueue(self, product_ids: Iterable[int], run_id: Optional[int] = None) -> int:
+        """Queue a check for each product that doesn't already have one pending or running"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            queued = {
+                product_id for (product_id,) in db.query(PriceCheckJob.product_id).filter(
+                    PriceCheckJob.status.in_([PENDING, RUNNING])
+                )
+            }
+            new_ids = [product_id for product_id in dict.fromkeys(product_ids) if product_id not in queued]
+            db.bulk_insert_mappings(PriceCheckJob, [
+                {
+                    'product_id': product_id, 'run_id': run_id, 'status': PENDING,
+                    'attempts': 0, 'visible_at': now, 'enqueued_at': now,
+                }
+                for product_id in new_ids
+            ])
+            db.query(PriceCheckJob).filter(
+                PriceCheckJob.status.in_([DONE, FAILED]),
+                PriceCheckJob.finished_at < now - self.retention,
+            ).delete(synchronize_session=False)
+            db.commit()
+            return len(new_ids)
+        finally:
+            db.close()
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Dict]:
+        """Lease up to `limit` jobs to `worker_id`, returned as dicts (id, product_id, run_id, attempts)"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            # Jobs that keep outliving their lease (e.g. ones that crash the worker) are given up on
+            db.query(PriceCheckJob).filter(
+                PriceCheckJob.status == RUNNING,
+                PriceCheckJob.lease_expires_at <= now,
+                PriceCheckJob.attempts >= self.max_attempts,
+            ).update(
+                {'status': FAILED, 'last_error': 'visibility timeout exceeded', 'finished_at': now},
+                synchronize_session=False,
+            )
+
+            candidates = db.query(PriceCheckJob.id).filter(self._claimable(now)).order_by(
+                PriceCheckJob.visible_at, PriceCheckJob.id
+            ).limit(limit * 2).all()
+
+            claimed = []
+            for (job_id,) in candidates:
+                # Only succeeds if no other worker claimed the job since we read it
+                updated = db.query(PriceCheckJob).filter(
+                    PriceCheckJob.id == job_id, self._claimable(now)
+                ).update({
+                    'status': RUNNING,
+                    'claimed_by': worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.visibility_timeout),
+                    'attempts': PriceCheckJob.attempts + 1,
+                }, synchronize_session=False)
+                if updated:
+                    claimed.append(job_id)
+                    if len(claimed) >= limit:
+                        break
+            db.commit()
+
+            if not claimed:
+                return []
+            rows = db.query(
+                PriceCheckJob.id, PriceCheckJob.product_id, PriceCheckJob.run_id, PriceCheckJob.attempts,
+                PriceCheckJob.visible_at,
+            ).filter(PriceCheckJob.id.in_(claimed)).all()
+            for row in rows:
+                QUEUE_LAG_SECONDS.observe(max(0.0, (now - row[4]).total_seconds()))
+            return [{'id': row[0], 'product_id': row[1], 'run_id': row[2], 'attempts': row[3]} for row in rows]
+        finally:
+            db.close()
+
+    def complete_many(self, db: Session, job_ids: List[int], worker_id: str) -> int:
+        """Mark jobs done inside the caller's transaction, so the ack commits with the results"""
+        if not job_ids:
+            return 0
+        return db.query(PriceCheckJob).filter(
+            PriceCheckJob.id.in_(job_ids),
+            PriceCheckJob.status == RUNNING,
+            PriceCheckJob.claimed_by == worker_id,
+        ).update({'status': DONE, 'finished_at': datetime.utcnow(), 'last_error': None}, synchronize_session=False)
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Schedule a retry with backoff, or give up once max_attempts is reached"""
+        db = self.session_factory()
+        try:
+            job = db.query(PriceCheckJob).filter(
+                PriceCheckJob.id == job_id,
+                PriceCheckJob.status == RUNNING,
+                PriceCheckJob.claimed_by == worker_id,
+            ).first()
+            if job is None:
+                return False
+
+            now = datetime.utcnow()
+            job.last_error = error[:1000]
+            if job.attempts >= self.max_attempts:
+                job.status = FAILED
+                job.finished_at = now
+            else:
+                job.status = PENDING
+                job.visible_at = now + timedelta(seconds=self.retry_delay * 2 ** (job.attempts - 1))
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def run_counts(self, run_id: int) -> Dict[str, int]:
+        """Jobs of one run by status; pending jobs still in retry backoff count as RETRYING"""
+        db = self.session_factory()
+        try:
+            status = case(
+                (and_(PriceCheckJob.status == PENDING, PriceCheckJob.visible_at > datetime.utcnow()), RETRYING),
+                else_=PriceCheckJob.status,
+            )
+            return dict(db.query(status, func.count(PriceCheckJob.id)).filter(
+                PriceCheckJob.run_id == run_id
+            ).group_by(status).all())
+        finally:
+            db.close()
+
+    def done_product_ids(self, run_id: int) -> List[int]:
+        db = self.session_factory()
+        try:
+            return [product_id for (product_id,) in db.query(PriceCheckJob.product_id).filter(
+                PriceCheckJob.run_id == run_id, PriceCheckJob.status == DONE
+            )]
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict:
+        """Queue depth by state plus lag: how long the oldest ready job has been waiting"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            counts = dict(db.query(PriceCheckJob.status, func.count(PriceCheckJob.id)).group_by(PriceCheckJob.status).all())
+            ready, oldest = db.query(func.count(PriceCheckJob.id), func.min(PriceCheckJob.visible_at)).filter(
+                PriceCheckJob.status == PENDING, PriceCheckJob.visible_at <= now
+            ).one()
+            expired = db.query(func.count(PriceCheckJob.id)).filter(
+                PriceCheckJob.status == RUNNING, PriceCheckJob.lease_expires_at <= now
+            ).scalar()
+            return {
+                'depth': ready + expired,
+                'delayed': counts.get(PENDING, 0) - ready,
+                'running': counts.get(RUNNING, 0) - expired,
+                'expired_leases': expired,
+                'done': counts.get(DONE, 0),
+                'failed': counts.get(FAILED, 0),
+                'lag_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+            }
+        finally:
+            db.close()
@@ -0,0 +1,129 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, SchedulerLease
+
+
+class LeaderLease:
+    """Leader election through an expiring lock row in scheduler_leases.
+
+    Every process runs a heartbeat thread that tries to take or renew the
+    lease. The UPDATE only succeeds for the current holder or once the lease
+    has expired, so at most one process holds it at a time. If the leader
+    dies, its lease expires after `ttl` seconds and the next heartbeat of
+    another process takes over.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.name = name
+        self.ttl = ttl or float(os.getenv("LEADER_LEASE_TTL", "10"))
+        self.heartbeat = heartbeat or float(os.getenv("LEADER_LEASE_HEARTBEAT", "3"))
+        self.session_factory = session_factory
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Local deadline for our own lease, so a stalled heartbeat stops us
+        # acting as leader even before another process takes over
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease; returns whether this process now holds it"""
+        started = time.monotonic()
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.ttl)
+            # Renew our own lease, or else take over an expired one
+            updated = db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.name,
+                SchedulerLease.holder == self.holder,
+            ).update({'expires_at': expires_at}, synchronize_session=False)
+            if not updated:
+                updated = db.query(SchedulerLease).filter(
+                    SchedulerLease.name == self.name,
+                    SchedulerLease.expires_at < now,
+                ).update(
+                    {'holder': self.holder, 'expires_at': expires_at, 'acquired_at': now},
+                    synchronize_session=False,
+                )
+            if not updated:
+                exists = db.query(SchedulerLease.name).filter(SchedulerLease.name == self.name).first()
+                if exists:
+                    db.rollback()
+                    if self.is_leader:
+                        print(f"Lost {self.name} lease")
+                    self._valid_until = 0.0
+                    return False
+                db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at, acquired_at=now))
+            db.commit()
+        except IntegrityError:
+            # Another process inserted the row first
+            db.rollback()
+            self._valid_until = 0.0
+            return False
+        except Exception as e:
+            db.rollback()
+            print(f"Lease heartbeat for {self.name} failed: {e}")
+            return self.is_leader
+        finally:
+            db.close()
+
+        if not self.is_leader:
+            print(f"Acquired {self.name} lease as {self.holder}")
+        # Measured from before the UPDATE: never trust the lease longer than the DB does
+        self._valid_until = started + self.ttl
+        return True
+
+    def release(self):
+        """Give the lease up so another process can take over without waiting for expiry"""
+        self.stop()
+        self._valid_until = 0.0
+        db = self.session_factory()
+        try:
+            db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.name,
+                SchedulerLease.holder == self.holder,
+            ).update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            print(f"Could not release {self.name} lease: {e}")
+        finally:
+            db.close()
+
+    def start(self):
+        """Start the heartbeat thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.try_acquire()
+                self._stop.wait(self.heartbeat)
+
+        self._thread = threading.Thread(target=run, name=f"lease-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.heartbeat + 1)
+            self._thread = None
@@ -1,24 +1,37 @@
 # Import FastAPI framework and dependencies
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request, Response
 from fastapi.security import HTTPBearer  # For JWT token authentication
 from fastapi.middleware.cors import CORSMiddleware  # Enable cross-origin requests
 from sqlalchemy.orm import Session  # Database session management
 from pydantic import BaseModel, EmailStr  # Data validation models
 from typing import List, Optional  # Type hints
 from datetime import datetime, timedelta  # Date/time handling
-import schedule  # Task scheduling
-import threading  # Background threads
-import time  # Time utilities
+from contextlib import asynccontextmanager  # App startup/shutdown hooks
+import time  # Request timing
+from starlette.routing import Match  # Resolve a request to its route template
 
 # Import custom modules
 from database import get_db, User, TrackedProduct, PriceHistory, AlternativeProduct  # Database models
 from auth import get_password_hash, verify_password, create_access_token, get_current_user  # Authentication
-from enhanced_scraper import EnhancedScraper  # Web scraping functionality
+from scheduler import price_scheduler  # Queued, parallel price checks
+from check_frequency import schedule_next_check  # Adaptive per-product check interval
 from agent import PriceTrackerAgent  # AI agent for price analysis
 from email_service import EmailService  # Email notifications
+import metrics  # Prometheus metrics
+import rollups  # Hourly/daily price aggregates
+import history_archive  # Columnar archive of cold raw history
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every API worker runs the timer loop, but only the one holding the
+    # scheduler lease actually checks prices
+    await price_scheduler.start()
+    yield
+    # Finish in-flight checks and hand the lease to another worker right away
+    await price_scheduler.shutdown()
 
 # Create FastAPI application instance
-app = FastAPI(title="Price Tracker Agent API", version="1.0.0")
+app = FastAPI(title="Price Tracker Agent API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS to allow frontend requests
 app.add_middleware(
@@ -29,8 +42,35 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+def route_template(request: Request) -> str:
+    """Path template like /products/{product_id}, so metric labels stay bounded"""
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.monotonic()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, route_template(request), str(status_code)
+        ).observe(time.monotonic() - started)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    payload, content_type = metrics.render()
+    return Response(content=payload, media_type=content_type)
+
 # Initialize core services
-scraper = EnhancedScraper()  # Web scraping service
+scraper = price_scheduler.scraper  # Web scraping service: one browser pool and coalescing per process
 agent = PriceTrackerAgent()  # AI analysis service
 email_service = EmailService()  # Email notification service
 
@@ -60,6 +100,10 @@ class ProductResponse(BaseModel):
     platform: str              # E-commerce platform
     product_url: str           # Original product URL
     created_at: datetime       # When tracking started
+    scrape_status: Optional[str] = None          # ok, failing or quarantined (retried rarely)
+    consecutive_failures: Optional[int] = None   # Failed checks in a row
+    last_error: Optional[str] = None             # Why the last check failed
+    next_check_at: Optional[datetime] = None     # When the price is next checked
 
 # Auth endpoints
 @app.post("/auth/register")
@@ -128,11 +172,8 @@ async def track_product(
     db.refresh(db_product)
     
     # Add initial price history
-    price_history = PriceHistory(
-        product_id=db_product.id,
-        price=product_data['price']
-    )
-    db.add(price_history)
+    rollups.add_price(db, db_product.id, product_data['price'])
+    schedule_next_check(db, db_product)
     db.commit()
     
     # Generate alternatives using AI
@@ -152,6 +193,18 @@ async def get_my_products(
     
     return products
 
+def rollup_point(rollup) -> dict:
+    """One rollup bucket, shaped like a price history entry (price = close) plus its range"""
+    return {
+        "product_id": rollup.product_id,
+        "timestamp": rollup.bucket_start,
+        "price": rollup.close,
+        "open": rollup.open,
+        "high": rollup.high,
+        "low": rollup.low,
+        "count": rollup.count,
+    }
+
 @app.get("/products/{product_id}")
 async def get_product_details(
     product_id: int,
@@ -166,13 +219,16 @@ async def get_product_details(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Get price history
+    # Get price history: the last 30 raw rows, newest first, kept for existing clients
     price_history = db.query(PriceHistory).filter(
         PriceHistory.product_id == product_id
     ).order_by(PriceHistory.timestamp.desc()).limit(30).all()
     
+    # Daily closes for the chart and the analysis, oldest first: 30 days, however often the price moved
+    daily_history = [rollup_point(rollup) for rollup in reversed(rollups.series(db, product_id, rollups.DAY, limit=30))]
+    
     # Get AI analysis
-    history_data = [{"price": p.price, "timestamp": p.timestamp} for p in price_history]
+    history_data = [{"price": point["price"], "timestamp": point["timestamp"]} for point in daily_history]
     ai_analysis = agent.analyze_product(product.product_name, product.current_price, history_data)
     
     # Get alternatives
@@ -183,10 +239,48 @@ async def get_product_details(
     return {
         "product": product,
         "price_history": price_history,
+        "daily_history": daily_history,
         "ai_analysis": ai_analysis,
         "alternatives": alternatives
     }
 
+# Unaggregated history resolution for /products/{product_id}/history
+RAW = 'raw'
+
+@app.get("/products/{product_id}/history")
+async def get_price_history(
+    product_id: int,
+    resolution: str = rollups.DAY,
+    days: int = 90,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Price chart series from the hourly or daily rollups, oldest bucket first.
+
+    resolution=raw returns every recorded price, archived ones included.
+    """
+    if resolution not in rollups.RESOLUTIONS + (RAW,):
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(rollups.RESOLUTIONS + (RAW,))}")
+    
+    product = db.query(TrackedProduct.id).filter(
+        TrackedProduct.id == product_id,
+        TrackedProduct.user_id == current_user.id
+    ).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    since = datetime.utcnow() - timedelta(days=max(1, days))
+    if resolution == RAW:
+        return {
+            "resolution": resolution,
+            "points": history_archive.full_history(db, product_id, start=since)
+        }
+    points = rollups.series(db, product_id, resolution, since=since)
+    return {
+        "resolution": resolution,
+        "points": [rollup_point(rollup) for rollup in reversed(points)]
+    }
+
 @app.delete("/products/{product_id}")
 async def stop_tracking(
     product_id: int,
@@ -301,73 +395,6 @@ def generate_alternatives(product_id: int, product_data: dict):
     db.commit()
     db.close()
 
-def check_price_updates():
-    """Background task to check price updates"""
-    db = next(get_db())
-    
-    active_products = db.query(TrackedProduct).filter(
-        TrackedProduct.is_active == True
-    ).all()
-    
-    for product in active_products:
-        try:
-            # Scrape current price
-            current_data = scraper.scrape_product(product.product_url)
-            if not current_data:
-                continue
-            
-            new_price = current_data['price']
-            old_price = product.current_price
-            
-            # Check if price changed significantly (>1% change)
-            if abs(new_price - old_price) / old_price > 0.01:
-                # Update product price
-                product.current_price = new_price
-                
-                # Add to price history
-                price_history = PriceHistory(
-                    product_id=product.id,
-                    price=new_price
-                )
-                db.add(price_history)
-                
-                # Send email alert
-                user = db.query(User).filter(User.id == product.user_id).first()
-                if user:
-                    alert_content = agent.generate_price_alert_content(
-                        product.product_name, old_price, new_price, product.product_url
-                    )
-                    
-                    product_data = {
-                        'name': product.product_name,
-                        'old_price': old_price,
-                        'new_price': new_price,
-                        'platform': product.platform,
-                        'url': product.product_url
-                    }
-                    
-                    email_service.send_price_alert(user.email, product_data, alert_content)
-                
-                db.commit()
-                
-        except Exception as e:
-            print(f"Error checking price for product {product.id}: {e}")
-            continue
-    
-    db.close()
-
-# Schedule price checking
-schedule.every(6).hours.do(check_price_updates)
-
-def run_scheduler():
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
-
-# Start scheduler in background thread
-scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-scheduler_thread.start()
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""Prometheus metrics for the scrape, scheduler and API hot paths.
+
+Exposed at GET /metrics. Metric updates are in-process counter/bucket
+increments, cheap enough for every request and scrape.
+
+Workers in process mode (see price_workers) are separate interpreters. For
+their metrics to reach /metrics, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory in the environment before the app starts (and empty it
+between runs): every process then writes its samples there and render()
+merges them. Only counters and histograms are used, which merge by sum.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# Read by prometheus_client at import; also inherited by spawned worker processes
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Scrapes span cache hits (milliseconds) to Chrome fallbacks (tens of seconds)
+SCRAPE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+# Check cycles are minutes long with many products
+CYCLE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+QUEUE_LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+REMOTE_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+SCRAPE_SECONDS = Histogram(
+    'price_tracker_scrape_seconds',
+    'Product scrape latency, by platform and the tier that served it (http, browser, failed)',
+    ['platform', 'tier'], buckets=SCRAPE_BUCKETS,
+)
+SCRAPES = Counter(
+    'price_tracker_scrapes_total',
+    'Product scrapes by platform and serving tier; browser is the Selenium fallback',
+    ['platform', 'tier'],
+)
+
+CHECK_CYCLE_SECONDS = Histogram(
+    'price_tracker_check_cycle_seconds', 'Duration of a scheduled price check run on the leader',
+    buckets=CYCLE_BUCKETS,
+)
+QUEUE_LAG_SECONDS = Histogram(
+    'price_tracker_job_queue_lag_seconds', 'Time a price check job was claimable before a worker claimed it',
+    buckets=QUEUE_LAG_BUCKETS,
+)
+DB_WRITE_SECONDS = Histogram(
+    'price_tracker_db_write_seconds', 'Commit latency of scheduler and worker writes, by operation',
+    ['operation'], buckets=FAST_BUCKETS,
+)
+
+GEMINI_SECONDS = Histogram(
+    'price_tracker_gemini_seconds', 'Gemini generate_content latency, by agent operation',
+    ['operation'], buckets=REMOTE_BUCKETS,
+)
+GEMINI_FAILURES = Counter(
+    'price_tracker_gemini_failures_total', 'Gemini calls that raised, by agent operation',
+    ['operation'],
+)
+SMTP_SECONDS = Histogram(
+    'price_tracker_smtp_send_seconds', 'SMTP connect-and-send time, by email kind and result',
+    ['kind', 'result'], buckets=REMOTE_BUCKETS,
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'price_tracker_http_request_seconds', 'API request latency, by method, route template and status',
+    ['method', 'route', 'status'], buckets=FAST_BUCKETS,
+)
+
+
+def render():
+    """Exposition-format payload and its content type, merged across processes in multiprocess mode"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
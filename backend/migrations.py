@@ -0,0 +1,130 @@
+"""Versioned schema migrations.
+
+Applied versions are recorded in the schema_version table, and migrate()
+runs every newer entry of MIGRATIONS in order, each in its own transaction.
+database.py calls it on import, so an existing price_tracker.db is
+upgraded in place the first time the new code starts.
+
+Migrations must be idempotent (checkfirst / IF EXISTS): a fresh database
+gets the current models from the baseline, and several processes may start
+at once. To change the schema, edit the model and append a migration that
+applies the same change to existing databases.
+
+Run directly to upgrade DATABASE_URL and print the applied versions:
+    python migrations.py
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime),
+)
+
+
+def _add_missing_columns(conn: Connection, metadata: MetaData):
+    inspector = inspect(conn)
+    for table in metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def _create_indexes(conn: Connection, metadata: MetaData, names: List[str]):
+    indexes = {index.name: index for table in metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+
+def baseline(conn: Connection, metadata: MetaData):
+    """Missing tables, plus the columns earlier releases added to existing tables at startup"""
+    metadata.create_all(bind=conn)
+    _add_missing_columns(conn, metadata)
+
+
+def query_indexes(conn: Connection, metadata: MetaData):
+    """Composite indexes shaped like the hot queries, replacing single-column ones they cover"""
+    _create_indexes(conn, metadata, [
+        "ix_tracked_products_user_active",
+        "ix_tracked_products_active_next_check",
+        "ix_price_history_product_timestamp",
+        "ix_alternative_products_original_product_id",
+        "ix_price_check_jobs_status_visible",
+        "ix_price_check_jobs_status_lease",
+        "ix_price_check_jobs_run_status",
+    ])
+    for name in (
+        "ix_tracked_products_next_check_at",
+        "ix_price_history_product_id",
+        "ix_price_check_jobs_status",
+        "ix_price_check_jobs_visible_at",
+        "ix_price_check_jobs_run_id",
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if conn.dialect.name == 'sqlite':
+        # Row-count statistics so the planner weighs the new indexes properly
+        conn.execute(text("ANALYZE"))
+
+
+def price_rollups(conn: Connection, metadata: MetaData):
+    """Rollup table, backfilled from the existing raw history"""
+    # Imported here: rollups imports database, which is still importing this module
+    from rollups import aggregate
+
+    rollups_table = metadata.tables["price_rollups"]
+    rollups_table.create(bind=conn, checkfirst=True)
+    if conn.execute(select(rollups_table.c.id).limit(1)).first():
+        return
+    history = metadata.tables["price_history"]
+    points = conn.execute(select(history.c.product_id, history.c.price, history.c.timestamp))
+    buckets = list(aggregate(points).values())
+    for start in range(0, len(buckets), 1000):
+        conn.execute(rollups_table.insert(), buckets[start:start + 1000])
+
+
+# (version, name, upgrade) in order; never edit or renumber an applied entry
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection, MetaData], None]]] = [
+    (1, "baseline", baseline),
+    (2, "query_indexes", query_indexes),
+    (3, "price_rollups", price_rollups),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    schema_version.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return [version for (version,) in conn.execute(select(schema_version.c.version).order_by(schema_version.c.version))]
+
+
+def migrate(engine: Engine, metadata: MetaData) -> List[int]:
+    """Apply every migration newer than the database; returns the versions applied"""
+    applied = set(applied_versions(engine))
+    newly_applied = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                upgrade(conn, metadata)
+                conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # Another process recorded this version first
+            continue
+        print(f"Applied schema migration {version}: {name}")
+        newly_applied.append(version)
+    return newly_applied
+
+
+if __name__ == "__main__":
+    # Importing database runs migrate() against DATABASE_URL
+    from database import engine
+    print(f"Schema versions applied: {applied_versions(engine)}")
@@ -0,0 +1,305 @@
+"""Staged price-check pipeline: fetch -> diff/persist -> notify.
+
+Each stage runs at its own concurrency and hands work to the next through a
+bounded queue, so the slowest stage no longer sets the pace of the others:
+
+- fetch: the async engine scrapes a claimed batch wide (bounded per domain);
+  parsing already runs off the event loop in worker threads
+- persist: one thread per worker diffs results and writes each batch in
+  bulk (see price_ingest), one commit per batch
+- notify: a small shared thread pool writes and sends alerts, throttled
+
+When a downstream stage falls behind, its buffer fills and the stage
+upstream blocks on put(): a stalled SMTP server or AI call slows claiming
+instead of piling up leased jobs or unsent alerts in memory.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from check_runs import record_progress
+from database import SessionLocal, TrackedProduct
+from job_queue import JobQueue
+from metrics import DB_WRITE_SECONDS
+from price_ingest import ingest_batch
+
+# End-of-stream marker between stages
+_DONE = object()
+
+# How often a producer blocked on a full buffer checks that its consumer is still alive
+PUT_POLL_SECONDS = 1.0
+
+
+class PersistStageStopped(Exception):
+    """The persist thread died, so nothing will ever drain its buffer"""
+
+
+class AlertNotifier:
+    """Bounded, throttled alert stage shared by every worker in the process"""
+
+    def __init__(
+        self,
+        send: Callable[[Dict], None],
+        workers: Optional[int] = None,
+        buffer: Optional[int] = None,
+        rate: Optional[float] = None,
+    ):
+        self.send = send
+        self.workers = workers or int(os.getenv("PIPELINE_NOTIFY_WORKERS", "2"))
+        self.rate = rate or float(os.getenv("PIPELINE_NOTIFY_RATE", "2"))
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer or int(os.getenv("PIPELINE_NOTIFY_BUFFER", "100")))
+        self._lock = threading.Lock()
+        self._next_send = 0.0
+        self._threads: List[threading.Thread] = []
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'backpressure_waits': 0}
+
+    def _start(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._run, name=f"notify-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, alert: Dict):
+        """Queue an alert, blocking while the buffer is full"""
+        if len(self._threads) < self.workers:
+            self._start()
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.stats['backpressure_waits'] += 1
+            self._queue.put(alert)
+        self.stats['queued'] += 1
+
+    def _throttle(self):
+        # Spaces sends evenly across all notify threads
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            self._next_send = max(now, self._next_send) + 1 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def _run(self):
+        while True:
+            alert = self._queue.get()
+            try:
+                if alert is _DONE:
+                    return
+                self._throttle()
+                self.send(alert)
+                self.stats['sent'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"Alert delivery failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def close(self, timeout: Optional[float] = None):
+        """Send what is queued, then stop the threads (waits up to `timeout` each)"""
+        threads = list(self._threads)
+        try:
+            for _ in threads:
+                self._queue.put(_DONE, timeout=timeout)
+        except queue.Full:
+            print(f"Alert queue still full after {timeout}s; {self._queue.qsize()} alerts not sent")
+            return
+        for thread in threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, pending=self._queue.qsize(), threads=len(self._threads))
+
+
+class CheckPipeline:
+    """One queue worker: claims batches, scrapes them and persists the results in a second thread.
+
+    The fetch side keeps claiming and scraping the next batch while the
+    persist side is still writing the previous one, up to `buffer` results
+    ahead. Each commit carries the product updates, the acks of the jobs
+    they belong to and the run checkpoint, so a crash loses at most one
+    uncommitted batch and those jobs are simply retried.
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        queue: JobQueue,
+        worker_id: str,
+        commit_batch: int,
+        buffer: Optional[int] = None,
+    ):
+        self.scheduler = scheduler
+        self.queue = queue
+        self.worker_id = worker_id
+        self.commit_batch = commit_batch
+        self.buffer = buffer or int(os.getenv("PIPELINE_BUFFER", "32"))
+        self.stats = {'fetched': 0, 'persisted': 0, 'backpressure_waits': 0}
+
+    def run(self, batch_size: int, stop: Optional[threading.Event] = None) -> int:
+        """Claim and process batches until no job is claimable or `stop` is set; returns jobs processed"""
+        results: queue.Queue = queue.Queue(maxsize=self.buffer)
+        persister = threading.Thread(target=self._persist, args=(results,), name=f"persist-{self.worker_id}", daemon=True)
+        persister.start()
+        processed = 0
+        try:
+            while (stop is None or not stop.is_set()) and persister.is_alive():
+                jobs = self.queue.claim(self.worker_id, batch_size)
+                if not jobs:
+                    break
+                try:
+                    # On the engine's shared loop: one client and one set of per-domain caps for all workers
+                    self.scheduler.engine.execute(self._fetch(jobs, self._active_urls(jobs), results, persister))
+                except Exception as e:
+                    print(f"Worker {self.worker_id} fetch error: {e}")
+                    # Results already handed to the persist stage are acked there
+                    self._fail_jobs([job for job in jobs if not job.get('handed_off')], str(e))
+                processed += len(jobs)
+        finally:
+            try:
+                self._put(results, _DONE, persister)
+                persister.join()
+            except PersistStageStopped:
+                pass
+            if not persister.is_alive():
+                # Whatever the dead stage left behind goes back on the queue
+                self._fail_jobs(self._drain(results), "persist stage stopped")
+        return processed
+
+    def _put(self, results: queue.Queue, item, persister: threading.Thread):
+        """Hand an item to the persist stage, waiting while its buffer is full"""
+        try:
+            results.put_nowait(item)
+            return
+        except queue.Full:
+            # Persist stage is behind: wait here rather than claim more work
+            self.stats['backpressure_waits'] += 1
+        while True:
+            if not persister.is_alive():
+                raise PersistStageStopped(f"persist stage of {self.worker_id} stopped")
+            try:
+                results.put(item, timeout=PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, results: queue.Queue) -> List[Dict]:
+        jobs = []
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                return jobs
+            if item is not _DONE:
+                jobs.append(item[0])
+
+    def _fail_jobs(self, jobs: List[Dict], error: str):
+        """Put jobs back for a retry; a job that can't be failed now is retried once its lease expires"""
+        for job in jobs:
+            try:
+                self.queue.fail(job['id'], self.worker_id, error)
+            except Exception as e:
+                print(f"Worker {self.worker_id} could not release job {job['id']}: {e}")
+
+    def _active_urls(self, jobs: List[Dict]) -> Dict[int, str]:
+        """product_id -> URL for the jobs' products that are still tracked"""
+        db = SessionLocal()
+        try:
+            return dict(db.query(TrackedProduct.id, TrackedProduct.product_url).filter(
+                TrackedProduct.id.in_([job['product_id'] for job in jobs]),
+                TrackedProduct.is_active == True,
+            ).all())
+        finally:
+            db.close()
+
+    async def _fetch(self, jobs: List[Dict], urls: Dict[int, str], results: queue.Queue, persister: threading.Thread):
+        loop = asyncio.get_running_loop()
+        to_scrape = []
+        for job in jobs:
+            if job['product_id'] in urls:
+                to_scrape.append(dict(job, url=urls[job['product_id']]))
+            else:
+                # Deleted or deactivated since being queued: acked with nothing to check
+                await loop.run_in_executor(None, self._put, results, (job, None), persister)
+                job['handed_off'] = True
+
+        jobs_by_id = {job['id']: job for job in jobs}
+        async for job, current_data in self.scheduler.engine.scrape_many(to_scrape, key=lambda job: job['url']):
+            self.stats['fetched'] += 1
+            # Blocking put runs in a thread so in-flight scrapes keep going meanwhile
+            await loop.run_in_executor(None, self._put, results, (job, current_data), persister)
+            jobs_by_id[job['id']]['handed_off'] = True
+
+    def _persist(self, results: queue.Queue):
+        db = SessionLocal()
+        try:
+            finished = False
+            while not finished:
+                # Block for one result, then take whatever else is ready up to a commit batch
+                chunk = [results.get()]
+                while len(chunk) < self.commit_batch and chunk[-1] is not _DONE:
+                    try:
+                        chunk.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+                if chunk[-1] is _DONE:
+                    chunk.pop()
+                    finished = True
+                if not chunk:
+                    continue
+                try:
+                    alerts = self._persist_chunk(db, chunk)
+                except Exception as e:
+                    # Nothing of the chunk was written; it all goes back on the queue
+                    print(f"Worker {self.worker_id} could not persist batch: {e}\n{traceback.format_exc()}")
+                    db = self._reset_session(db)
+                    self._fail_jobs([job for job, _ in chunk], f"batch rolled back: {e}")
+                    continue
+                self._notify(alerts)
+        finally:
+            db.close()
+
+    def _reset_session(self, db):
+        """The session after a failed batch: rolled back, or replaced if its connection is gone"""
+        try:
+            db.rollback()
+            return db
+        except Exception as e:
+            print(f"Worker {self.worker_id} replacing database session: {e}")
+            try:
+                db.close()
+            except Exception:
+                pass
+            return SessionLocal()
+
+    def _persist_chunk(self, db, chunk: List) -> List[Dict]:
+        """Write one chunk and ack its jobs in a single commit; returns the alerts to send"""
+        with DB_WRITE_SECONDS.labels('check_batch').time():
+            changed, alerts = ingest_batch(
+                db,
+                [(job['product_id'], current_data) for job, current_data in chunk],
+            )
+            progress: Dict = {}
+            for job, _ in chunk:
+                counts = progress.setdefault(job['run_id'], {'processed': 0, 'changed': 0})
+                counts['processed'] += 1
+                counts['changed'] += 1 if job['product_id'] in changed else 0
+            self.queue.complete_many(db, [job['id'] for job, _ in chunk], self.worker_id)
+            record_progress(db, progress)
+            db.commit()
+        self.stats['persisted'] += len(chunk)
+        return alerts
+
+    def _notify(self, alerts: List[Dict]):
+        # Only after the commit that recorded the change; may block if notify is behind
+        for alert in alerts:
+            try:
+                self.scheduler.notifier.submit(alert)
+            except Exception as e:
+                print(f"Worker {self.worker_id} could not queue alert: {e}")
@@ -0,0 +1,80 @@
+import re
+from typing import Optional
+
+# An amount with Indian (1,23,456) or Western (123,456) digit grouping, or no
+# grouping at all, optionally followed by paise. The lookaheads stop a grouping
+# alternative, or the paise, from matching only a prefix of a longer number
+# (1,299.999 and 12.5000 are not amounts).
+_INTEGER = r'(?:\d{1,2}(?:,\d{2})+,\d{3}|\d{1,3}(?:,\d{3})+|\d+)(?!\d|,\d)'
+_AMOUNT = _INTEGER + r'(?:\.\d{1,2})?(?!\d|\.\d)'
+
+# Currency markers that can introduce a price. Python's regex engine only gets
+# its fast literal search when a pattern starts with a single literal, so the
+# markers are located with str.find and the combined pattern is then matched in
+# place at each candidate position.
+CURRENCY_MARKERS = ('₹', '&#8377;', 'Rs', 'INR')
+
+# All prefixed currency forms in one pattern:
+#   ₹1,299   ₹ 1,23,456.50   Rs. 499   Rs 499   INR 899   &#8377;1,299
+PRICE_RE = re.compile(r'(?:₹|&#8377;|Rs\.?|INR)\s*(' + _AMOUNT + r')')
+# Amount written before the rupee sign: 1,299 ₹
+SUFFIXED_PRICE_RE = re.compile(r'(?<![\d,.])(' + _AMOUNT + r')\s*$')
+SUFFIX_WINDOW = 40
+
+# Price fields as they appear in raw page source (JSON blobs and Amazon markup)
+SOURCE_PRICE_RE = re.compile(
+    r'"price":\s*"(?P<json>[0-9,]+(?:\.[0-9]{1,2})?)"'
+    r'|"displayPrice":\s*"[^"]*?(?P<display>[0-9,]+(?:\.[0-9]{1,2})?)"'
+    r'|priceToPay[^>]*>.*?₹(?P<pay>[0-9,]+)'
+    r'|a-price-whole[^>]*>(?P<whole>[0-9,]+)'
+)
+
+
+def parse_amount(amount: str) -> Optional[float]:
+    """Convert a matched amount such as '1,23,456.50' to a float"""
+    try:
+        return float(amount.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def extract_price(text: str) -> Optional[float]:
+    """First rupee price in `text`, scanning it once and never copying it"""
+    if not text:
+        return None
+
+    start = 0
+    while True:
+        # Earliest marker at or after `start`; each later marker only needs
+        # searching up to the best hit so far, so the scan stops at the first price
+        position, marker = -1, None
+        for candidate in CURRENCY_MARKERS:
+            hit = text.find(candidate, start, position if position >= 0 else len(text))
+            if hit >= 0:
+                position, marker = hit, candidate
+        if marker is None:
+            return None
+
+        # "Rs"/"INR" only count as currency at a word start (not "HRs", "MINR")
+        if marker in ('₹', '&#8377;') or position == 0 or not text[position - 1].isalpha():
+            match = PRICE_RE.match(text, position)
+            if match:
+                return parse_amount(match.group(1))
+
+        if marker == '₹':
+            # endpos makes `$` match right before the sign without slicing the text
+            match = SUFFIXED_PRICE_RE.search(text, max(0, position - SUFFIX_WINDOW), position)
+            if match:
+                return parse_amount(match.group(1))
+
+        start = position + 1
+
+
+def extract_source_price(source: str, minimum: float = 100, maximum: float = 1000000) -> Optional[float]:
+    """First plausible price field in raw page source, skipping values outside the range"""
+    for match in SOURCE_PRICE_RE.finditer(source):
+        amount = match.group('json') or match.group('display') or match.group('pay') or match.group('whole')
+        price = parse_amount(amount)
+        if price is not None and minimum < price < maximum:
+            return price
+    return None
@@ -0,0 +1,132 @@
+"""Bulk write path for a batch of scrape results.
+
+A whole batch costs a fixed handful of statements instead of an ORM
+object, a User lookup and a flush per product:
+
+- one SELECT of the products' current state, one of their recent change
+  times and one of the alerted users' emails
+- one executemany INSERT of the new PriceHistory rows, plus one SELECT
+  and up to two executemany statements to fold them into the rollups
+- one executemany UPDATE (by primary key) of the products' price,
+  failure state and next check time
+
+Nothing is committed here; the caller commits the batch together with its
+job acks and run checkpoint, so the batch costs one transaction (and one
+fsync).
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from check_frequency import apply_next_check, recent_change_times, record_scrape_failure, record_scrape_success
+from database import PriceHistory, TrackedProduct, User
+from rollups import apply_prices
+
+# Moves smaller than this fraction of the old price are not recorded
+PRICE_CHANGE_THRESHOLD = 0.01
+
+# Columns read for each product; the ones after 'platform' are written back
+PRODUCT_COLUMNS = (
+    'id', 'user_id', 'product_name', 'product_url', 'platform',
+    'current_price', 'scrape_status', 'consecutive_failures', 'last_error',
+    'last_success_at', 'last_failure_at', 'check_interval', 'next_check_at',
+)
+UPDATE_COLUMNS = PRODUCT_COLUMNS[PRODUCT_COLUMNS.index('current_price'):]
+
+
+def is_price_change(old_price: Optional[float], new_price: float) -> bool:
+    if not old_price:
+        return new_price != old_price
+    return abs(new_price - old_price) / old_price > PRICE_CHANGE_THRESHOLD
+
+
+def price_alert(email: str, product, old_price: float, new_price: float) -> Dict:
+    """Plain-data alert for PriceScheduler.send_alert"""
+    return {
+        'email': email,
+        'product': {
+            'name': product.product_name,
+            'old_price': old_price,
+            'new_price': new_price,
+            'platform': product.platform,
+            'url': product.product_url
+        },
+    }
+
+
+def ingest_batch(
+    db: Session,
+    results: Iterable[Tuple[int, Optional[Dict]]],
+    now: Optional[datetime] = None,
+) -> Tuple[Set[int], List[Dict]]:
+    """Apply (product_id, scraped data or None) results in bulk; the caller commits.
+
+    Returns the ids of products whose price changed and the alerts to send
+    once the batch is committed. Inactive or deleted products are skipped.
+    Every failed scrape counts against the product; a result marked
+    'skipped' (never fetched, e.g. the store's breaker was open) only
+    reschedules it.
+    """
+    now = now or datetime.utcnow()
+    # The last result wins if a product appears twice
+    results = dict(results)
+    if not results:
+        return set(), []
+
+    columns = [getattr(TrackedProduct, name) for name in PRODUCT_COLUMNS]
+    products = {
+        row.id: SimpleNamespace(**row._asdict())
+        for row in db.execute(select(*columns).where(
+            TrackedProduct.id.in_(list(results)),
+            TrackedProduct.is_active == True,
+        ))
+    }
+
+    history_rows: List[Dict] = []
+    changes: List[Tuple[SimpleNamespace, float, float]] = []
+    for product_id, product in products.items():
+        current_data = results[product_id]
+        if current_data and current_data.get('skipped'):
+            continue
+        if not current_data or not current_data.get('price'):
+            record_scrape_failure(product, "no price found" if current_data else "scrape failed", now)
+            continue
+        record_scrape_success(product, now)
+
+        new_price = current_data['price']
+        # Served from the fetch cache and already stored. The cache is per URL, so a
+        # row that missed the write (rolled back, or another user's) still gets it.
+        if current_data.get('unchanged') and product.current_price == new_price:
+            continue
+        if is_price_change(product.current_price, new_price):
+            changes.append((product, product.current_price, new_price))
+            product.current_price = new_price
+            history_rows.append({'product_id': product_id, 'price': new_price, 'timestamp': now})
+
+    changed_ids = {product.id for product, _, _ in changes}
+    change_times = recent_change_times(db, [product_id for product_id, product in products.items()
+                                            if not product.consecutive_failures])
+    for product_id, product in products.items():
+        times = change_times.get(product_id, [])
+        apply_next_check(product, times + [now] if product_id in changed_ids else times, now)
+
+    if history_rows:
+        db.execute(insert(PriceHistory), history_rows)
+        apply_prices(db, history_rows)
+    db.execute(update(TrackedProduct), [
+        dict({name: getattr(product, name) for name in UPDATE_COLUMNS}, id=product.id)
+        for product in products.values()
+    ])
+
+    alerts: List[Dict] = []
+    if changes:
+        emails = dict(db.execute(select(User.id, User.email).where(
+            User.id.in_({product.user_id for product, _, _ in changes})
+        )).all())
+        for product, old_price, new_price in changes:
+            if emails.get(product.user_id):
+                alerts.append(price_alert(emails[product.user_id], product, old_price, new_price))
+    return changed_ids, alerts
@@ -0,0 +1,140 @@
+"""Workers that drain the price-check job queue.
+
+Thread mode shares one PriceScheduler (and so one browser pool and fetch
+cache) between workers. Process mode starts each worker in its own
+interpreter to use more cores; each process builds its own scraper. It
+needs PROMETHEUS_MULTIPROC_DIR (see metrics) so the workers' metrics are
+exported, and falls back to thread mode without it. WorkerPool.stop reaches
+the worker processes through a shared event.
+
+Run standalone to add workers on another machine pointed at the same
+DATABASE_URL:
+    python price_workers.py
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
+import metrics
+from job_queue import JobQueue
+from pipeline import CheckPipeline
+
+WORKER_MODES = ('thread', 'process')
+
+
+def make_worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def drain(
+    scheduler,
+    queue: JobQueue,
+    worker_id: str,
+    batch_size: int,
+    commit_batch: int,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Claim and process batches until no job is claimable or `stop` is set; returns jobs processed"""
+    return CheckPipeline(scheduler, queue, worker_id, commit_batch).run(batch_size, stop)
+
+
+# The pool's stop event, in a worker process (set by _init_process_worker)
+_process_stop = None
+
+
+def _init_process_worker(stop):
+    global _process_stop
+    _process_stop = stop
+
+
+def _process_worker(index: int, batch_size: int, commit_batch: int) -> int:
+    # Imported here so each spawned process builds its own scraper and browser pool
+    from scheduler import price_scheduler
+    processed = drain(price_scheduler, JobQueue(), make_worker_id(index), batch_size, commit_batch, _process_stop)
+    price_scheduler.engine.close()
+    price_scheduler.scraper.driver_pool.close()
+    # Alerts are sent in the background; let them go out before the process exits
+    price_scheduler.notifier.close()
+    return processed
+
+
+class WorkerPool:
+    """Fixed-size pool of queue workers, in threads or in separate processes"""
+
+    def __init__(
+        self,
+        scheduler,
+        queue: Optional[JobQueue] = None,
+        workers: Optional[int] = None,
+        mode: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.scheduler = scheduler
+        self.queue = queue or JobQueue()
+        self.workers = workers or int(os.getenv("PRICE_CHECK_WORKERS", "4"))
+        mode = mode or os.getenv("PRICE_CHECK_WORKER_MODE", "thread")
+        self.mode = mode if mode in WORKER_MODES else 'thread'
+        if self.mode == 'process' and not metrics.MULTIPROC_DIR:
+            print("Process worker mode needs PROMETHEUS_MULTIPROC_DIR to export worker metrics; using threads")
+            self.mode = 'thread'
+        self.batch_size = batch_size or int(os.getenv("PRICE_CHECK_CLAIM_BATCH", "8"))
+        # A worker only has its claimed batch in flight, so workers x batch bounds
+        # concurrent checks on this host (and with it outbound traffic and memory)
+        self.max_concurrent = int(os.getenv("MAX_CONCURRENT_CHECKS", "16"))
+        self.batch_size = max(1, min(self.batch_size, self.max_concurrent // self.workers))
+        # Results per transaction: fewer, shorter holds of SQLite's writer lock
+        self.commit_batch = int(os.getenv("PRICE_CHECK_COMMIT_BATCH", "20"))
+        # Set on shutdown: workers finish their current batch and stop claiming.
+        # Process workers get a spawn-context copy that crosses the process boundary
+        self._stop = get_context('spawn').Event() if self.mode == 'process' else threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def resume(self):
+        self._stop.clear()
+
+    def drain(self) -> int:
+        """Run every worker until the queue has nothing claimable; returns jobs processed"""
+        if self.mode == 'process':
+            # spawn, not fork: the parent holds threads, sockets and browser handles
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=get_context('spawn'),
+                initializer=_init_process_worker, initargs=(self._stop,),
+            ) as executor:
+                futures = [executor.submit(_process_worker, index, self.batch_size, self.commit_batch) for index in range(self.workers)]
+                return sum(future.result() for future in futures)
+
+        counts = [0] * self.workers
+
+        def run(index: int):
+            counts[index] = drain(
+                self.scheduler, self.queue, make_worker_id(index), self.batch_size, self.commit_batch, self._stop
+            )
+
+        threads = [threading.Thread(target=run, args=(index,), daemon=True) for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(counts)
+
+
+def main():
+    from scheduler import price_scheduler
+    poll_interval = int(os.getenv("JOB_POLL_INTERVAL", "30"))
+    pool = WorkerPool(price_scheduler)
+    print(f"Price check workers started: {pool.workers} x {pool.mode}")
+    while True:
+        processed = pool.drain()
+        if processed:
+            print(f"Processed {processed} price checks; queue stats: {pool.queue.get_stats()}")
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import adapters
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Status codes that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = (429, 503)
+
+# Markers of bot-wall pages served by common CDNs/WAFs; adapters add their own
+GENERIC_BLOCK_MARKERS = [
+    '<title>Access Denied</title>',
+    'Request unsuccessful. Incapsula',
+    'unusual traffic from your computer',
+    'Attention Required! | Cloudflare',
+]
+
+
+def url_domain(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_block_page(html: str, markers: Optional[List[str]] = None) -> bool:
+    """Whether a 200 response is really a captcha or bot-wall page"""
+    # Block pages are small; only look at the head of the document
+    head = html[:20000].lower()
+    return any(marker.lower() in head for marker in (markers or []) + GENERIC_BLOCK_MARKERS)
+
+
+class DomainLimiter:
+    """Token bucket plus AIMD rate control and a circuit breaker for one domain.
+
+    Throttle signals (429, 503, block pages) halve the refill rate; every
+    success adds a little back, up to the configured rate. Consecutive
+    failures open the breaker, which rejects requests until a cooldown has
+    passed, then lets a single probe through to test the site.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        failure_threshold: int,
+        cooldown: float,
+        max_cooldown: float,
+    ):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = rate / 16
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        # Set from Retry-After: no request before this time
+        self.paused_until = 0.0
+
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+
+        self.stats = {'requests': 0, 'waits': 0, 'wait_seconds': 0.0, 'throttled': 0, 'failures': 0, 'rejected': 0, 'trips': 0}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def rejecting(self, now: float) -> bool:
+        """Whether reserve() would reject right now: open and cooling down, or a half-open probe is out"""
+        if self.state == OPEN:
+            return now - self.opened_at < self.cooldown
+        return self.state == HALF_OPEN and self.probe_in_flight and now - self.probe_started < self.cooldown
+
+    def reserve(self, now: float) -> Optional[float]:
+        """Take a token; returns seconds to wait before sending, or None if the breaker rejects"""
+        if self.state == OPEN:
+            if now - self.opened_at < self.cooldown:
+                self.stats['rejected'] += 1
+                return None
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            # A probe whose outcome was never recorded doesn't block forever
+            if self.probe_in_flight and now - self.probe_started < self.cooldown:
+                self.stats['rejected'] += 1
+                return None
+            self.probe_in_flight = True
+            self.probe_started = now
+
+        self._refill(now)
+        # Tokens may go negative: each caller queues behind the ones before it
+        self.tokens -= 1
+        wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+        self.stats['requests'] += 1
+        if wait > 0:
+            self.stats['waits'] += 1
+            self.stats['wait_seconds'] += wait
+        return wait
+
+    def record(self, now: float, status_code: Optional[int], blocked: bool, error: bool, retry_after: Optional[float]):
+        throttled = blocked or status_code in THROTTLE_STATUSES
+        failed = throttled or error or (status_code is not None and status_code >= 500)
+
+        if throttled:
+            self.stats['throttled'] += 1
+            # Multiplicative decrease
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+        elif not failed:
+            # Additive increase: back to full speed after ~10 clean requests per halving
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+        self.probe_in_flight = False
+        if failed:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: stay away for longer
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._trip(now)
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._trip(now)
+        else:
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+
+    def _trip(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.stats['trips'] += 1
+
+    def snapshot(self, now: float) -> Dict:
+        self._refill(now)
+        snapshot = dict(self.stats)
+        snapshot.update({
+            'state': self.state,
+            'rate': self.rate,
+            'base_rate': self.base_rate,
+            'tokens': self.tokens,
+            'next_wait_seconds': max(0.0, (1 - self.tokens) / self.rate, self.paused_until - now),
+            'reopens_in': max(0.0, self.cooldown - (now - self.opened_at)) if self.state == OPEN else 0.0,
+        })
+        return snapshot
+
+
+class RateLimiter:
+    """Per-domain limiters shared by every scraper in the process.
+
+    Requests per second come from the adapter spec's 'rate_limit' for known
+    stores and RATE_LIMIT_DEFAULT_RPS otherwise. Passing `rate` applies one
+    rate to every domain (e.g. for the offline fixture benchmark).
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate
+        self.default_rate = float(os.getenv("RATE_LIMIT_DEFAULT_RPS", "1.0"))
+        self.burst = float(os.getenv("RATE_LIMIT_BURST", "3"))
+        self.failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.cooldown = float(os.getenv("CIRCUIT_COOLDOWN", "60"))
+        self.max_cooldown = float(os.getenv("CIRCUIT_MAX_COOLDOWN", "900"))
+        self._lock = threading.Lock()
+        self._domains: Dict[str, DomainLimiter] = {}
+
+    def _limiter(self, domain: str) -> DomainLimiter:
+        limiter = self._domains.get(domain)
+        if limiter is None:
+            adapter = next((adapter for adapter in adapters.ADAPTERS if adapter.matches(domain)), None)
+            rate = self.rate or (adapter.rate_limit if adapter and adapter.rate_limit else self.default_rate)
+            limiter = DomainLimiter(rate, self.burst, self.failure_threshold, self.cooldown, self.max_cooldown)
+            self._domains[domain] = limiter
+        return limiter
+
+    def _reserve(self, url: str) -> Optional[float]:
+        with self._lock:
+            return self._limiter(url_domain(url)).reserve(time.monotonic())
+
+    def acquire(self, url: str) -> bool:
+        """Block until the domain allows a request; False if its circuit is open"""
+        wait = self._reserve(url)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, url: str) -> bool:
+        wait = self._reserve(url)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def record(
+        self,
+        url: str,
+        status_code: Optional[int] = None,
+        blocked: bool = False,
+        error: bool = False,
+        retry_after: Optional[str] = None,
+    ):
+        """Feed back the outcome of a request made after acquire()"""
+        try:
+            retry_seconds = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_seconds = None  # HTTP-date form; the rate cut still applies
+        with self._lock:
+            self._limiter(url_domain(url)).record(time.monotonic(), status_code, blocked, error, retry_seconds)
+
+    def is_open(self, url: str) -> bool:
+        """True while the domain's breaker rejects requests, so a check can be skipped up front"""
+        with self._lock:
+            limiter = self._domains.get(url_domain(url))
+            return limiter is not None and limiter.rejecting(time.monotonic())
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-domain rate, pending wait and breaker state"""
+        with self._lock:
+            now = time.monotonic()
+            return {domain: limiter.snapshot(now) for domain, limiter in self._domains.items()}
+
+
+# One limiter per process so every scraper shares each domain's budget
+rate_limiter = RateLimiter()
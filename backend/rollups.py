@@ -0,0 +1,188 @@
+"""Hourly and daily price rollups, and compaction of old raw history.
+
+Every PriceHistory insert is folded into an open/high/low/close/count row
+per product for its hour and its day (price_rollups), in the same
+transaction. Charts and analysis read the rollups, so their cost depends on
+the window asked for, not on how much history a product has.
+
+compact() then bounds the raw table: rows older than PRICE_HISTORY_RAW_DAYS,
+and all rows of products no longer tracked, are deleted once the rollups
+hold them. Each product keeps its newest raw row (check_frequency needs the
+time of the last change). With the archive enabled (history_archive), the
+deleted rows are first written to its monthly columnar files, so no raw
+point is lost. Hourly rollups older than PRICE_ROLLUP_HOURLY_DAYS are
+dropped as well; daily ones are kept.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import PriceHistory, PriceRollup, TrackedProduct
+import history_archive
+
+HOUR = 'hour'
+DAY = 'day'
+RESOLUTIONS = (HOUR, DAY)
+
+ROLLUP_FIELDS = ('open', 'high', 'low', 'close', 'count', 'first_at', 'last_at')
+
+RAW_RETENTION = timedelta(days=int(os.getenv("PRICE_HISTORY_RAW_DAYS", "90")))
+HOURLY_RETENTION = timedelta(days=int(os.getenv("PRICE_ROLLUP_HOURLY_DAYS", "365")))
+
+# With the archive enabled, cold rows are read, archived, deleted and
+# committed this many at a time, so memory stays flat however much history
+# is cold (e.g. years of it the first time the archive is switched on)
+ARCHIVE_BATCH = int(os.getenv("PRICE_ARCHIVE_BATCH_ROWS", "50000"))
+# Archived rows are deleted by id, this many per statement
+ARCHIVE_DELETE_BATCH = 500
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def merge_bucket(bucket: Dict, other: Dict):
+    """Fold the rollup `other` into `bucket`, whatever order their points arrived in"""
+    if not bucket.get('count'):
+        bucket.update({field: other[field] for field in ROLLUP_FIELDS})
+        return
+    if other['first_at'] < bucket['first_at']:
+        bucket['open'], bucket['first_at'] = other['open'], other['first_at']
+    if other['last_at'] >= bucket['last_at']:
+        bucket['close'], bucket['last_at'] = other['close'], other['last_at']
+    bucket['high'] = max(bucket['high'], other['high'])
+    bucket['low'] = min(bucket['low'], other['low'])
+    bucket['count'] += other['count']
+
+
+def merge_point(bucket: Dict, price: float, timestamp: datetime):
+    merge_bucket(bucket, {
+        'open': price, 'high': price, 'low': price, 'close': price,
+        'count': 1, 'first_at': timestamp, 'last_at': timestamp,
+    })
+
+
+def aggregate(points: Iterable[Tuple[int, float, datetime]]) -> Dict[Tuple[int, str, datetime], Dict]:
+    """Rollup dicts keyed by (product_id, resolution, bucket_start) for (product_id, price, timestamp) points"""
+    buckets: Dict[Tuple[int, str, datetime], Dict] = {}
+    for product_id, price, timestamp in points:
+        if price is None or timestamp is None:
+            continue
+        for resolution in RESOLUTIONS:
+            key = (product_id, resolution, bucket_start(timestamp, resolution))
+            bucket = buckets.setdefault(key, {'product_id': key[0], 'resolution': key[1], 'bucket_start': key[2]})
+            merge_point(bucket, price, timestamp)
+    return buckets
+
+
+def apply_prices(db: Session, rows: Iterable[Dict]):
+    """Fold new PriceHistory rows (dicts with product_id, price, timestamp) into the rollups; the caller commits.
+
+    Read-modify-write: a product's checks are serialized by the job queue,
+    so two writers never update the same product's buckets at once.
+    """
+    new = aggregate((row['product_id'], row['price'], row['timestamp']) for row in rows)
+    if not new:
+        return
+
+    # Plain rows, not entities: the bulk UPDATE below bypasses the identity map
+    columns = [PriceRollup.id, PriceRollup.product_id, PriceRollup.resolution, PriceRollup.bucket_start]
+    existing = {
+        (rollup.product_id, rollup.resolution, rollup.bucket_start): rollup
+        for rollup in db.execute(select(*columns, *[getattr(PriceRollup, field) for field in ROLLUP_FIELDS]).where(
+            PriceRollup.product_id.in_({key[0] for key in new}),
+            PriceRollup.bucket_start.in_({key[2] for key in new}),
+        ))
+    }
+    inserts: List[Dict] = []
+    updates: List[Dict] = []
+    for key, bucket in new.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            inserts.append(bucket)
+            continue
+        merged = {field: getattr(rollup, field) for field in ROLLUP_FIELDS}
+        merge_bucket(merged, bucket)
+        updates.append(dict(merged, id=rollup.id))
+
+    if inserts:
+        db.execute(insert(PriceRollup), inserts)
+    if updates:
+        db.execute(update(PriceRollup), updates)
+
+
+def add_price(db: Session, product_id: int, price: float, timestamp: Optional[datetime] = None) -> PriceHistory:
+    """Insert one PriceHistory row and fold it into the rollups; the caller commits"""
+    history = PriceHistory(product_id=product_id, price=price, timestamp=timestamp or datetime.utcnow())
+    db.add(history)
+    apply_prices(db, [{'product_id': product_id, 'price': price, 'timestamp': history.timestamp}])
+    return history
+
+
+def series(
+    db: Session,
+    product_id: int,
+    resolution: str = DAY,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[PriceRollup]:
+    """A product's rollups, newest bucket first"""
+    query = db.query(PriceRollup).filter(
+        PriceRollup.product_id == product_id,
+        PriceRollup.resolution == resolution,
+    )
+    if since is not None:
+        query = query.filter(PriceRollup.bucket_start >= bucket_start(since, resolution))
+    query = query.order_by(PriceRollup.bucket_start.desc())
+    return query.limit(limit).all() if limit else query.all()
+
+
+def _archive_and_delete(db: Session, expired, keep: Set[int]) -> int:
+    """Move `expired` raw rows, except the `keep` ids, to the archive in id-ordered batches; returns rows deleted.
+
+    Each batch is archived first and only deleted (and committed) once its
+    month files are written. Ids follow insertion order, so a batch mostly
+    falls in one or two months.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        rows = db.execute(select(
+            PriceHistory.id, PriceHistory.product_id, PriceHistory.timestamp, PriceHistory.price,
+        ).where(expired, PriceHistory.id > last_id).order_by(PriceHistory.id).limit(ARCHIVE_BATCH)).all()
+        if not rows:
+            return deleted
+        last_id = rows[-1].id
+        rows = [row for row in rows if row.id not in keep]
+        history_archive.archive_rows(rows)
+        ids = [row.id for row in rows]
+        for start in range(0, len(ids), ARCHIVE_DELETE_BATCH):
+            deleted += db.execute(delete(PriceHistory).where(
+                PriceHistory.id.in_(ids[start:start + ARCHIVE_DELETE_BATCH]),
+            ).execution_options(synchronize_session=False)).rowcount
+        db.commit()
+
+
+def compact(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete raw history and hourly rollups past retention; commits and returns rows deleted"""
+    now = now or datetime.utcnow()
+    newest_rows = select(func.max(PriceHistory.id)).group_by(PriceHistory.product_id)
+    untracked = select(TrackedProduct.id).where(TrackedProduct.is_active == False)
+    expired = (PriceHistory.timestamp < now - RAW_RETENTION) | PriceHistory.product_id.in_(untracked)
+    if history_archive.enabled():
+        raw = _archive_and_delete(db, expired, set(db.scalars(newest_rows)))
+    else:
+        raw = db.execute(delete(PriceHistory).where(
+            expired, PriceHistory.id.not_in(newest_rows),
+        ).execution_options(synchronize_session=False)).rowcount
+    hourly = db.execute(delete(PriceRollup).where(
+        PriceRollup.resolution == HOUR,
+        PriceRollup.bucket_start < now - HOURLY_RETENTION,
+    ).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return {'raw_rows': raw, 'hourly_rollups': hourly}
@@ -1,135 +1,172 @@
-import schedule
-import time
+import asyncio
+import os
 import threading
+import time
 from datetime import datetime
-from sqlalchemy.orm import Session
-from database import SessionLocal, TrackedProduct, PriceHistory, User
+from typing import Dict
+from sqlalchemy import or_
+from database import SessionLocal, TrackedProduct
 from enhanced_scraper import EnhancedScraper
+from async_engine import AsyncScrapeEngine
+from check_frequency import backfill_unscheduled
+from check_runs import open_run, finish_run
+from job_queue import JobQueue
+from leader_lease import LeaderLease
+from metrics import CHECK_CYCLE_SECONDS, DB_WRITE_SECONDS
+from pipeline import AlertNotifier
+from rollups import compact
+from price_workers import WorkerPool
+from timer_scheduler import TimerScheduler
 from agent import PriceTrackerAgent
 from email_service import EmailService
 
+# Products carry their own next_check_at, spread across their interval (see
+# check_frequency), so each tick only picks up the small slice that is due.
+# Shorter ticks give a flatter load.
+TICK_MINUTES = int(os.getenv("PRICE_CHECK_TICK_MINUTES", "5"))
+# How often raw price history past retention is compacted into the rollups
+COMPACTION_HOURS = float(os.getenv("HISTORY_COMPACTION_HOURS", "24"))
+
 class PriceScheduler:
     def __init__(self):
         self.scraper = EnhancedScraper()
+        self.engine = AsyncScrapeEngine(self.scraper)
+        self.job_queue = JobQueue()
+        self.worker_pool = WorkerPool(self, self.job_queue)
         self.agent = PriceTrackerAgent()
         self.email_service = EmailService()
+        # AI copy and SMTP run here, off the scrape/persist path
+        self.notifier = AlertNotifier(self.send_alert)
         self.is_running = False
+        # Only the lease holder runs scheduled checks, however many processes import this
+        self.lease = LeaderLease("price-scheduler")
+        self.timers = TimerScheduler()
+        self._loop = None
     
     def check_all_prices(self):
-        """Check prices for all active products"""
+        """Queue a check for every due product and drain the queue with the worker pool"""
+        if not self.lease.is_leader:
+            return
         print(f"[{datetime.now()}] Starting price check...")
         
+        started = time.monotonic()
         db = SessionLocal()
         try:
-            active_products = db.query(TrackedProduct).filter(
-                TrackedProduct.is_active == True
-            ).all()
-            
-            print(f"Found {len(active_products)} active products to check")
-            
-            for product in active_products:
-                try:
-                    self.check_single_product(db, product)
-                    time.sleep(2)  # Rate limiting
-                except Exception as e:
-                    print(f"Error checking product {product.id}: {e}")
-                    continue
+            now = datetime.utcnow()
+            backfill_unscheduled(db, now)
+            # A run left unfinished by a crash is resumed rather than started over
+            run = open_run(db)
+            done = set(self.job_queue.done_product_ids(run.id))
+            # Only products whose adaptive interval has elapsed (index on next_check_at)
+            product_ids = [product_id for (product_id,) in db.query(TrackedProduct.id).filter(
+                TrackedProduct.is_active == True,
+                or_(TrackedProduct.next_check_at == None, TrackedProduct.next_check_at <= now),
+            ) if product_id not in done]
             
+            with DB_WRITE_SECONDS.labels('enqueue').time():
+                queued = self.job_queue.enqueue(product_ids, run.id)
+            run.products_total = (run.products_total or 0) + queued
             db.commit()
-            print(f"[{datetime.now()}] Price check completed")
+            print(f"Run {run.id}: queued {queued} of {len(product_ids)} due products")
             
+            # Workers on other machines may drain the same queue concurrently
+            processed = self.worker_pool.drain()
+            finished = finish_run(db, run, self.job_queue)
+            print(
+                f"[{datetime.now()}] Price check run {run.id} {'completed' if finished else 'checkpointed'}: "
+                f"{processed} jobs processed here, {run.processed} in run, {run.changed} changed"
+            )
         except Exception as e:
             print(f"Error in price check: {e}")
             db.rollback()
+            return
         finally:
             db.close()
-    
-    def check_single_product(self, db: Session, product: TrackedProduct):
-        """Check price for a single product"""
-        print(f"Checking: {product.product_name}")
+            CHECK_CYCLE_SECONDS.observe(time.monotonic() - started)
         
-        # Scrape current price
-        current_data = self.scraper.scrape_product(product.product_url)
-        if not current_data or not current_data.get('price'):
-            print(f"Failed to scrape price for {product.product_name}")
+        print(f"Job queue stats: {self.job_queue.get_stats()}")
+        print(f"Browser pool stats: {self.scraper.driver_pool.get_stats()}")
+        print(f"Scrape tier stats: {self.scraper.get_tier_stats()}")
+        print(f"Scrape coalescing stats: {self.scraper.singleflight.get_stats()}")
+        print(f"Fetch cache stats: {self.scraper.fetch_cache.get_stats()}")
+        print(f"Rate limiter stats: {self.scraper.rate_limiter.get_stats()}")
+        print(f"Alert notifier stats: {self.notifier.get_stats()}")
+    
+    def compact_history(self):
+        """Drop raw history and hourly rollups past retention (see rollups)"""
+        if not self.lease.is_leader:
             return
-        
-        new_price = current_data['price']
-        old_price = product.current_price
-        
-        # Check if price changed significantly (>1% change)
-        if abs(new_price - old_price) / old_price > 0.01:
-            print(f"Price changed: {old_price} -> {new_price}")
-            
-            # Update product price
-            product.current_price = new_price
-            
-            # Add to price history
-            price_history = PriceHistory(
-                product_id=product.id,
-                price=new_price
-            )
-            db.add(price_history)
-            
-            # Send email alert
-            user = db.query(User).filter(User.id == product.user_id).first()
-            if user:
-                self.send_price_alert(user, product, old_price, new_price)
+        db = SessionLocal()
+        try:
+            print(f"History compaction: {compact(db)}")
+        except Exception as e:
+            print(f"Error compacting price history: {e}")
+            db.rollback()
+        finally:
+            db.close()
     
-    def send_price_alert(self, user: User, product: TrackedProduct, old_price: float, new_price: float):
-        """Send price alert email"""
+    def send_alert(self, alert: Dict):
+        """Write the alert copy and email it"""
+        product_data = alert['product']
         try:
             alert_content = self.agent.generate_price_alert_content(
-                product.product_name, old_price, new_price, product.product_url
+                product_data['name'], product_data['old_price'], product_data['new_price'], product_data['url']
             )
             
-            product_data = {
-                'name': product.product_name,
-                'old_price': old_price,
-                'new_price': new_price,
-                'platform': product.platform,
-                'url': product.product_url
-            }
-            
-            success = self.email_service.send_price_alert(user.email, product_data, alert_content)
+            success = self.email_service.send_price_alert(alert['email'], product_data, alert_content)
             if success:
-                print(f"Email sent to {user.email}")
+                print(f"Email sent to {alert['email']}")
             else:
-                print(f"Failed to send email to {user.email}")
+                print(f"Failed to send email to {alert['email']}")
                 
         except Exception as e:
             print(f"Error sending email: {e}")
     
-    def start_scheduler(self):
-        """Start the price checking scheduler"""
+    async def start(self):
+        """Start the lease heartbeat and the timer loop on the running event loop (FastAPI lifespan)"""
         if self.is_running:
             return
-        
         self.is_running = True
-        print("Starting price scheduler...")
-        
-        # Schedule price checks every 6 hours
-        schedule.every(6).hours.do(self.check_all_prices)
-        
-        # Run initial check after 1 minute
-        schedule.every(1).minutes.do(self.check_all_prices).tag('initial')
-        
-        def run_scheduler():
-            while self.is_running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-        
-        # Start scheduler in background thread
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        scheduler_thread.start()
-        
+        self.worker_pool.resume()
+        self.lease.start()
+        # Pick up due products every few minutes. No separate start-up run:
+        # unscheduled products are spread over their first interval instead
+        self.timers.add_job("price-check", self.check_all_prices, TICK_MINUTES * 60)
+        self.timers.add_job("history-compaction", self.compact_history, COMPACTION_HOURS * 3600)
+        self.timers.start()
         print("Price scheduler started successfully")
     
-    def stop_scheduler(self):
-        """Stop the scheduler"""
+    async def shutdown(self):
+        """Stop claiming new jobs, let in-flight checks finish, release resources, then hand the lease over"""
+        if not self.is_running:
+            return
         self.is_running = False
-        schedule.clear()
+        self.worker_pool.stop()
+        await self.timers.shutdown()
+        await asyncio.to_thread(self.engine.close, self.timers.shutdown_timeout)
+        # Flush alerts for changes that were already committed
+        await asyncio.to_thread(self.notifier.close, self.timers.shutdown_timeout)
+        # Quit pooled Chrome and chromedriver processes so a restart doesn't orphan them
+        await asyncio.to_thread(self.scraper.driver_pool.close)
+        self.lease.release()
         print("Price scheduler stopped")
+    
+    def start_scheduler(self):
+        """Run the scheduler outside FastAPI, on its own event loop thread"""
+        if self.is_running:
+            return
+        print("Starting price scheduler...")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="price-scheduler", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.start(), self._loop).result()
+    
+    def stop_scheduler(self):
+        """Stop a scheduler started with start_scheduler"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
 
 # Global scheduler instance
 price_scheduler = PriceScheduler()
\ No newline at end of file
@@ -5,9 +5,9 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import re
 import time
 from typing import Dict, Optional
+import price_extraction
 
 class ProductScraper:
     def __init__(self):
@@ -23,23 +23,7 @@ class ProductScraper:
         return webdriver.Chrome(options=options)
     
     def extract_price(self, text: str) -> Optional[float]:
-        # Multiple price patterns
-        patterns = [
-            r'₹[\s]*([\d,]+(?:\.\d{2})?)',
-            r'Rs[\s]*([\d,]+(?:\.\d{2})?)',
-            r'MRP[\s]*₹[\s]*([\d,]+(?:\.\d{2})?)',
-            r'Price[\s]*₹[\s]*([\d,]+(?:\.\d{2})?)',
-            r'([\d,]+(?:\.\d{2})?)[\s]*₹'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text.replace(',', ''))
-            if matches:
-                try:
-                    return float(matches[0])
-                except ValueError:
-                    continue
-        return None
+        return price_extraction.extract_price(text)
     
     def scrape_amazon(self, url: str) -> Dict:
         try:
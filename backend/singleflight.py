@@ -0,0 +1,129 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+AMAZON_ASIN_RE = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})', re.IGNORECASE)
+TRACKING_PARAMS = {'ref', 'ref_', 'tag', 'th', 'psc', 'smid', 'srsltid', 'affid', 'affextparam', 'lid', 'marketplace', 'store'}
+
+
+def canonical_url(url: str) -> str:
+    """Normalise a product URL so every link to the same listing maps to one key"""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    if 'amazon' in host:
+        asin = AMAZON_ASIN_RE.search(parsed.path)
+        if asin:
+            return f"https://{host}/dp/{asin.group(1).upper()}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=False)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    if 'flipkart' in host:
+        # The pid picks the variant; everything else on a Flipkart link is tracking
+        query = [(key, value) for key, value in query if key == 'pid']
+
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(('https', host, path, '', urlencode(sorted(query)), ''))
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight fetch.
+
+    Callers that arrive while a fetch is running wait for its result instead of
+    starting their own; a successful result is then served to back-to-back
+    callers for `ttl` seconds. Works for both threads and asyncio tasks, which
+    share the same in-flight table.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("SCRAPE_RESULT_TTL", "300"))
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._results: Dict[str, Tuple[float, Dict]] = {}
+        self.stats = {'fetches': 0, 'coalesced': 0, 'cache_hits': 0}
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._results[key]
+            return None
+        return result
+
+    def _claim(self, key: str) -> Tuple[str, object]:
+        """Return ('cached', result), ('wait', future) or ('lead', future) for the caller"""
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return 'cached', cached
+            if key in self._inflight:
+                self.stats['coalesced'] += 1
+                return 'wait', self._inflight[key]
+            future = Future()
+            self._inflight[key] = future
+            self.stats['fetches'] += 1
+            return 'lead', future
+
+    def _finish(self, key: str, future: Future, result: Optional[Dict] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None and result and self.ttl > 0:
+                self._results[key] = (time.monotonic() + self.ttl, result)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _copy(result: Optional[Dict]) -> Optional[Dict]:
+        # Each caller gets its own dict so one can't mutate another's result
+        return dict(result) if result else result
+
+    def do(self, key: str, fn: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        role, value = self._claim(key)
+        if role == 'cached':
+            return self._copy(value)
+        if role == 'wait':
+            return self._copy(value.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, value, error=e)
+            raise
+        self._finish(key, value, result=result)
+        return self._copy(result)
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        role, value = self._claim(key)
+        if role == 'cached':
+            return self._copy(value)
+        if role == 'wait':
+            return self._copy(await asyncio.wrap_future(value))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, value, error=e)
+            raise
+        self._finish(key, value, result=result)
+        return self._copy(result)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['inflight'] = len(self._inflight)
+            stats['cached'] = len(self._results)
+        return stats
@@ -0,0 +1,240 @@
+import html as html_lib
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+# <script type="application/ld+json"> ... </script>
+JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# State blobs that single-page storefronts embed for hydration, e.g.
+#   window.__INITIAL_STATE__ = {...};   (Flipkart)
+#   window.__myx = {...}                (Myntra)
+EMBEDDED_STATE_RE = re.compile(
+    r'window\.(__INITIAL_STATE__|__PRELOADED_STATE__|__myx|__NEXT_DATA__)\s*=\s*',
+)
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+META_RE = re.compile(
+    r'<meta\s+[^>]*(?:property|name|itemprop)=["\']([^"\']+)["\'][^>]*content=["\']([^"\']*)["\']',
+    re.IGNORECASE,
+)
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# Keys that hold a selling price in embedded state blobs, most specific first.
+# Not 'mrp': that is the list price, and falling back to it reports false rises.
+PRICE_KEYS = ('finalPrice', 'sellingPrice', 'discountedPrice', 'discounted', 'priceAmount', 'price')
+NAME_KEYS = ('name', 'title', 'productName')
+IMAGE_KEYS = ('image', 'imageUrl', 'image_url', 'src')
+
+# First number in a price string; the dot in "Rs." must not be taken for a decimal point
+NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if isinstance(value, str):
+        match = NUMBER_RE.search(value.replace(',', ''))
+        if not match:
+            return None
+        price = float(match.group())
+        return price if price > 0 else None
+    if isinstance(value, dict):
+        # e.g. {"value": 1299, "currency": "INR"} or Myntra's {"mrp": 999, "discounted": 599}
+        for key in ('value', 'amount') + PRICE_KEYS:
+            if key in value:
+                return _to_float(value[key])
+    return None
+
+
+def _balanced_json(text: str, start: int) -> Optional[str]:
+    """Return the JSON object/array starting at `start`, matching braces outside strings"""
+    if start >= len(text) or text[start] not in '{[':
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return None
+
+
+def extract_json_ld(html: str) -> List[Dict]:
+    """All JSON-LD objects on the page, with @graph and list wrappers flattened"""
+    objects = []
+    for match in JSON_LD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        for item in stack:
+            if not isinstance(item, dict):
+                continue
+            if '@graph' in item and isinstance(item['@graph'], list):
+                objects.extend(obj for obj in item['@graph'] if isinstance(obj, dict))
+            else:
+                objects.append(item)
+    return objects
+
+
+def extract_embedded_state(html: str) -> List[Any]:
+    """Parsed hydration state blobs (window.__INITIAL_STATE__ and friends)"""
+    blobs = []
+    for match in EMBEDDED_STATE_RE.finditer(html):
+        raw = _balanced_json(html, match.end())
+        if not raw:
+            continue
+        try:
+            blobs.append(json.loads(raw))
+        except ValueError:
+            continue
+    for match in NEXT_DATA_RE.finditer(html):
+        try:
+            blobs.append(json.loads(match.group(1)))
+        except ValueError:
+            continue
+    return blobs
+
+
+def extract_meta(html: str) -> Dict[str, str]:
+    """OpenGraph / product meta tags keyed by property name"""
+    return {key.lower(): html_lib.unescape(value) for key, value in META_RE.findall(html)}
+
+
+def _is_product(obj: Dict) -> bool:
+    kind = obj.get('@type')
+    if isinstance(kind, list):
+        return 'Product' in kind
+    return kind == 'Product'
+
+
+def _offer_price(offers: Any) -> Optional[float]:
+    if isinstance(offers, list):
+        prices = [p for p in (_offer_price(offer) for offer in offers) if p]
+        return min(prices) if prices else None
+    if isinstance(offers, dict):
+        for key in ('price', 'lowPrice'):
+            if key in offers:
+                price = _to_float(offers[key])
+                if price:
+                    return price
+        if 'priceSpecification' in offers:
+            return _offer_price(offers['priceSpecification'])
+    return None
+
+
+def _first_image(image: Any) -> str:
+    if isinstance(image, list):
+        return _first_image(image[0]) if image else ''
+    if isinstance(image, dict):
+        return image.get('url') or image.get('contentUrl') or ''
+    return image if isinstance(image, str) else ''
+
+
+def product_from_json_ld(objects: List[Dict]) -> Dict:
+    for obj in objects:
+        if not _is_product(obj):
+            continue
+        price = _offer_price(obj.get('offers'))
+        if price:
+            return {
+                'name': (obj.get('name') or '').strip(),
+                'price': price,
+                'image_url': _first_image(obj.get('image')),
+            }
+    return {}
+
+
+def _walk(obj: Any, depth: int = 0) -> Iterator[Dict]:
+    """Depth-first walk over every dict inside a parsed JSON blob"""
+    if depth > 40:
+        return
+    if isinstance(obj, dict):
+        yield obj
+        for value in obj.values():
+            yield from _walk(value, depth + 1)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from _walk(value, depth + 1)
+
+
+def product_from_state(blob: Any) -> Dict:
+    """Find the first dict that carries both a product name and a selling price"""
+    for node in _walk(blob):
+        price = None
+        for key in PRICE_KEYS:
+            if key in node:
+                price = _to_float(node[key])
+                if price:
+                    break
+        if not price:
+            continue
+        name = next((node[key] for key in NAME_KEYS if isinstance(node.get(key), str) and node[key].strip()), '')
+        if not name:
+            continue
+        image = next((_first_image(node[key]) for key in IMAGE_KEYS if node.get(key)), '')
+        return {'name': name.strip(), 'price': price, 'image_url': image}
+    return {}
+
+
+def product_from_meta(meta: Dict[str, str], html: str, title_fallback: bool = True) -> Dict:
+    price = _to_float(meta.get('product:price:amount') or meta.get('og:price:amount') or meta.get('price'))
+    name = meta.get('og:title', '')
+    if not name and title_fallback:
+        title = TITLE_RE.search(html)
+        name = html_lib.unescape(title.group(1).strip()) if title else ''
+    return {
+        'name': name,
+        'price': price or 0.0,
+        'image_url': meta.get('og:image', ''),
+    }
+
+
+def extract_product(html: str, title_fallback: bool = True) -> Dict:
+    """Best-effort name/price/image from structured data, without rendering the page.
+
+    Sources are tried from most to least reliable: JSON-LD Product offers,
+    embedded hydration state, then OpenGraph/product meta tags. Missing fields
+    from a stronger source are filled from weaker ones. The <title> is the
+    last resort for the name; callers with better selectors can turn it off.
+    """
+    result = product_from_json_ld(extract_json_ld(html))
+
+    if not result.get('price'):
+        for blob in extract_embedded_state(html):
+            state_result = product_from_state(blob)
+            if state_result:
+                result = {**state_result, **{k: v for k, v in result.items() if v}}
+                break
+
+    meta_result = product_from_meta(extract_meta(html), html, title_fallback)
+    for key, value in meta_result.items():
+        if value and not result.get(key):
+            result[key] = value
+
+    return result
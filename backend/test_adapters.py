@@ -0,0 +1,30 @@
+"""Field resolution in platform adapters: declared selector order decides"""
+import adapters
+
+AMAZON = adapters.get_adapter('Amazon')
+PRECISE = '.a-price.priceToPay .a-price-whole'
+BROAD = '.a-price .a-offscreen'
+
+
+def test_declared_selector_wins_over_a_higher_hit_rate():
+    stats = adapters.SelectorStats()
+    # The broad fallback has matched every page so far, the precise one rarely
+    for _ in range(50):
+        AMAZON.resolve({'price': {BROAD: {'text': '₹1,999'}}}, stats)
+
+    # Both match: the broad one found the struck-through MRP
+    resolved = AMAZON.resolve({'price': {PRECISE: {'text': '1,299'}, BROAD: {'text': '₹1,999'}}}, stats)
+
+    assert resolved['price'] == 1299.0
+
+
+def test_falls_back_in_declared_order_and_records_every_selector():
+    stats = adapters.SelectorStats()
+
+    resolved = AMAZON.resolve({'price': {BROAD: {'text': '₹1,999'}}, 'name': {'#productTitle': {'text': ' Kettle '}}}, stats)
+
+    assert resolved == {'price': 1999.0, 'name': 'Kettle'}
+    report = stats.get_stats()
+    assert (report[f"Amazon/browser.price {PRECISE}"]['hits'], report[f"Amazon/browser.price {PRECISE}"]['attempts']) == (0, 1)
+    assert report[f"Amazon/browser.price {BROAD}"]['hits'] == 1
+    assert len([key for key in report if key.startswith("Amazon/browser.price ")]) == len(AMAZON.fields['price']['selectors'])
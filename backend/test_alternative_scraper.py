@@ -0,0 +1,43 @@
+import pytest
+
+import html_parser
+from alternative_scraper import AlternativeScraper
+
+# Flipkart serves result cards with several classes on the card div
+FLIPKART_CARDS = """
+<html><body><div id="container">
+  <div class="_1AtVbE col-12-12"><div class="_13oc-S">
+    <a class="_1fQZEK" href="/bru-instant-coffee/p/itm01">
+      <img class="_396cs4" src="https://img.example/01.jpeg"/>
+      <div class="_4rR01T">BRU Instant Coffee (200 g)</div>
+      <div class="_30jeq3 _1_WHN1">₹455</div>
+    </a>
+  </div></div>
+  <div class="col-12-12 _1AtVbE"><div class="_13oc-S">
+    <a class="_1fQZEK" href="/davidoff-rich-aroma/p/itm02">
+      <div class="_4rR01T">Davidoff Rich Aroma Instant Coffee (100 g)</div>
+      <div class="_30jeq3">₹1,170</div>
+    </a>
+  </div></div>
+  <div class="_1AtVbEx col-12-12"><div class="_4rR01T">Not a card</div><div class="_30jeq3">₹1</div></div>
+</div></body></html>
+"""
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.setenv("FETCH_CACHE_PATH", str(tmp_path / "fetch_cache.db"))
+    return AlternativeScraper()
+
+
+@pytest.mark.parametrize("features", ["lxml", "html.parser"])
+def test_flipkart_results_with_multi_class_cards(scraper, monkeypatch, features):
+    monkeypatch.setattr(html_parser, "soup_features", lambda: features)
+
+    results = scraper.parse_flipkart_results(FLIPKART_CARDS.encode("utf-8"), limit=5)
+
+    assert [(result['name'], result['price'], result['url']) for result in results] == [
+        ("BRU Instant Coffee (200 g)", 455.0, "https://flipkart.com/bru-instant-coffee/p/itm01"),
+        ("Davidoff Rich Aroma Instant Coffee (100 g)", 1170.0, "https://flipkart.com/davidoff-rich-aroma/p/itm02"),
+    ]
+    assert results[0]['image_url'] == "https://img.example/01.jpeg"
@@ -0,0 +1,101 @@
+"""Failure backoff and quarantine of products whose scrapes keep failing"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import check_frequency
+from check_frequency import (
+    FAILURE_BACKOFF_BASE, MAX_JITTER, QUARANTINE_AFTER, QUARANTINE_RETRY,
+    STATUS_FAILING, STATUS_OK, STATUS_QUARANTINED,
+    apply_next_check, bounds_for, failure_retry_interval, record_scrape_failure, record_scrape_success,
+)
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def make_product(**columns):
+    defaults = dict(
+        id=1, platform='Amazon', scrape_status=STATUS_OK, consecutive_failures=0, last_error=None,
+        last_success_at=None, last_failure_at=None, check_interval=None, next_check_at=None,
+    )
+    return SimpleNamespace(**dict(defaults, **columns))
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(check_frequency.random, "uniform", lambda low, high: 0.0)
+
+
+def test_backoff_doubles_per_failure_up_to_platform_ceiling():
+    _, ceiling = bounds_for('Amazon')
+    intervals = [failure_retry_interval(failures, 'Amazon') for failures in range(1, QUARANTINE_AFTER)]
+
+    assert intervals[0] == FAILURE_BACKOFF_BASE
+    for earlier, later in zip(intervals, intervals[1:]):
+        assert later == min(earlier * 2, ceiling)
+
+
+def test_backoff_capped_at_ceiling(monkeypatch):
+    monkeypatch.setenv("CHECK_INTERVAL_MAX_AMAZON", str(FAILURE_BACKOFF_BASE * 5))
+    assert failure_retry_interval(QUARANTINE_AFTER - 1, 'Amazon') == FAILURE_BACKOFF_BASE * 5
+
+
+def test_failed_scrape_is_retried_after_backoff_not_its_slot():
+    product = make_product()
+
+    record_scrape_failure(product, "scrape failed", NOW)
+    apply_next_check(product, [], NOW)
+
+    assert product.scrape_status == STATUS_FAILING
+    assert product.consecutive_failures == 1
+    assert product.last_failure_at == NOW
+    assert product.next_check_at == NOW + timedelta(seconds=FAILURE_BACKOFF_BASE)
+
+
+def test_quarantined_after_consecutive_failures():
+    product = make_product()
+
+    for attempt in range(QUARANTINE_AFTER - 1):
+        record_scrape_failure(product, "no price found", NOW)
+        assert product.scrape_status == STATUS_FAILING
+    record_scrape_failure(product, "no price found", NOW)
+
+    assert product.scrape_status == STATUS_QUARANTINED
+    assert product.consecutive_failures == QUARANTINE_AFTER
+    assert product.last_error == "no price found"
+
+
+def test_quarantined_product_retried_weekly():
+    product = make_product(scrape_status=STATUS_QUARANTINED, consecutive_failures=QUARANTINE_AFTER + 3)
+
+    record_scrape_failure(product, "scrape failed", NOW)
+    apply_next_check(product, [], NOW)
+
+    assert QUARANTINE_RETRY == 7 * 24 * 3600
+    assert product.scrape_status == STATUS_QUARANTINED
+    assert product.next_check_at == NOW + timedelta(seconds=QUARANTINE_RETRY)
+
+
+def test_quarantine_retry_jitter_is_bounded(monkeypatch):
+    monkeypatch.setattr(check_frequency.random, "uniform", lambda low, high: high)
+    product = make_product(consecutive_failures=QUARANTINE_AFTER)
+
+    apply_next_check(product, [], NOW)
+
+    assert product.next_check_at == NOW + timedelta(seconds=QUARANTINE_RETRY + MAX_JITTER)
+
+
+def test_success_lifts_quarantine_and_returns_to_normal_schedule():
+    product = make_product(scrape_status=STATUS_QUARANTINED, consecutive_failures=QUARANTINE_AFTER,
+                           last_error="scrape failed")
+
+    record_scrape_success(product, NOW)
+    apply_next_check(product, [], NOW)
+
+    assert product.scrape_status == STATUS_OK
+    assert product.consecutive_failures == 0
+    assert product.last_error is None
+    floor, ceiling = bounds_for('Amazon')
+    assert floor <= product.check_interval <= ceiling
+    assert product.next_check_at < NOW + timedelta(seconds=QUARANTINE_RETRY)
@@ -0,0 +1,73 @@
+"""Checkpointed check runs: resume after a crash, close once the snapshot is drained"""
+import pytest
+
+from check_runs import finish_run, open_run, record_progress
+from database import PriceCheckRun
+from job_queue import JobQueue, PENDING, RETRYING
+
+
+@pytest.fixture
+def queue(db):
+    return JobQueue(retry_delay=600)
+
+
+def claim_all(queue, worker_id="worker-1"):
+    return {job['product_id']: job for job in queue.claim(worker_id, limit=100)}
+
+
+def test_interrupted_run_is_resumed(db):
+    run = open_run(db)
+
+    assert open_run(db).id == run.id
+
+
+def test_progress_checkpoints_accumulate(db):
+    run = open_run(db)
+
+    record_progress(db, {run.id: {'processed': 3, 'changed': 1}, None: {'processed': 5}})
+    record_progress(db, {run.id: {'processed': 2, 'changed': 0}})
+    db.commit()
+    db.refresh(run)
+
+    assert (run.processed, run.changed) == (5, 1)
+
+
+def test_run_stays_open_while_jobs_are_ready(db, queue):
+    run = open_run(db)
+    queue.enqueue([1, 2], run.id)
+    jobs = claim_all(queue)
+    queue.complete_many(db, [jobs[1]['id']], "worker-1")
+    db.commit()
+
+    # Product 2 is still leased (or held by another host)
+    assert not finish_run(db, run, queue)
+    assert open_run(db).id == run.id
+
+
+def test_retrying_jobs_do_not_hold_the_run_open(db, queue):
+    run = open_run(db)
+    queue.enqueue([1, 2], run.id)
+    jobs = claim_all(queue)
+    queue.complete_many(db, [jobs[1]['id']], "worker-1")
+    db.commit()
+    queue.fail(jobs[2]['id'], "worker-1", "scrape failed")
+
+    assert queue.run_counts(run.id) == {'done': 1, RETRYING: 1}
+    assert finish_run(db, run, queue)
+    assert (run.status, run.failed) == ('completed', 1)
+
+
+def test_products_done_in_a_closed_run_are_checked_again(db, queue):
+    first = open_run(db)
+    queue.enqueue([1], first.id)
+    queue.complete_many(db, [job['id'] for job in queue.claim("worker-1", limit=10)], "worker-1")
+    db.commit()
+    assert finish_run(db, first, queue)
+
+    second = open_run(db)
+
+    assert second.id != first.id
+    assert queue.done_product_ids(second.id) == []
+    assert queue.enqueue([1], second.id) == 1
+    assert queue.run_counts(second.id) == {PENDING: 1}
+    assert db.query(PriceCheckRun).filter(PriceCheckRun.status == 'running').count() == 1
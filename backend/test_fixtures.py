@@ -0,0 +1,41 @@
+"""Scrapers against the recorded pages in fixtures/, served by bench_scrapers' local stand-in"""
+import os
+
+import pytest
+
+import bench_scrapers
+
+EXPECTED = bench_scrapers.load_expected()
+ADAPTERS = [entry['adapter'] for entry in EXPECTED['products'] + EXPECTED['searches']]
+
+
+@pytest.fixture(scope="module")
+def cases(tmp_path_factory):
+    saved_environ = dict(os.environ)
+    server = bench_scrapers.start_stand_in(EXPECTED)
+    try:
+        bench_scrapers.configure_environment(
+            f"http://127.0.0.1:{server.server_address[1]}", str(tmp_path_factory.mktemp("fetch_cache"))
+        )
+        scraper, alternative_scraper = bench_scrapers.build_scrapers()
+        yield {case[0]: case for case in bench_scrapers.build_cases(EXPECTED, scraper, alternative_scraper)}
+    finally:
+        server.shutdown()
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_cold_scrape(cases, adapter):
+    _, scrape, check, cache = cases[adapter]
+    cache.clear()
+    assert check(scrape()) == []
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_revalidated_scrape(cases, adapter):
+    # Second scrape sends a conditional GET, answered with 304, and reuses the cached result
+    _, scrape, check, cache = cases[adapter]
+    cache.clear()
+    scrape()
+    assert check(scrape()) == []
@@ -0,0 +1,95 @@
+"""Arrow archive of compacted raw history: nothing is lost on the way out of the database"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import history_archive
+import rollups
+from database import PriceHistory, TrackedProduct
+
+NOW = datetime(2026, 6, 15, 12, 0)
+# Three months of points, all past raw retention
+START = NOW - rollups.RAW_RETENTION - timedelta(days=80)
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_archive, "ARCHIVE_DIR", str(tmp_path / "price_archive"))
+    monkeypatch.setattr(history_archive, "ARCHIVE_ENABLED", True)
+    # Several batches even for a handful of rows
+    monkeypatch.setattr(rollups, "ARCHIVE_BATCH", 4)
+    return tmp_path / "price_archive"
+
+
+@pytest.fixture
+def products(db):
+    products = [
+        TrackedProduct(user_id=1, product_name=name, product_url=f"https://example.com/{name}",
+                       current_price=100.0, original_price=100.0, platform='Other')
+        for name in ("kettle", "toaster")
+    ]
+    db.add_all(products)
+    db.commit()
+    # Interleaved inserts, as from real check cycles
+    for day in range(0, 80, 8):
+        for offset, product in enumerate(products):
+            rollups.add_price(db, product.id, 100.0 + day + offset, START + timedelta(days=day, hours=offset))
+    db.commit()
+    return products
+
+
+def test_archive_then_delete_round_trips_through_full_history(db, products):
+    before = {product.id: history_archive.full_history(db, product.id) for product in products}
+
+    result = rollups.compact(db, NOW)
+
+    assert result['raw_rows'] == 18
+    # Only each product's newest row stays in the database
+    assert db.query(PriceHistory).count() == 2
+    assert len(history_archive.archived_months()) >= 3
+    for product in products:
+        assert history_archive.full_history(db, product.id) == before[product.id]
+
+
+def test_full_history_filters_by_time_across_archive_and_database(db, products):
+    rollups.compact(db, NOW)
+    start, end = START + timedelta(days=20), START + timedelta(days=60)
+
+    points = history_archive.full_history(db, products[0].id, start=start, end=end)
+
+    assert [point['timestamp'] for point in points] == [START + timedelta(days=day) for day in range(24, 60, 8)]
+
+
+def test_rearchiving_rows_does_not_duplicate_them(db, products):
+    rows = db.query(PriceHistory.id, PriceHistory.product_id, PriceHistory.timestamp, PriceHistory.price).all()
+
+    assert history_archive.archive_rows(rows) == len(rows)
+    # A run that died after writing the files but before deleting the rows
+    assert history_archive.archive_rows(rows) == 0
+    assert history_archive.load_table().num_rows == len(rows)
+
+
+def test_failed_archive_write_keeps_rows_in_the_database(db, products, monkeypatch):
+    before = history_archive.full_history(db, products[1].id)
+    write_month = history_archive._write_month
+    last_month = (START + timedelta(days=72)).strftime("%Y-%m")
+    in_last_month = PriceHistory.timestamp >= datetime.strptime(last_month, "%Y-%m")
+    last_month_rows = db.query(PriceHistory).filter(in_last_month).count()
+
+    def failing_write(month, table):
+        if month == last_month:
+            raise OSError("disk full")
+        write_month(month, table)
+
+    monkeypatch.setattr(history_archive, "_write_month", failing_write)
+
+    with pytest.raises(OSError):
+        rollups.compact(db, NOW)
+    db.rollback()
+
+    # Earlier batches are archived and deleted; the failed one stays in the database
+    assert db.query(PriceHistory).count() < 20
+    assert db.query(PriceHistory).filter(in_last_month).count() == last_month_rows
+    assert history_archive.full_history(db, products[1].id) == before
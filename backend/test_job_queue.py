@@ -0,0 +1,158 @@
+"""Durable job queue: exclusive claims, lease expiry, retry backoff and acks"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import PriceCheckJob
+from job_queue import JobQueue, DONE, FAILED, PENDING, RUNNING
+
+
+@pytest.fixture
+def queue(db):
+    return JobQueue(visibility_timeout=300, max_attempts=3, retry_delay=60)
+
+
+def job_row(db, job_id):
+    db.expire_all()
+    return db.query(PriceCheckJob).filter(PriceCheckJob.id == job_id).one()
+
+
+def expire_lease(db, job_id):
+    db.query(PriceCheckJob).filter(PriceCheckJob.id == job_id).update(
+        {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def make_visible(db, job_id):
+    db.query(PriceCheckJob).filter(PriceCheckJob.id == job_id).update(
+        {'visible_at': datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_enqueue_skips_products_already_queued(queue):
+    assert queue.enqueue([1, 2, 2]) == 2
+    assert queue.enqueue([2, 3]) == 1
+    assert queue.get_stats()['depth'] == 3
+
+
+def test_leased_job_is_not_claimed_again(queue):
+    queue.enqueue([1])
+
+    first = queue.claim("worker-1", limit=5)
+
+    assert [job['product_id'] for job in first] == [1]
+    assert first[0]['attempts'] == 1
+    assert queue.claim("worker-2", limit=5) == []
+
+
+def test_concurrent_claimers_never_share_a_job(queue):
+    queue.enqueue(range(1, 201))
+    claimed = {}
+    lock = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(index):
+        worker_id = f"worker-{index}"
+        start.wait()
+        while True:
+            jobs = queue.claim(worker_id, limit=5)
+            if not jobs:
+                return
+            with lock:
+                for job in jobs:
+                    claimed.setdefault(job['id'], []).append(worker_id)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(claimed) == 200
+    assert all(len(holders) == 1 for holders in claimed.values())
+
+
+def test_expired_lease_is_reclaimable(db, queue):
+    queue.enqueue([1])
+    [job] = queue.claim("worker-1")
+    expire_lease(db, job['id'])
+
+    [reclaimed] = queue.claim("worker-2")
+
+    assert reclaimed['id'] == job['id']
+    assert reclaimed['attempts'] == 2
+    assert job_row(db, job['id']).claimed_by == "worker-2"
+
+
+def test_complete_many_only_acks_own_leases(db, queue):
+    queue.enqueue([1, 2])
+    jobs = {job['product_id']: job for job in queue.claim("worker-1", limit=2)}
+    expire_lease(db, jobs[2]['id'])
+    [stolen] = queue.claim("worker-2")
+
+    # Worker 1's lease on product 2 expired and moved to worker 2
+    assert queue.complete_many(db, [jobs[1]['id'], jobs[2]['id']], "worker-1") == 1
+    db.commit()
+
+    assert job_row(db, jobs[1]['id']).status == DONE
+    assert job_row(db, stolen['id']).status == RUNNING
+    assert queue.complete_many(db, [stolen['id']], "worker-2") == 1
+    db.commit()
+    assert job_row(db, stolen['id']).status == DONE
+
+
+def test_complete_many_rolls_back_with_the_callers_transaction(db, queue):
+    queue.enqueue([1])
+    [job] = queue.claim("worker-1")
+
+    queue.complete_many(db, [job['id']], "worker-1")
+    db.rollback()
+
+    assert job_row(db, job['id']).status == RUNNING
+
+
+def test_fail_backs_off_exponentially_then_gives_up(db, queue):
+    queue.enqueue([1])
+
+    for attempt in range(1, queue.max_attempts):
+        [job] = queue.claim("worker-1")
+        assert job['attempts'] == attempt
+        before = datetime.utcnow()
+        assert queue.fail(job['id'], "worker-1", "scrape failed")
+
+        row = job_row(db, job['id'])
+        delay = queue.retry_delay * 2 ** (attempt - 1)
+        assert row.status == PENDING
+        assert before + timedelta(seconds=delay - 1) <= row.visible_at <= datetime.utcnow() + timedelta(seconds=delay)
+        # Not claimable until the backoff has passed
+        assert queue.claim("worker-1") == []
+        make_visible(db, job['id'])
+
+    [job] = queue.claim("worker-1")
+    assert queue.fail(job['id'], "worker-1", "scrape failed")
+
+    row = job_row(db, job['id'])
+    assert (row.status, row.attempts, row.last_error) == (FAILED, queue.max_attempts, "scrape failed")
+    assert queue.claim("worker-1") == []
+
+
+def test_fail_ignores_jobs_leased_to_another_worker(db, queue):
+    queue.enqueue([1])
+    [job] = queue.claim("worker-1")
+
+    assert not queue.fail(job['id'], "worker-2", "not mine")
+    assert job_row(db, job['id']).status == RUNNING
+
+
+def test_job_outliving_its_lease_too_often_is_given_up(db, queue):
+    queue.enqueue([1])
+    for attempt in range(queue.max_attempts):
+        [job] = queue.claim(f"worker-{attempt}")
+        expire_lease(db, job['id'])
+
+    assert queue.claim("worker-last") == []
+    row = job_row(db, job['id'])
+    assert (row.status, row.last_error) == (FAILED, 'visibility timeout exceeded')
@@ -0,0 +1,78 @@
+"""Leader election through the scheduler_leases lock row"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database import SchedulerLease
+from leader_lease import LeaderLease
+
+
+def make_lease(ttl=30.0):
+    return LeaderLease("test-scheduler", ttl=ttl, heartbeat=1.0)
+
+
+def expire(db):
+    db.query(SchedulerLease).update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_only_one_process_holds_the_lease(db):
+    first, second = make_lease(), make_lease()
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    # The holder renews; the other keeps losing
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert (first.is_leader, second.is_leader) == (True, False)
+
+
+def test_racing_processes_elect_one_leader(db):
+    leases = [make_lease() for _ in range(8)]
+    results = [None] * len(leases)
+    start = threading.Barrier(len(leases))
+
+    def contend(index):
+        start.wait()
+        results[index] = leases[index].try_acquire()
+
+    threads = [threading.Thread(target=contend, args=(index,)) for index in range(len(leases))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert sum(lease.is_leader for lease in leases) == 1
+
+
+def test_expired_lease_is_taken_over(db):
+    first, second = make_lease(), make_lease()
+    first.try_acquire()
+    expire(db)
+
+    assert second.try_acquire()
+    # The old leader's next heartbeat finds it lost the lease
+    assert not first.try_acquire()
+    assert not first.is_leader
+    assert db.query(SchedulerLease.holder).scalar() == second.holder
+
+
+def test_release_hands_over_without_waiting_for_expiry(db):
+    first, second = make_lease(), make_lease()
+    first.try_acquire()
+
+    first.release()
+
+    assert not first.is_leader
+    assert second.try_acquire()
+
+
+def test_stalled_heartbeat_stops_acting_as_leader(db):
+    lease = make_lease(ttl=0.2)
+    assert lease.try_acquire()
+
+    time.sleep(0.3)
+
+    # No renewal within the ttl: another process may already hold it
+    assert not lease.is_leader
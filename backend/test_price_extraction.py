@@ -0,0 +1,25 @@
+from price_extraction import extract_price
+
+
+def test_grouped_and_plain_amounts():
+    assert extract_price("Deal price ₹1,23,456.50 only") == 123456.5
+    assert extract_price("Rs. 499") == 499.0
+    assert extract_price("INR 1,299") == 1299.0
+    assert extract_price("1,299 ₹") == 1299.0
+
+
+def test_amounts_with_extra_decimals_are_rejected():
+    # A truncated prefix (1,299.99 or 12.50) would be a wrong price
+    assert extract_price("₹1,299.999") is None
+    assert extract_price("₹12.5000") is None
+    assert extract_price("1,299.999 ₹") is None
+
+
+def test_rejected_amount_falls_through_to_the_next_price():
+    assert extract_price("₹12.5000 was ₹1,299.") == 1299.0
+
+
+if __name__ == "__main__":
+    test_grouped_and_plain_amounts()
+    test_amounts_with_extra_decimals_are_rejected()
+    test_rejected_amount_falls_through_to_the_next_price()
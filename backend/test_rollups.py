@@ -0,0 +1,98 @@
+"""Price rollups and compaction of raw history past retention"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import history_archive
+import rollups
+from database import PriceHistory, PriceRollup, TrackedProduct
+
+NOW = datetime(2026, 6, 15, 12, 0)
+OLD = NOW - rollups.RAW_RETENTION - timedelta(days=10)
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setattr(history_archive, "ARCHIVE_ENABLED", False)
+
+
+def add_product(db, is_active=True):
+    product = TrackedProduct(user_id=1, product_name="Kettle", product_url="https://example.com/kettle",
+                             current_price=100.0, original_price=100.0, platform='Other', is_active=is_active)
+    db.add(product)
+    db.commit()
+    return product
+
+
+def raw_prices(db, product_id):
+    return [(row.price, row.timestamp) for row in db.query(PriceHistory).filter(
+        PriceHistory.product_id == product_id).order_by(PriceHistory.timestamp)]
+
+
+def test_points_merge_in_time_order_whatever_order_they_arrive():
+    day = datetime(2026, 6, 1)
+    points = [(1, 120.0, day.replace(hour=15)), (1, 90.0, day.replace(hour=9)), (1, 150.0, day.replace(hour=12))]
+
+    in_order = rollups.aggregate(sorted(points, key=lambda point: point[2]))[(1, rollups.DAY, day)]
+    shuffled = rollups.aggregate(points)[(1, rollups.DAY, day)]
+
+    assert shuffled == in_order
+    assert (shuffled['open'], shuffled['high'], shuffled['low'], shuffled['close'], shuffled['count']) == \
+        (90.0, 150.0, 90.0, 120.0, 3)
+
+
+def test_add_price_updates_hour_and_day_buckets(db):
+    product = add_product(db)
+    rollups.add_price(db, product.id, 100.0, NOW.replace(hour=9, minute=5))
+    rollups.add_price(db, product.id, 80.0, NOW.replace(hour=9, minute=40))
+    rollups.add_price(db, product.id, 110.0, NOW.replace(hour=14))
+    db.commit()
+
+    [day] = rollups.series(db, product.id, rollups.DAY)
+    hours = rollups.series(db, product.id, rollups.HOUR)
+
+    assert (day.open, day.high, day.low, day.close, day.count) == (100.0, 110.0, 80.0, 110.0, 3)
+    assert [(hour.bucket_start.hour, hour.close, hour.count) for hour in hours] == [(14, 110.0, 1), (9, 80.0, 2)]
+
+
+def test_compaction_drops_cold_rows_but_keeps_each_products_newest(db):
+    product, stale = add_product(db), add_product(db)
+    for days in (3, 2, 1):
+        rollups.add_price(db, product.id, 100.0 + days, OLD - timedelta(days=days))
+    rollups.add_price(db, product.id, 95.0, NOW - timedelta(days=1))
+    # Nothing recent: its last raw row is kept for check_frequency
+    rollups.add_price(db, stale.id, 50.0, OLD - timedelta(days=2))
+    rollups.add_price(db, stale.id, 55.0, OLD)
+    db.commit()
+
+    result = rollups.compact(db, NOW)
+
+    assert result['raw_rows'] == 4
+    assert raw_prices(db, product.id) == [(95.0, NOW - timedelta(days=1))]
+    assert raw_prices(db, stale.id) == [(55.0, OLD)]
+    # The rollups still hold the deleted points
+    assert len(rollups.series(db, product.id, rollups.DAY)) == 4
+
+
+def test_compaction_drops_history_of_untracked_products(db):
+    dropped = add_product(db)
+    for hours in (3, 2, 1):
+        rollups.add_price(db, dropped.id, 100.0 + hours, NOW - timedelta(hours=hours))
+    dropped.is_active = False
+    db.commit()
+
+    rollups.compact(db, NOW)
+
+    assert raw_prices(db, dropped.id) == [(101.0, NOW - timedelta(hours=1))]
+
+
+def test_compaction_expires_hourly_rollups_but_keeps_daily(db):
+    product = add_product(db)
+    rollups.add_price(db, product.id, 100.0, NOW - rollups.HOURLY_RETENTION - timedelta(days=1))
+    rollups.add_price(db, product.id, 90.0, NOW - timedelta(hours=2))
+    db.commit()
+
+    assert rollups.compact(db, NOW)['hourly_rollups'] == 1
+    assert len(rollups.series(db, product.id, rollups.HOUR)) == 1
+    assert len(rollups.series(db, product.id, rollups.DAY)) == 2
+    assert db.query(PriceRollup).count() == 3
@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class TimerJob:
+    def __init__(self, name: str, func: Callable, interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.next_due = 0.0
+        self.stats = {'runs': 0, 'failures': 0, 'overlaps_skipped': 0, 'missed_ticks': 0,
+                      'last_duration': None, 'last_error': None}
+
+
+class TimerScheduler:
+    """Runs periodic jobs on the asyncio event loop from a heap of due times.
+
+    The loop sleeps until the earliest due time (or until a job is added), so
+    jobs fire on time without polling. Each job runs as its own task, so a
+    slow job never delays another; a job that is still running when it comes
+    due again is skipped for that tick rather than run twice. Sync callables
+    run in a worker thread.
+    """
+
+    def __init__(self, shutdown_timeout: Optional[float] = None):
+        self.shutdown_timeout = shutdown_timeout or float(os.getenv("SCHEDULER_SHUTDOWN_TIMEOUT", "30"))
+        self._jobs: Dict[str, TimerJob] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def add_job(self, name: str, func: Callable, interval: float, first_delay: Optional[float] = None):
+        """Run `func` every `interval` seconds, first after `first_delay` (default one interval)"""
+        job = TimerJob(name, func, interval)
+        job.next_due = time.monotonic() + (interval if first_delay is None else first_delay)
+        self._jobs[name] = job
+        heapq.heappush(self._heap, (job.next_due, next(self._sequence), name))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the timer loop on the running event loop"""
+        if self._runner is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while not self._stopping:
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            if timeout is None or timeout > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due, _, name = heapq.heappop(self._heap)
+            job = self._jobs.get(name)
+            if job is None or due != job.next_due:
+                continue  # replaced by add_job
+
+            now = time.monotonic()
+            if job.task is not None and not job.task.done():
+                job.stats['overlaps_skipped'] += 1
+                print(f"Timer job {name} still running; skipping this tick")
+            else:
+                job.task = asyncio.get_running_loop().create_task(self._invoke(job))
+
+            # Fixed rate: stay on the original grid, dropping ticks we slept through
+            job.next_due = due + job.interval
+            if job.next_due <= now:
+                missed = int((now - job.next_due) // job.interval) + 1
+                job.stats['missed_ticks'] += missed
+                job.next_due += missed * job.interval
+            heapq.heappush(self._heap, (job.next_due, next(self._sequence), name))
+
+    async def _invoke(self, job: TimerJob):
+        started = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.to_thread(job.func)
+            job.stats['last_error'] = None
+        except Exception as e:
+            job.stats['failures'] += 1
+            job.stats['last_error'] = str(e)
+            print(f"Timer job {job.name} failed: {e}")
+        finally:
+            job.stats['runs'] += 1
+            job.stats['last_duration'] = time.monotonic() - started
+
+    async def shutdown(self):
+        """Stop firing new runs and wait up to shutdown_timeout for in-flight ones"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._runner is not None:
+            await self._runner
+            self._runner = None
+
+        in_flight = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        if in_flight:
+            print(f"Waiting for {len(in_flight)} scheduled job(s) to finish...")
+            _, still_running = await asyncio.wait(in_flight, timeout=self.shutdown_timeout)
+            for task in still_running:
+                # Threads can't be interrupted; the task is abandoned, not killed
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        return {
+            name: dict(
+                job.stats,
+                running=job.task is not None and not job.task.done(),
+                next_run_in=max(0.0, job.next_due - now),
+            )
+            for name, job in self._jobs.items()
+        }
@@ -53,16 +53,14 @@ export default function ProductDetailsPage() {
   };
 
   const formatChartData = () => {
-    if (!productDetails?.price_history) return [];
+    if (!productDetails?.daily_history) return [];
     
-    return productDetails.price_history
-      .slice()
-      .reverse()
-      .map((item, index) => ({
-        date: new Date(item.timestamp).toLocaleDateString(),
-        price: item.price,
-        index
-      }));
+    // One point per day (closing price), oldest first
+    return productDetails.daily_history.map((item, index) => ({
+      date: new Date(item.timestamp).toLocaleDateString(),
+      price: item.price,
+      index
+    }));
   };
 
   const getRecommendationColor = (recommendation: string) => {
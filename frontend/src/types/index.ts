@@ -22,6 +22,16 @@ export interface PriceHistory {
   timestamp: string;
 }
 
+export interface PricePoint {
+  product_id: number;
+  timestamp: string;
+  price: number;
+  open: number;
+  high: number;
+  low: number;
+  count: number;
+}
+
 export interface AlternativeProduct {
   id: number;
   name: string;
@@ -43,6 +53,7 @@ export interface AIAnalysis {
 export interface ProductDetails {
   product: TrackedProduct;
   price_history: PriceHistory[];
+  daily_history: PricePoint[];
   ai_analysis: AIAnalysis;
   alternatives: AlternativeProduct[];
 }